@@ -34,6 +34,7 @@ DJANGO_APPS = (
     'django.contrib.sites',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # full-text and trigram search lookups
 
     # Useful template tags:
     # 'django.contrib.humanize',
@@ -201,6 +202,17 @@ MEDIA_ROOT = str(APPS_DIR('media'))
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = '/media/'
 
+# Cache-Control of the avatar thumbnails (their file names contain a hash of the content, so they never change),
+# sent by storages which support per-storage headers, i.e. django-storages' S3 backends used in production. Media
+# files stored by FileSystemStorage are served by Django (see config/urls.py) without it.
+AVATAR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# CACHING OF THE PUBLIC DIRECTORY PAGES
+# ------------------------------------------------------------------------------
+# Seconds browsers and proxies (see compose/nginx/nginx.conf) may show a directory page without asking whether it
+# has changed; afterwards they revalidate it with a conditional request, which is answered without rendering it.
+DIRECTORY_CACHE_MAX_AGE = 60
+
 # URL Configuration
 # ------------------------------------------------------------------------------
 ROOT_URLCONF = 'config.urls'
@@ -1,5 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.sites.models import Site
+from django.core.exceptions import PermissionDenied
 from django.shortcuts import reverse
 
 from .models import (AnnualImpactReport, Event, Abstract,
@@ -8,8 +9,10 @@ from .models import (AnnualImpactReport, Event, Abstract,
 
 from .admin_forms import (AbstractAdminForm, TagMembershipAdminForm, PolicyAdminForm, ProgramAdminForm,
                           InstitutionProfileAdminForm, EventAdminForm, ResourceAdminForm, TagAdminForm,
-                          TagSystemAdminForm, TagGeneralAdminForm, TagPersonAdminForm, TagProjectAdminForm)
+                          TagSystemAdminForm, TagGeneralAdminForm, TagPersonAdminForm, TagProjectAdminForm,
+                          AnnualImpactReportAdminForm)
 
+from .moderation import ACTIONS, moderate
 from .utils import export_as_csv_action, create_modeladmin
 
 
@@ -24,6 +27,32 @@ class CustomAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         return obj.save(user=request.user)
 
+    actions = ['mark_reviewed', 'hide', 'unhide']
+
+    def moderate(self, request, queryset, action):
+        """Apply a moderation action to the selected objects with one UPDATE, see moderation.py."""
+        try:
+            count = moderate({self.model: list(queryset.values_list('pk', flat=True))}, action, request.user)
+        except PermissionDenied:
+            self.message_user(request, 'Only trusted users and SPARC staff can approve objects.', messages.ERROR)
+            return
+        self.message_user(request, '{} {} {}.'.format(
+            count, self.model._meta.verbose_name if count == 1 else self.model._meta.verbose_name_plural,
+            ACTIONS[action][1],
+        ))
+
+    def mark_reviewed(self, request, queryset):
+        self.moderate(request, queryset, 'review')
+    mark_reviewed.short_description = 'Mark selected %(verbose_name_plural)s as reviewed'
+
+    def hide(self, request, queryset):
+        self.moderate(request, queryset, 'hide')
+    hide.short_description = 'Hide selected %(verbose_name_plural)s'
+
+    def unhide(self, request, queryset):
+        self.moderate(request, queryset, 'unhide')
+    unhide.short_description = 'Unhide selected %(verbose_name_plural)s'
+
 
 # see https://docs.djangoproject.com/en/1.10/ref/contrib/admin/
 class ProfileFilledOutListFilter(admin.SimpleListFilter):
@@ -61,18 +90,47 @@ class ProfileDisplayedListFilter(admin.SimpleListFilter):
             return queryset.filter(hidden=False)
 
 
+class ChoicePairListFilter(admin.SimpleListFilter):
+    """Filter by the code of a choice stored together with its "Other" text, i.e. [code, other]."""
+    code_choices = ()
+
+    def lookups(self, request, model_admin):
+        return self.code_choices
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name + '__0': self.value()})
+
+
+class EventTypeListFilter(ChoicePairListFilter):
+    title = ('type')
+    parameter_name = 'type'
+    code_choices = Event.TYPE_CHOICES
+
+
+class AbstractLanguageListFilter(ChoicePairListFilter):
+    title = ('language')
+    parameter_name = 'language'
+    code_choices = Abstract.LANGUAGE_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(language_code=self.value())
+
+
 @admin.register(AnnualImpactReport)
 class AnnualImpactReportAdmin(CustomAdmin):
     list_display = ['institution', 'year', 'reviewed', 'displayed_admin']
     list_filter = ['year', 'reviewed', ProfileDisplayedListFilter]
     search_fields = ['institution__name']
+    form = AnnualImpactReportAdminForm
 
 
 @admin.register(Event)
 class EventAdmin(CustomAdmin):
     list_display = ['name', 'institution', 'reviewed', 'displayed_admin']
     search_fields = ['name', 'institution__name']
-    list_filter = ['type', 'reviewed', ProfileDisplayedListFilter]
+    list_filter = [EventTypeListFilter, 'reviewed', ProfileDisplayedListFilter]
     form = EventAdminForm
 
 
@@ -80,7 +138,7 @@ class EventAdmin(CustomAdmin):
 class AbstractAdmin(CustomAdmin):
     list_display = ['institution', 'name', 'reviewed', 'displayed_admin']
     search_fields = ['abstract_raw', 'institution__name']
-    list_filter = ['language', 'reviewed', ProfileDisplayedListFilter]
+    list_filter = [AbstractLanguageListFilter, 'reviewed', ProfileDisplayedListFilter]
     form = AbstractAdminForm
 
 
@@ -89,7 +147,7 @@ class InstitutionAdmin(CustomAdmin):
     exclude = ['reviewed', 'hidden']  # #todo -- consider removing these fields completely from the model, not just from the admin (we're using "reviewed" and "hidden" at the institutional profile level, having them duplicated in the institution model would be confusing)
     list_display = ['name', 'profile']
     search_fields = ['name', 'profile__institution_website']
-    readonly_fields = ['students_impacted_total', 'id']
+    readonly_fields = ['students_impacted_total', 'faculty_impacted_total', 'courses_impacted_total', 'id']
     ordering = ('name',)
     list_per_page = 200
 
@@ -1,9 +1,7 @@
-import ast
-
 from django import forms
 from django.core.validators import ValidationError
 
-from .fields import OptionalChoiceField, OptionalMultiChoiceField
+from .fields import OptionalChoiceField, OptionalMultiChoiceField, RatingChoiceField
 from .forms_mixins import SaveWithUserMixin
 from .models import Abstract, Tag, Policy, Program, InstitutionProfile, Event, Resource
 
@@ -54,7 +52,13 @@ class TagGeneralAdminForm(forms.ModelForm):
         exclude.append('slug')
 
 class AnnualImpactReportAdminForm(SaveWithUserMixin, forms.ModelForm):
-    pass
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.instance._state.adding:
+            # a saved report without a rating was answered "Not sure" (a new one is not answered yet)
+            for name, field in self.fields.items():
+                if isinstance(field, RatingChoiceField) and self.initial.get(name) is None:
+                    self.initial[name] = RatingChoiceField.NOT_SURE
 
 class AbstractAdminForm(SaveWithUserMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
@@ -102,8 +106,6 @@ class ProgramAdminForm(SaveWithUserMixin, forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         # do not set hardcoded values (i.e., with a fixed string) via "self.initial" for strategy_adaptation, strategy_adoption, or any other field -- this would override stored values from the database both in the admin *and* on the form and display the hardcoded values everywhere
-        self.initial['partners'] = ast.literal_eval(self.initial.get('partners', '[]'))
-        self.initial['funding_library'] = ast.literal_eval(self.initial.get('funding_library', '[]'))
         self.fields['incentives'] = OptionalMultiChoiceField(
             label=Program.INCENTIVES_VERBOSE_NAME,
             choices=Program.INCENTIVES_CHOICES,
@@ -171,21 +173,6 @@ class InstitutionProfileAdminForm(SaveWithUserMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        custom_initials = [
-            'campus_engagement',
-            'library_engagement',
-            'subject_engagement',
-            'staff_location',
-            'catalog',
-            'oer_included',
-        ]
-
-        for key in custom_initials:
-            try:
-                self.initial[key] = ast.literal_eval(self.initial[key])
-            except (ValueError, KeyError):
-                self.initial[key] = []
-
         # avoid nine dashes ("---------") for empty choices
         # #todo -- fix this on other forms, too
         for field in ('campus_engagement', 'subject_engagement', 'oer_included', 'oerdegree_offered'):
@@ -248,9 +235,6 @@ class ResourceAdminForm(SaveWithUserMixin, forms.ModelForm):
 
         super().__init__(*args, **kwargs)
 
-        self.initial['type'] = ast.literal_eval(self.initial.get('type', '[]'))
-        self.initial['audience'] = ast.literal_eval(self.initial.get('audience', '[]'))
-
         self.fields['license'] = OptionalChoiceField(
             choices=Resource.LICENSE_CHOICES,
             help_text='Please specify the copyright permissions of the work.',
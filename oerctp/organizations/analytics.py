@@ -0,0 +1,194 @@
+"""
+Analytics of the annual impact reports for SPARC staff: rollups by year, state/province, Carnegie class and control.
+
+The published (reviewed, not hidden) reports are loaded as column arrays in one query. Groups, totals, means,
+percentiles and distributions are then computed with NumPy over whole columns, with no Python loop per report.
+The result is cached per data version of the report table, i.e. until a report is saved (reviewed, hidden, ...) or
+deleted. `manage.py benchmark_impact_analytics` times the computation on generated data.
+"""
+import numpy as np
+
+from django.core.cache import cache
+
+from .facets import data_version
+from .models import AnnualImpactReport, InstitutionProfile
+
+ANALYTICS_TIMEOUT = 60 * 60 * 24
+
+# (name, title, field of the report, labels of the values)
+DIMENSIONS = [
+    ('year', 'Academic Year', 'year', dict(AnnualImpactReport.YEAR_CHOICES)),
+    ('state_province', 'State/Province', 'institution__profile__state_province',
+     dict(InstitutionProfile.STATE_PROVINCE_CHOICES)),
+    ('carnegie', 'Carnegie Classification', 'institution__profile__carnegie', {}),
+    ('control', 'Control', 'institution__profile__control', {}),
+]
+
+MEASURES = ['impact_students', 'impact_faculty', 'impact_courses']
+RATINGS = AnnualImpactReport.AWARENESS_FIELDS
+RATING_VALUES = list(range(1, 11))
+PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def published_reports():
+    return AnnualImpactReport.objects.filter(reviewed=True, hidden=False)
+
+
+def encode(column):
+    """
+    The distinct values of a column (sorted) and the index of each value in them, (keys, codes).
+
+    Faster than numpy.unique() for Python strings, which it compares one by one while sorting the whole column.
+    """
+    keys = sorted(dict.fromkeys(column))
+    index = {key: i for i, key in enumerate(keys)}
+    return keys, np.fromiter(map(index.__getitem__, column), dtype=int, count=len(column))
+
+
+def load_columns(reports=None):
+    """
+    {name: array} of the reports (published ones by default), loaded in one query.
+
+    Dimensions are (keys, codes) as returned by encode(), measures and ratings are floats with NaN for unknown values
+    (not filled in, or a "Not sure" rating).
+    """
+    reports = published_reports() if reports is None else reports
+    fields = [field for name, title, field, labels in DIMENSIONS] + MEASURES + RATINGS
+    rows = list(reports.order_by().values_list(*fields))
+    values = list(zip(*rows)) if rows else [()] * len(fields)
+
+    columns = {}
+    for (name, title, field, labels), column in zip(DIMENSIONS, values):
+        columns[name] = encode([value or '' for value in column])  # '': not filled in
+    for field, column in zip(MEASURES + RATINGS, values[len(DIMENSIONS):]):
+        columns[field] = np.array(column, dtype=float)  # None becomes NaN
+    return columns
+
+
+def group_percentiles(values, groups, group_count, percentiles, value_order=None):
+    """
+    Percentiles (interpolated linearly, ignoring NaN) of `values` in each group, an array of shape
+    (group_count, len(percentiles)).
+
+    All groups are computed at once: the values are sorted by group and value, NaN last within each group, and the
+    percentile positions of every group are looked up in the sorted array. `value_order` is np.argsort(values), which
+    can be shared by several groupings of the same values; it is re-sorted by group with a stable (radix) sort.
+    """
+    if value_order is None:
+        value_order = np.argsort(values, kind='stable')
+    group_dtype = np.int16 if group_count <= np.iinfo(np.int16).max else int
+    order = value_order[np.argsort(groups[value_order].astype(group_dtype), kind='stable')]
+    ordered = values[order]
+    sizes = np.bincount(groups, minlength=group_count)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    known = np.bincount(groups, weights=~np.isnan(values), minlength=group_count).astype(int)
+
+    positions = starts[:, None] + (known[:, None] - 1) * np.asarray(percentiles, dtype=float)[None, :] / 100
+    positions = np.clip(positions, 0, max(len(values) - 1, 0))
+    lower = np.floor(positions).astype(int)
+    upper = np.ceil(positions).astype(int)
+    fraction = positions - lower
+    if len(values):
+        result = ordered[lower] * (1 - fraction) + ordered[upper] * fraction
+    else:
+        result = np.zeros(positions.shape)
+    result[known == 0] = np.nan
+    return result
+
+
+def measure_summary(values, groups, group_count, value_order=None):
+    """Number of known values, total, mean and percentiles of a measure in each group (arrays by group)."""
+    known = ~np.isnan(values)
+    count = np.bincount(groups[known], minlength=group_count)
+    total = np.bincount(groups[known], weights=values[known], minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return {
+        'count': count,
+        'total': total,
+        'mean': mean,
+        'percentiles': group_percentiles(values, groups, group_count, PERCENTILES, value_order),
+    }
+
+
+def rating_summary(ratings, groups, group_count, value_order=None):
+    """Distribution (counts of 1 to 10 and unknown), mean and median of a rating in each group."""
+    known = ~np.isnan(ratings)
+    cells = groups[known] * len(RATING_VALUES) + ratings[known].astype(int) - RATING_VALUES[0]
+    distribution = np.bincount(cells, minlength=group_count * len(RATING_VALUES)).reshape(group_count, -1)
+    count = distribution.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (distribution * np.array(RATING_VALUES)).sum(axis=1) / count
+    return {
+        'distribution': distribution,
+        'unknown': np.bincount(groups, minlength=group_count) - count,
+        'mean': mean,
+        'median': group_percentiles(ratings, groups, group_count, [50], value_order)[:, 0],
+    }
+
+
+def number(value):
+    """A JSON number: None for NaN, integral values as int."""
+    value = float(value)
+    if np.isnan(value):
+        return None
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def group_rows(keys, labels, columns, value_orders, groups):
+    group_count = len(keys)
+    measures = {
+        field: measure_summary(columns[field], groups, group_count, value_orders[field]) for field in MEASURES
+    }
+    ratings = {field: rating_summary(columns[field], groups, group_count, value_orders[field]) for field in RATINGS}
+    reports = np.bincount(groups, minlength=group_count)
+
+    rows = []
+    for i, key in enumerate(keys):
+        row = {'key': key, 'label': labels.get(key, key or 'Not specified'), 'reports': int(reports[i])}
+        for field, summary in measures.items():
+            row[field] = {
+                'count': int(summary['count'][i]),
+                'total': number(summary['total'][i]),
+                'mean': number(summary['mean'][i]),
+                'percentiles': {str(p): number(v) for p, v in zip(PERCENTILES, summary['percentiles'][i])},
+            }
+        for field, summary in ratings.items():
+            row[field] = {
+                'distribution': [int(count) for count in summary['distribution'][i]],
+                'unknown': int(summary['unknown'][i]),
+                'mean': number(summary['mean'][i]),
+                'median': number(summary['median'][i]),
+            }
+        rows.append(row)
+    return rows
+
+
+def compute_analytics(columns):
+    """The overall figures and the rollups by each dimension of the report columns (see load_columns()), as JSON."""
+    report_count = len(columns[MEASURES[0]])
+    # every column is sorted once, for all groupings
+    value_orders = {field: np.argsort(columns[field], kind='stable') for field in MEASURES + RATINGS}
+    analytics = {
+        'reports': report_count,
+        'percentiles': PERCENTILES,
+        'rating_values': RATING_VALUES,
+        'overall': group_rows(
+            [''], {'': 'All reports'}, columns, value_orders, np.zeros(report_count, dtype=int),
+        )[0],
+        'rollups': {},
+    }
+    for name, title, field, labels in DIMENSIONS:
+        keys, codes = columns[name]
+        analytics['rollups'][name] = group_rows(keys, labels, columns, value_orders, codes)
+    return analytics
+
+
+def impact_analytics():
+    """The analytics of the published reports, cached until the report table changes."""
+    key = 'impact-analytics:{}'.format(data_version(AnnualImpactReport))
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = compute_analytics(load_columns())
+        cache.set(key, analytics, ANALYTICS_TIMEOUT)
+    return analytics
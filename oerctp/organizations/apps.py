@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class OrganizationsConfig(AppConfig):
     name = 'oerctp.organizations'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registers the receivers)
+        from .indexes import create_indexes
+        post_migrate.connect(create_indexes, sender=self)
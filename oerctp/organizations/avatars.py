@@ -0,0 +1,248 @@
+"""
+Twitter avatars of the institutions, archived in the Wayback Machine.
+
+For every profile with a Twitter handle the avatar URL is read from the Twitter page, the avatar is saved by the
+Wayback Machine and the URL of the latest snapshot is stored in `twitter_image_url` (see update_twitter_avatars).
+The profiles are handled by a pool of threads; requests to each host are spaced out and retried with backoff.
+The HTTP client is a callable, so tests can replace it or point the refresher to a local server.
+
+The public pages don't hot-link the archived avatar: it is downloaded once and resized to THUMBNAIL_SIZES, saved as
+PNG (and WebP, if Pillow supports it) to the media storage under the hash of its content. It is only downloaded
+again when `twitter_image_url` changes, i.e. when the Twitter handle changes or the avatar is refreshed.
+The file names never change, so the thumbnails are sent with a far-future Cache-Control (AVATAR_CACHE_CONTROL) --
+by the S3 storage of production only: with FileSystemStorage (local development) Django serves them without it.
+"""
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import InvalidURL
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlsplit
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.core.files.base import ContentFile
+from django.core.files.storage import get_storage_class
+from django.db import transaction
+from django.db.models import Case, CharField, TextField, Value, When
+from django.db.models.functions import Cast
+from PIL import Image, features
+
+from .models import InstitutionProfile, PublishedInstitution
+from .versions import bump_directory_version
+
+TWITTER_URL = 'https://twitter.com/'
+WAYBACK_SAVE_URL = 'https://web.archive.org/save/'
+WAYBACK_AVAILABLE_URL = 'https://archive.org/wayback/available?url='
+
+THUMBNAIL_SIZES = (220,)  # the size of the logo on the institution page, the only place the thumbnails are shown
+THUMBNAIL_DIRECTORY = 'avatars'
+
+
+class AvatarError(Exception):
+    pass
+
+
+def urlopen_client(url, timeout):
+    with urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def avatar_suffix(profile):
+    # avatar URLs don't contain usernames, so if an institution changed its Twitter handle, we would otherwise have no
+    # way of knowing what username their avatar URL refers to
+    return '#twitter_username=' + profile.institution_twitter_username
+
+
+def needs_refresh(profile):
+    url = profile.twitter_image_url or ''
+    return not (url.startswith('https://') and url.endswith(avatar_suffix(profile)))
+
+
+def needs_mirror(profile):
+    return bool(profile.twitter_image_url) and (
+        not profile.twitter_image_thumbnails or profile.twitter_image_source != profile.twitter_image_url
+    )
+
+
+def thumbnail_storage():
+    storage = get_storage_class()()
+    if hasattr(storage, 'headers'):  # django-storages' S3 backends send these headers with every file
+        storage.headers = dict(storage.headers, **{'Cache-Control': settings.AVATAR_CACHE_CONTROL})
+    return storage
+
+
+def thumbnail_formats():
+    return ['png', 'webp'] if features.check_module('webp') else ['png']
+
+
+# one lock per image, so that two profiles with the same avatar don't store it twice at the same time
+_image_locks = defaultdict(threading.Lock)
+
+
+def save_thumbnails(image_data, storage):
+    """Resize the image to THUMBNAIL_SIZES and store the thumbnails which don't exist yet: {size: {format: name}}."""
+    digest = hashlib.sha1(image_data).hexdigest()[:20]
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+    except (IOError, SyntaxError) as e:  # Pillow raises these for files it can't read
+        raise AvatarError('Invalid image: {}'.format(e))
+    image = image.convert('RGBA')
+
+    thumbnails = {}
+    with _image_locks[digest]:
+        for size in THUMBNAIL_SIZES:
+            thumbnails[str(size)] = {}
+            for image_format in thumbnail_formats():
+                name = '{}/{}-{}.{}'.format(THUMBNAIL_DIRECTORY, digest, size, image_format)
+                if not storage.exists(name):
+                    thumbnail = image.copy()
+                    thumbnail.thumbnail((size, size), Image.ANTIALIAS)
+                    output = io.BytesIO()
+                    thumbnail.save(output, image_format.upper())
+                    name = storage.save(name, ContentFile(output.getvalue()))
+                thumbnails[str(size)][image_format] = name
+    return thumbnails
+
+
+class HostRateLimiter:
+    """Let at most one request per `interval` seconds through to each host."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_request = {}
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request.get(host, now))
+            self.next_request[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class AvatarRefresher:
+    """
+    Look up the archived avatar URLs of many profiles at once.
+
+    `client(url, timeout)` returns the body of the response (bytes) and raises URLError (or OSError) on failure, or
+    ValueError (or http.client.InvalidURL) if the URL is malformed.
+    """
+
+    def __init__(self, client=urlopen_client, concurrency=8, interval=0.25, timeout=10, retries=3, backoff=2.0,
+                 twitter_url=TWITTER_URL, save_url=WAYBACK_SAVE_URL, available_url=WAYBACK_AVAILABLE_URL):
+        self.client = client
+        self.concurrency = concurrency
+        self.rate_limiter = HostRateLimiter(interval)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.twitter_url = twitter_url
+        self.save_url = save_url
+        self.available_url = available_url
+
+    def fetch(self, url):
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait(url)
+            try:
+                return self.client(url, self.timeout)
+            except HTTPError as e:
+                if (e.code != 429 and e.code < 500) or attempt == self.retries:  # e.g. not found will not get better
+                    raise AvatarError('{} returned {}'.format(url, e.code))
+            except (URLError, OSError) as e:  # also covers socket.timeout
+                if attempt == self.retries:
+                    raise AvatarError('{} failed: {}'.format(url, e))
+            except (ValueError, InvalidURL) as e:  # a malformed URL, e.g. of a handle with a space: retrying won't help
+                raise AvatarError('{} is not a valid URL: {}'.format(url, e))
+            time.sleep(self.backoff ** attempt)
+
+    def avatar_url(self, profile):
+        """The https URL of the latest Wayback Machine snapshot of the profile's avatar."""
+        page = self.fetch(self.twitter_url + profile.institution_twitter_username).decode('utf-8', 'replace')
+        try:
+            # find "data-resolved-url-large" and extract string between two quotation marks that follow it
+            avatar_url = page.split('data-resolved-url-large')[1].split('"')[1]
+        except IndexError:
+            raise AvatarError('No avatar on the Twitter page of ' + profile.institution_twitter_username)
+
+        self.fetch(self.save_url + avatar_url)
+        try:
+            wayback_json = json.loads(self.fetch(self.available_url + quote(avatar_url, safe='')).decode('utf-8'))
+            latest_snapshot = wayback_json['archived_snapshots']['closest']['url']
+        except (ValueError, KeyError, TypeError):
+            raise AvatarError('No snapshot of ' + avatar_url)
+        return latest_snapshot.replace('http://', 'https://') + avatar_suffix(profile)
+
+    def thumbnails(self, profile, storage):
+        """Download the archived avatar of the profile and store its thumbnails: {size: {format: name}}."""
+        return save_thumbnails(self.fetch(profile.twitter_image_url.split('#')[0]), storage)
+
+    def map(self, function, profiles, *args):
+        """Yield (profile, result or None, error or None) for every profile, in the order of `profiles`."""
+        def call(profile):
+            try:
+                return profile, function(profile, *args), None
+            except AvatarError as e:
+                return profile, None, e
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            yield from executor.map(call, profiles)
+
+    def refresh(self, profiles):
+        return self.map(self.avatar_url, profiles)
+
+    def mirror(self, profiles, storage):
+        return self.map(self.thumbnails, profiles, storage)
+
+
+def mark_stale(profile_ids):
+    """Have the public pages of the profiles rebuilt by the next rebuild_published_institutions (see publish.py)."""
+    PublishedInstitution.objects.filter(institution__profile__in=profile_ids).update(stale=True)
+    bump_directory_version()
+
+
+def save_avatar_urls(urls):
+    """
+    Store {profile id: avatar URL} with a single UPDATE.
+
+    A queryset update does not send post_save, so the profiles don't have to be moderated again; their published
+    documents are marked stale instead, in the same transaction and after the update, so a page read in between is
+    not rebuilt from the old profile and kept.
+    """
+    if not urls:
+        return 0
+    with transaction.atomic():
+        count = InstitutionProfile.objects.filter(id__in=urls).update(twitter_image_url=Case(
+            *[When(id=profile_id, then=Value(url)) for profile_id, url in urls.items()],
+            output_field=CharField()
+        ))
+        mark_stale(list(urls))
+    return count
+
+
+def save_avatar_thumbnails(thumbnails):
+    """Store {profile: thumbnails} with a single UPDATE, remembering which twitter_image_url they were made from."""
+    if not thumbnails:
+        return 0
+    profile_ids = [profile.id for profile in thumbnails]
+    with transaction.atomic():
+        count = InstitutionProfile.objects.filter(id__in=profile_ids).update(
+            twitter_image_source=Case(
+                *[When(id=profile.id, then=Value(profile.twitter_image_url)) for profile in thumbnails],
+                output_field=CharField()
+            ),
+            twitter_image_thumbnails=Cast(Case(
+                *[When(id=profile.id, then=Value(json.dumps(names))) for profile, names in thumbnails.items()],
+                output_field=TextField()
+            ), JSONField()),
+        )
+        mark_stale(profile_ids)
+    return count
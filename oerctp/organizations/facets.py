@@ -0,0 +1,103 @@
+"""
+Choices of the directory filters which depend on the data (e.g. only the states which have a reviewed institution).
+
+The choices are computed on first use, not when filters.py is imported, and kept in the configured cache for
+FACET_CHOICES_TIMEOUT seconds. Saving or deleting an institutional profile invalidates the profile choices
+(see signals.py); the stored value choices are cached per data version of their table instead.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import InstitutionProfile
+
+FACET_CHOICES_TIMEOUT = 60 * 60
+
+
+class ProfileFacetChoices:
+    """
+    Callable returning the (value, label) choices of an InstitutionProfile field used by reviewed profiles.
+
+    Labels come from `choices` (the model's *_CHOICES). Instances register themselves, so they can all be invalidated.
+    """
+    registry = []
+
+    def __init__(self, field, choices, sort=False):
+        self.field = field
+        self.choices = choices
+        self.sort = sort
+        self.registry.append(self)
+
+    @property
+    def cache_key(self):
+        return 'facet-choices:institutionprofile:{}'.format(self.field)
+
+    def __call__(self):
+        facet_choices = cache.get(self.cache_key)
+        if facet_choices is None:
+            facet_choices = self.build()
+            cache.set(self.cache_key, facet_choices, FACET_CHOICES_TIMEOUT)
+        return facet_choices
+
+    def __deepcopy__(self, memo):
+        # FilterSet instances deep-copy their filters; the provider holds no per-request state
+        return self
+
+    def build(self):
+        labels = dict(self.choices)
+        values = InstitutionProfile.objects.filter(reviewed=True).values_list(self.field, flat=True).distinct()
+        facet_choices = [(value, labels.get(value)) for value in values]
+        if self.sort:
+            # https://web.archive.org/web/20171010210134/https://stackoverflow.com/questions/3121979/how-to-sort-list-tuple-of-lists-tuples
+            facet_choices.sort(key=lambda choice: choice[1] or '')
+        return facet_choices
+
+
+def invalidate_profile_facet_choices():
+    cache.delete_many([facet_choices.cache_key for facet_choices in ProfileFacetChoices.registry])
+
+
+def data_version(model):
+    """Identify the current contents of a ModelMixin table: latest modification and row count."""
+    stats = model._default_manager.aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+    updated_at = stats['updated_at'].timestamp() if stats['updated_at'] else 0
+    return '{}-{}'.format(updated_at, stats['count'])
+
+
+class StoredValueChoices:
+    """
+    Callable returning the (value, label) choices of every distinct value stored in a model field.
+
+    `make_choice` turns a stored value into a (value, label) pair, or None if the value should not be offered.
+    The list is cached per data version, so a single cheap aggregate query tells whether it has to be built again.
+    """
+
+    def __init__(self, model, field, make_choice):
+        self.model = model
+        self.field = field
+        self.make_choice = make_choice
+
+    def cache_key(self, version):
+        return 'facet-choices:{}:{}:{}'.format(self.model._meta.label_lower, self.field, version)
+
+    def __call__(self):
+        key = self.cache_key(data_version(self.model))
+        facet_choices = cache.get(key)
+        if facet_choices is None:
+            facet_choices = self.build()
+            cache.set(key, facet_choices, FACET_CHOICES_TIMEOUT)
+        return facet_choices
+
+    def build(self):
+        values = self.model._default_manager.distinct().order_by(self.field).values_list(self.field, flat=True)
+        facet_choices = (self.make_choice(value) for value in values if value is not None)
+        return [choice for choice in facet_choices if choice]
+
+
+state_province_choices = ProfileFacetChoices('state_province', InstitutionProfile.STATE_PROVINCE_CHOICES, sort=True)
+institution_type_choices = ProfileFacetChoices('type', InstitutionProfile.TYPE_CHOICES)
+instcat_choices = ProfileFacetChoices('instcat', InstitutionProfile.INSTCAT_CHOICES)
+carnegie_choices = ProfileFacetChoices('carnegie', InstitutionProfile.CARNEGIE_CHOICES)
+congressional_district_choices = ProfileFacetChoices(
+    'congressional_district', InstitutionProfile.CONGRESSIONAL_DISTRICT_CHOICES,
+)
+system_source_id_choices = ProfileFacetChoices('system_source_id', InstitutionProfile.SYSTEM_SOURCE_ID_CHOICES)
@@ -1,7 +1,7 @@
-import ast
-
 from django import forms
+from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
+from django.db import models
 from django.forms.widgets import Select, RendererMixin, ChoiceFieldRenderer, ChoiceInput
 from django.utils.encoding import force_text
 from django.utils.html import format_html
@@ -53,10 +53,9 @@ class OptionalChoiceWidget(forms.MultiWidget):
 
     def decompress(self, value):
         if value:
-            value = ast.literal_eval(value)
             try: # todo: log this situation and find out when it occurs.
                 return [value[0], value[1]]
-            except:
+            except (TypeError, IndexError, KeyError):
                 return [None, None]
         return [None, None]
 
@@ -105,3 +104,66 @@ class OptionalMultiChoiceField(forms.MultiValueField):
                     raise ValidationError('You have to select "Other" if you want to fill in the input.')
             return data_list[0], data_list[1]
         return None, None
+
+
+# Checkboxes stored as an array
+class ChoiceArrayField(ArrayField):
+    """
+    List of codes selected from `choices`, stored as a Postgres array (decoded by the database driver).
+
+    The choices are set on the base field, so each selected code is validated against them. The form field is a
+    MultipleChoiceField displayed as checkboxes.
+    """
+
+    def __init__(self, base_field=None, choices=(), **kwargs):
+        if base_field is None:
+            base_field = models.CharField(max_length=100, choices=choices)
+        super().__init__(base_field, **kwargs)
+
+    def formfield(self, **kwargs):
+        defaults = {
+            'form_class': forms.MultipleChoiceField,
+            'choices': self.base_field.choices,
+            'widget': forms.CheckboxSelectMultiple,
+        }
+        defaults.update(kwargs)
+        # skip ArrayField.formfield(), which would display a comma separated text input
+        return super(ArrayField, self).formfield(**defaults)
+
+
+# Rating stored as a number, "Not sure" as NULL
+class RatingChoiceField(forms.TypedChoiceField):
+    """
+    Required choice of a rating, where "Not sure" is an answer too: it is submitted as NOT_SURE and cleaned to None.
+
+    `choices` are those of the model field, with (None, label of "Not sure").
+    """
+    NOT_SURE = 'unknown'
+
+    def __init__(self, choices=(), coerce=None, empty_value=None, **kwargs):
+        not_sure = dict(choices).get(None, 'Not sure')
+        choices = [('', '---------')] + [(value, label) for value, label in choices if value not in ('', None)]
+        choices.append((self.NOT_SURE, not_sure))
+        super().__init__(choices=choices, coerce=self.coerce_rating, empty_value=None, **kwargs)
+
+    def coerce_rating(self, value):
+        return None if value == self.NOT_SURE else int(value)
+
+
+class RatingField(models.SmallIntegerField):
+    """
+    Rating chosen from `choices`, stored as a small integer; NULL means "Not sure".
+
+    Stored as numbers, ratings can be averaged and counted by the database. The form field (RatingChoiceField) still
+    requires an answer, "Not sure" included.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('blank', True)
+        super().__init__(**kwargs)
+
+    def formfield(self, **kwargs):
+        defaults = {'choices_form_class': RatingChoiceField, 'required': True}
+        defaults.update(kwargs)
+        return super().formfield(**defaults)
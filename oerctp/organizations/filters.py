@@ -1,10 +1,16 @@
 from django import forms
-from django.db.utils import ProgrammingError
+from django.db.models import F, IntegerField, Q, Value
+from django.db.models.functions import Cast, Coalesce
 from django.contrib.auth.models import User, Group
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.utils.text import slugify
+from . import facets
+from .search import SEARCH_CONFIG, trigram_available
 from .models import Institution, InstitutionProfile, Program, Policy, Event, Resource, Abstract
 
-import ast
 import django_filters
+import json
+from django_filters.conf import settings as django_filters_settings
 
 # FYI: https://docs.google.com/document/d/1203rWEibAFdM_tJuc05WvWivRTS6YFBePePRPOGO6ME/edit
 # FYI: filter types listed here: https://github.com/carltongibson/django-filter/blob/develop/django_filters/filters.py
@@ -35,258 +41,265 @@ class MyTestFilter(django_filters.ChoiceFilter):
 """
 
 class CustomEventTypeFilter(django_filters.MultipleChoiceFilter):
+    """
+    Offer every distinct stored event type (the JSON [code, other] of Event.type) as a choice.
+
+    Choice values of a form are strings, so the stored lists are encoded as JSON and decoded again when filtering.
+    The choices are built by facets.StoredValueChoices and cached until the table changes.
+    """
+    type_labels = dict(Event.TYPE_CHOICES)
+
+    def choice_label(self, lst):
+        if str(lst[0]) == 'other':
+            return str(lst[1]) + ' (Custom Type)'
+        return self.type_labels.get(str(lst[0]), 'Unknown')
+
+    def stored_value_choice(self, value):
+        label = self.choice_label(value)
+        if label:
+            return json.dumps(value), label
+
     @property
     def field(self):
-        qs = self.model._default_manager.distinct()
-        qs = qs.order_by(self.name).values_list(self.name, flat=True)
-        self.extra['choices'] = [] # list(self.extra['choices']) # # convert to list, so we can append
-        # self.extra['choices'] = [(o, o) for o in qs]
-        # return super(CustomEventTypeFilter, self).field
-        for o in qs:
-            lst = ast.literal_eval(o)
-            if str(lst[0]) == 'other':
-                event_type = str(lst[1]) + ' (Custom Type)'
-            else:
-                event_type = dict(Event.TYPE_CHOICES).get(str(lst[0]), 'Unknown')
-            self.extra['choices'].append((o, event_type))
-        return super(CustomEventTypeFilter, self).field
+        if not hasattr(self, '_field'):
+            self.extra['choices'] = facets.StoredValueChoices(self.model, self.name, self.stored_value_choice)()
+        return super().field
+
+    def get_filter_predicate(self, v):
+        return {self.name: json.loads(v)}
+
+
+def language_choice(label):
+    return slugify(label), label
 
 
 class CustomAbstractLanguageFilter(django_filters.MultipleChoiceFilter):
+    """
+    Offer every language of the stored abstracts, filtering by the decoded Abstract.language_slug column.
+
+    The choices are built from Abstract.language_label by facets.StoredValueChoices, like the event type ones.
+    """
+
     @property
     def field(self):
-        qs = self.model._default_manager.distinct()
-        qs = qs.order_by(self.name).values_list(self.name, flat=True)
-        self.extra['choices'] = [] # list(self.extra['choices']) # # convert to list, so we can append
-        for o in qs:
-            lst = ast.literal_eval(o)
-            if str(lst[0]) == 'other':
-                lang = str(lst[1])
-            else:
-                lang = dict(Abstract.LANGUAGE_CHOICES).get(str(lst[0]), 'Unknown')
-            self.extra['choices'].append((o, lang))
-        return super(CustomAbstractLanguageFilter, self).field
-
-
-class CustomResourceTypeFilter(django_filters.MultipleChoiceFilter):
-    @property
-    def field(self):
-        qs = self.model._default_manager.distinct()
-        qs = qs.order_by(self.name).values_list(self.name, flat=True)
-        self.extra['choices'] = [] # convert to list, so we can append
-        for o in qs:
-            output = []
-            try:
-                lst = ast.literal_eval(o)
-                dct = dict(Resource.TYPE_CHOICES)
-                if not (len(lst) == 1 and str(lst[0]) == "other"):
-                    for item in lst:
-                        output.append(dct.get(item))
-            except ValueError:
-                pass
-            if output:
-                output = ', '.join(output)
-                self.extra['choices'].append((o, output))
-        return super(CustomResourceTypeFilter, self).field
-
-
-class CustomResourceAudienceFilter(django_filters.MultipleChoiceFilter):
-    @property
-    def field(self):
-        qs = self.model._default_manager.distinct()
-        qs = qs.order_by(self.name).values_list(self.name, flat=True)
-        self.extra['choices'] = []
-        for o in qs: # reimplementation of audience_directorypage (#todo -- cleanup, code duplication is bad)
-            output = []
-            try:
-                lst = ast.literal_eval(o)
-                dct = dict(Resource.AUDIENCE_CHOICES)
-                if not (len(lst) == 1 and str(lst[0]) == "other"):
-                    for item in lst:
-                        output.append(dct.get(item))
-            except ValueError:
-                pass
-
-            if output:
-                output = ', '.join(output)
-                self.extra['choices'].append((o, output))
-
-        return super(CustomResourceAudienceFilter, self).field
-
-
-class CustomProgramFundingSourceFilter(django_filters.MultipleChoiceFilter):
-    @property
-    def field(self):
-        qs = self.model._default_manager.distinct()
-        qs = qs.order_by(self.name).values_list(self.name, flat=True)
-        self.extra['choices'] = [] # convert to list, so we can append
-
-        for o in qs:
-            output = []
-            try:
-                lst = ast.literal_eval(o)
-                dct = dict(Program.FUNDING_SOURCE_CHOICES)
-                if lst[0] == None:
-                    pass
-                elif len(lst[0]) == 1 and lst[0][0] == "other":
-                    pass
-                else:
-                    for item in lst[0]:
-                        if item != 'other':
-                            output.append(dct.get(item))
-                        else:
-                            output.append('Other: ' + lst[1])
-            except ValueError:
-                pass
-            if output:
-                output = ', '.join(output)
-                self.extra['choices'].append((o, output))
-
-        return super(CustomProgramFundingSourceFilter, self).field
-
-
-class CustomProgramIncentivesFilter(django_filters.MultipleChoiceFilter):
+        if not hasattr(self, '_field'):
+            self.extra['choices'] = facets.StoredValueChoices(self.model, 'language_label', language_choice)()
+        return super().field
+
+
+MATCH_CHOICES = (
+    ('any', 'Any of the selected options'),
+    ('all', 'All of the selected options'),
+)
+
+
+class FacetChoicesMixin:
+    """Get the choices from a facets.py provider whenever the form field is built, not when the class is defined."""
+    empty_choices = []
+
+    def __init__(self, *args, **kwargs):
+        self.facet_choices = kwargs.pop('facet_choices')
+        super().__init__(*args, **kwargs)
+
     @property
     def field(self):
-        qs = self.model._default_manager.distinct()
-        qs = qs.order_by(self.name).values_list(self.name, flat=True)
-        self.extra['choices'] = [] # convert to list, so we can append
-
-        for o in qs:
-            output = []
-            try:
-                lst = ast.literal_eval(o)
-                dct = dict(Program.INCENTIVES_CHOICES)
-                if lst[0] == None:
-                    pass
-                elif len(lst[0]) == 1 and lst[0][0] == "other":
-                    pass
-                else:
-                    for item in lst[0]:
-                        if item != 'other':
-                            output.append(dct.get(item))
-                        else:
-                            output.append('Other: ' + lst[1])
-            except ValueError:
-                pass
-            if output:
-                output = ', '.join(output)
-                self.extra['choices'].append((o, output))
-
-        return super(CustomProgramIncentivesFilter, self).field
+        if not hasattr(self, '_field'):
+            self.extra['choices'] = self.empty_choices + self.facet_choices()
+        return super().field
+
+
+class FacetMultipleChoiceFilter(FacetChoicesMixin, django_filters.MultipleChoiceFilter):
+    pass
+
+
+class FacetChoiceFilter(FacetChoicesMixin, django_filters.ChoiceFilter):
+    empty_choices = [('', django_filters_settings.EMPTY_CHOICE_LABEL)]
+
+
+class MatchFilter(django_filters.ChoiceFilter):
+    """Radio buttons choosing how a ContainsChoiceFilter combines the selected options. Does not filter by itself."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('label', 'Match')
+        kwargs.setdefault('choices', MATCH_CHOICES)
+        kwargs.setdefault('widget', forms.RadioSelect)
+        kwargs.setdefault('empty_label', None)  # nothing selected means "any"
+        super(MatchFilter, self).__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        return qs
+
+
+class ContainsChoiceFilter(django_filters.MultipleChoiceFilter):
+    """
+    Filter a multi-choice field by the individual options it contains (e.g. "funding sources include grants").
+
+    The selected options are combined with OR, or with AND if the `match` filter of the FilterSet is set to "all".
+    Both are containment lookups on a GIN indexed column (see indexes.py): `&&` / `@>` for arrays and `@>` for the
+    [[codes], other] JSON pairs (`pair=True`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.match = kwargs.pop('match')
+        self.pair = kwargs.pop('pair', False)
+        kwargs.setdefault('distinct', False)
+        super(ContainsChoiceFilter, self).__init__(*args, **kwargs)
+
+    def contained(self, options):
+        return [options] if self.pair else options
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+
+        options = sorted(set(value))
+        if self.parent.form.cleaned_data.get(self.match) == 'all':
+            return qs.filter(**{self.name + '__contains': self.contained(options)})
+        if not self.pair:
+            return qs.filter(**{self.name + '__overlap': options})
+
+        q = Q()
+        for option in options:
+            q |= Q(**{self.name + '__contains': self.contained([option])})
+        return qs.filter(q)
+
+
+class SearchFilter(django_filters.CharFilter):
+    """
+    Full-text search on the `search_vector` columns (see search.py), annotating each result with `search_rank`.
+
+    `vectors` are the tsvector fields to match. `trigram` is a text field also matched by similarity (substrings,
+    typos) when pg_trgm is installed. The rank is an integer, so it can be part of a pagination key.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.vectors = kwargs.pop('vectors', ['search_vector'])
+        self.trigram = kwargs.pop('trigram', 'name')
+        kwargs.setdefault('label', 'Search')
+        super(SearchFilter, self).__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        value = (value or '').strip()
+        if not value:
+            return qs
+
+        query = SearchQuery(value, config=SEARCH_CONFIG)
+        match = Q()
+        ranks = []
+        for vector in self.vectors:
+            match |= Q(**{vector: query})
+            ranks.append(Coalesce(SearchRank(F(vector), query), Value(0)))
+        if trigram_available(qs.db):
+            match |= Q(**{self.trigram + '__trigram_similar': value})
+            ranks.append(TrigramSimilarity(self.trigram, value))
+
+        rank = sum(ranks[1:], ranks[0])
+        return qs.annotate(search_rank=Cast(rank * 1000000, IntegerField())).filter(match)
+
+
+def search_ordering(qs, *ordering):
+    """Order by `ordering`, after the relevance if the results come from a SearchFilter."""
+    if 'search_rank' in qs.query.annotations:
+        return qs.order_by('-search_rank', *ordering)
+    return qs.order_by(*ordering)
 
 
 class InstitutionFilter(django_filters.FilterSet):
+    q = SearchFilter(vectors=['search_vector', 'profile__search_vector'])
     name = django_filters.CharFilter(lookup_expr='icontains', label='Institution Name contains') # queryset=Institution.objects.all()
     city = django_filters.CharFilter(name='profile__city', lookup_expr='icontains', label='City name contains')
     poc_name = django_filters.CharFilter(name='profile__poc_name', lookup_expr='icontains', label='Point of Contact name contains')
 
-    """
-    Why Try-Except? Avoid errors when running "docker-compose -f dev.yml run django python manage.py migrate" (when the database is empty):
-    `django.db.utils.ProgrammingError: relation "organizations_institutionprofile" does not exist`
-    `psycopg2.ProgrammingError: relation "organizations_institutionprofile" does not exist`
+    state_province = FacetMultipleChoiceFilter(
+        name='profile__state_province',
+        label='State/Province',
+        # choices=InstitutionProfile.STATE_PROVINCE_CHOICES,
+        facet_choices=facets.state_province_choices,
+        widget=forms.CheckboxSelectMultiple,
+    )
 
-    """
-    try:
-        state_province_choices = [(i, dict(InstitutionProfile.STATE_PROVINCE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('state_province', flat=True).distinct()]
-        state_province_choices_sorted = sorted(state_province_choices, key=lambda tup: tup[1])
-        # https://web.archive.org/web/20171010210134/https://stackoverflow.com/questions/3121979/how-to-sort-list-tuple-of-lists-tuples
-        state_province = django_filters.MultipleChoiceFilter(
-            name='profile__state_province',
-            label='State/Province',
-            # choices=InstitutionProfile.STATE_PROVINCE_CHOICES,
-            choices = state_province_choices_sorted,
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        country = django_filters.ChoiceFilter( # #dropdown
-            name='profile__country',
-            label='Country',
-            choices=InstitutionProfile.COUNTRY_CHOICES,
-        )
-
-        highest_degree = django_filters.MultipleChoiceFilter(
-            name='profile__highest_degree',
-            label='Highest Degree Offered',
-            choices=InstitutionProfile.HIGHEST_DEGREE_CHOICES,
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        size = django_filters.MultipleChoiceFilter(
-            name='profile__size', # see also: enrollment
-            label='Enrollment',
-            choices=InstitutionProfile.SIZE_CHOICES,
-            # choices = [(i, dict(InstitutionProfile.SIZE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('size', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        location_type = django_filters.MultipleChoiceFilter(
-            name='profile__location_type',
-            label='Location Type',
-            choices=InstitutionProfile.LOCATION_TYPE_CHOICES,
-            # choices = [(i, dict(InstitutionProfile.LOCATION_TYPE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('location_type', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        institution_type = django_filters.MultipleChoiceFilter(
-            name='profile__type',
-            label='Institution Type',
-            # choices=InstitutionProfile.TYPE_CHOICES,
-            choices = [(i, dict(InstitutionProfile.TYPE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('type', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        instcat = django_filters.MultipleChoiceFilter(
-            name='profile__instcat',
-            label='Institution Category',
-            # choices=InstitutionProfile.INSTCAT_CHOICES,
-            choices = [(i, dict(InstitutionProfile.INSTCAT_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('instcat', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        carnegie = django_filters.MultipleChoiceFilter(
-            name='profile__carnegie',
-            label='Carnegie Classification (U.S. Only)',
-            # choices=InstitutionProfile.CARNEGIE_CHOICES,
-            choices = [(i, dict(InstitutionProfile.CARNEGIE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('carnegie', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        congressional_district = django_filters.ChoiceFilter(
-            name='profile__congressional_district',
-            label='Congressional District (U.S. Only)',
-            # choices=InstitutionProfile.CONGRESSIONAL_DISTRICT_CHOICES,
-            choices = [(i, dict(InstitutionProfile.CONGRESSIONAL_DISTRICT_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('congressional_district', flat=True).distinct()],
-
-        )
-
-        system_source_id = django_filters.ChoiceFilter(
-            name='profile__system_source_id',
-            label='University System',
-            # choices=InstitutionProfile.SYSTEM_SOURCE_ID_CHOICES,
-            choices = [(i, dict(InstitutionProfile.SYSTEM_SOURCE_ID_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('system_source_id', flat=True).distinct()],
-        )
-
-        level = django_filters.MultipleChoiceFilter(
-            name='profile__level',
-            label='Institution level',
-            choices=InstitutionProfile.LEVEL_CHOICES,
-            # choices = [(i, dict(InstitutionProfile.LEVEL_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('size', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-
-        control = django_filters.MultipleChoiceFilter(
-            name='profile__control',
-            label='Institution control',
-            choices=InstitutionProfile.CONTROL_CHOICES,
-            # choices = [(i, dict(InstitutionProfile.CONTROL_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('size', flat=True).distinct()],
-            widget=forms.CheckboxSelectMultiple,
-        )
-    except ProgrammingError as e:
-        print('Silencing exception during initial migration when database tables do not yet exist, e.g. during the first docker-compose up or manage.py migrate.')
-    except Exception as e:
-        print(e.__class__.__name__)
-        raise
+    country = django_filters.ChoiceFilter( # #dropdown
+        name='profile__country',
+        label='Country',
+        choices=InstitutionProfile.COUNTRY_CHOICES,
+    )
+
+    highest_degree = django_filters.MultipleChoiceFilter(
+        name='profile__highest_degree',
+        label='Highest Degree Offered',
+        choices=InstitutionProfile.HIGHEST_DEGREE_CHOICES,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    size = django_filters.MultipleChoiceFilter(
+        name='profile__size', # see also: enrollment
+        label='Enrollment',
+        choices=InstitutionProfile.SIZE_CHOICES,
+        # choices = [(i, dict(InstitutionProfile.SIZE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('size', flat=True).distinct()],
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    location_type = django_filters.MultipleChoiceFilter(
+        name='profile__location_type',
+        label='Location Type',
+        choices=InstitutionProfile.LOCATION_TYPE_CHOICES,
+        # choices = [(i, dict(InstitutionProfile.LOCATION_TYPE_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('location_type', flat=True).distinct()],
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    institution_type = FacetMultipleChoiceFilter(
+        name='profile__type',
+        label='Institution Type',
+        # choices=InstitutionProfile.TYPE_CHOICES,
+        facet_choices=facets.institution_type_choices,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    instcat = FacetMultipleChoiceFilter(
+        name='profile__instcat',
+        label='Institution Category',
+        # choices=InstitutionProfile.INSTCAT_CHOICES,
+        facet_choices=facets.instcat_choices,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    carnegie = FacetMultipleChoiceFilter(
+        name='profile__carnegie',
+        label='Carnegie Classification (U.S. Only)',
+        # choices=InstitutionProfile.CARNEGIE_CHOICES,
+        facet_choices=facets.carnegie_choices,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    congressional_district = FacetChoiceFilter(
+        name='profile__congressional_district',
+        label='Congressional District (U.S. Only)',
+        # choices=InstitutionProfile.CONGRESSIONAL_DISTRICT_CHOICES,
+        facet_choices=facets.congressional_district_choices,
+    )
+
+    system_source_id = FacetChoiceFilter(
+        name='profile__system_source_id',
+        label='University System',
+        # choices=InstitutionProfile.SYSTEM_SOURCE_ID_CHOICES,
+        facet_choices=facets.system_source_id_choices,
+    )
+
+    level = django_filters.MultipleChoiceFilter(
+        name='profile__level',
+        label='Institution level',
+        choices=InstitutionProfile.LEVEL_CHOICES,
+        # choices = [(i, dict(InstitutionProfile.LEVEL_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('size', flat=True).distinct()],
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    control = django_filters.MultipleChoiceFilter(
+        name='profile__control',
+        label='Institution control',
+        choices=InstitutionProfile.CONTROL_CHOICES,
+        # choices = [(i, dict(InstitutionProfile.CONTROL_CHOICES).get(i)) for i in InstitutionProfile.objects.filter(reviewed=True).values_list('size', flat=True).distinct()],
+        widget=forms.CheckboxSelectMultiple,
+    )
 
     class Meta:
         model = Institution
@@ -300,11 +313,12 @@ class InstitutionFilter(django_filters.FilterSet):
     # @property
     def qs(self):
         parent = super(InstitutionFilter, self).qs
-        return parent.filter(profile__reviewed=True).order_by("name")
+        return search_ordering(parent.filter(profile__reviewed=True), "name", "id")
         # return parent.filter(is_published=True) \
         # | parent.filter(author=self.request.user)
 
 class ProgramFilter(django_filters.FilterSet):
+    q = SearchFilter()
     name = django_filters.CharFilter(name='name', lookup_expr='icontains', label='Program Name contains')
     institution_id = django_filters.CharFilter(name='institution__id')
     institution_name = django_filters.CharFilter(name='institution__name')
@@ -322,11 +336,14 @@ class ProgramFilter(django_filters.FilterSet):
         widget=forms.CheckboxSelectMultiple,
     )
 
-    funding_source = CustomProgramFundingSourceFilter(
+    funding_source = ContainsChoiceFilter(
         label='Funding Source',
         choices=Program.FUNDING_SOURCE_CHOICES,
         widget=forms.CheckboxSelectMultiple,
+        match='funding_source_match',
+        pair=True,
     )
+    funding_source_match = MatchFilter()
 
     # #todo -- Program Focus [primary] -- *** calculated field ***
     # #todo -- Program Annual Budget [funding_annual] -- JG: correct name = funding_total -- *** integer ***
@@ -337,11 +354,14 @@ class ProgramFilter(django_filters.FilterSet):
         widget=forms.CheckboxSelectMultiple,
     )
 
-    incentives = CustomProgramIncentivesFilter(
+    incentives = ContainsChoiceFilter(
         label='Incentives Offered',
         choices=Program.INCENTIVES_CHOICES,
         widget=forms.CheckboxSelectMultiple,
+        match='incentives_match',
+        pair=True,
     )
+    incentives_match = MatchFilter()
 
     incentives_conditions = django_filters.MultipleChoiceFilter(
         label='Incentive Conditions',
@@ -362,10 +382,11 @@ class ProgramFilter(django_filters.FilterSet):
 
     def qs(self):
         parent = super(ProgramFilter, self).qs
-        return parent.filter(reviewed=True).order_by("name")
+        return search_ordering(parent.filter(reviewed=True).select_related("institution"), "name", "id")
 
 
 class PolicyFilter(django_filters.FilterSet):
+    q = SearchFilter()
     name = django_filters.CharFilter(name='name', lookup_expr='icontains', label='Policy Name contains')
 
     policy_type = django_filters.ChoiceFilter(
@@ -388,9 +409,10 @@ class PolicyFilter(django_filters.FilterSet):
 
     def qs(self):
         parent = super(PolicyFilter, self).qs
-        return parent.filter(reviewed=True).order_by("name")
+        return search_ordering(parent.filter(reviewed=True).select_related("institution"), "name", "id")
 
 class EventFilter(django_filters.FilterSet):
+    q = SearchFilter()
     name = django_filters.CharFilter(name='name', lookup_expr='icontains', label='Event Name contains')
 
     event_type = CustomEventTypeFilter(
@@ -406,22 +428,27 @@ class EventFilter(django_filters.FilterSet):
 
     def qs(self):
         parent = super(EventFilter, self).qs
-        return parent.filter(reviewed=True).order_by("name")
+        return search_ordering(parent.filter(reviewed=True).select_related("institution"), "name", "id")
 
 class ResourceFilter(django_filters.FilterSet):
+    q = SearchFilter()
     name = django_filters.CharFilter(name='name', lookup_expr='icontains', label='Resource Name contains')
-    resource_type = CustomResourceTypeFilter( # django_filters.ChoiceFilter(
+    resource_type = ContainsChoiceFilter( # django_filters.ChoiceFilter(
         name='type',
         label='Type of Resource',
         choices=Resource.TYPE_CHOICES,
         widget=forms.CheckboxSelectMultiple,
+        match='resource_type_match',
     )
+    resource_type_match = MatchFilter()
 
-    audience = CustomResourceAudienceFilter(
+    audience = ContainsChoiceFilter(
         label='Intended Audience',
         choices=Resource.AUDIENCE_CHOICES,
         widget=forms.CheckboxSelectMultiple,
+        match='audience_match',
     )
+    audience_match = MatchFilter()
 
     class Meta:
         model = Resource
@@ -429,14 +456,15 @@ class ResourceFilter(django_filters.FilterSet):
 
     def qs(self):
         parent = super(ResourceFilter, self).qs
-        return parent.filter(reviewed=True).order_by("name")
+        return search_ordering(parent.filter(reviewed=True).select_related("institution"), "name", "id")
 
 class AbstractFilter(django_filters.FilterSet):
+    q = SearchFilter(vectors=['institution__search_vector'], trigram='institution__name')
     name = django_filters.CharFilter(name='institution__name', lookup_expr='icontains', label='Institution Name contains')
 
     language = CustomAbstractLanguageFilter(
+        name='language_slug',
         label='Language',
-        choices=Abstract.LANGUAGE_CHOICES,
         widget=forms.CheckboxSelectMultiple,
     )
 
@@ -446,4 +474,4 @@ class AbstractFilter(django_filters.FilterSet):
 
     def qs(self):
         parent = super(AbstractFilter, self).qs
-        return parent.filter(reviewed=True).order_by("name")
+        return search_ordering(parent.filter(reviewed=True).select_related("institution"), "institution__name", "id")
@@ -0,0 +1,106 @@
+"""
+Impact totals: the sums of the students, faculty and courses of the published annual reports.
+
+The totals are kept in the ImpactTotal table. When a report is saved or deleted -- also when it is reviewed or
+hidden, which are saves too (see signals.py) -- the totals of its institution are recomputed from its reports, and the
+directory totals of the years whose institution totals changed are summed from the institution totals, so a save never
+aggregates the whole report table. Changes made with queryset updates or raw SQL are not noticed;
+`manage.py reconcile_impact_totals` finds and fixes the drift, recomputing everything from the reports.
+
+Postgres treats NULLs as distinct, so the directory rows (no institution) are kept unique per year by a partial unique
+index (see indexes.py) rather than by unique_together.
+"""
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import AnnualImpactReport, ImpactTotal
+
+TOTAL_FIELDS = ['reports', 'students', 'faculty', 'courses']
+
+
+def published_reports():
+    return AnnualImpactReport.objects.filter(reviewed=True, hidden=False)
+
+
+def aggregate_totals(reports, *group_by):
+    """{(group values..., year): {field: total}} of the reports, per year and for all years (year '')."""
+    aggregates = {
+        'reports': Count('id'),
+        'students': Coalesce(Sum('impact_students'), Value(0)),
+        'faculty': Coalesce(Sum('impact_faculty'), Value(0)),
+        'courses': Coalesce(Sum('impact_courses'), Value(0)),
+    }
+    totals = {}
+    for row in reports.order_by().values(*group_by, 'year').annotate(**aggregates):
+        group = tuple(row[field] for field in group_by)
+        totals[group + (row['year'],)] = {field: row[field] for field in TOTAL_FIELDS}
+        all_years = totals.setdefault(group + ('',), dict.fromkeys(TOTAL_FIELDS, 0))
+        for field in TOTAL_FIELDS:
+            all_years[field] += row[field]
+    return totals
+
+
+def computed_totals():
+    """{(institution id or None, year): {field: total}} as stored in ImpactTotal, computed from the reports."""
+    totals = aggregate_totals(published_reports(), 'institution_id')
+    totals.update({(None,) + key: values for key, values in aggregate_totals(published_reports()).items()})
+    return totals
+
+
+def directory_totals(years):
+    """{(None, year): {field: total}} of the `years` ('' for all years), summed from the institution totals."""
+    rows = ImpactTotal.objects.exclude(institution=None).filter(year__in=years).order_by().values('year').annotate(
+        **{'total_' + field: Sum(field) for field in TOTAL_FIELDS}
+    )
+    return {(None, row['year']): {field: row['total_' + field] for field in TOTAL_FIELDS} for row in rows}
+
+
+def stored_totals(totals=None):
+    """{(institution id or None, year): {field: total}} of the ImpactTotal rows `totals` (all of them by default)."""
+    if totals is None:
+        totals = ImpactTotal.objects.all()
+    return {
+        (row['institution_id'], row['year']): {field: row[field] for field in TOTAL_FIELDS}
+        for row in totals.values('institution_id', 'year', *TOTAL_FIELDS)
+    }
+
+
+@transaction.atomic
+def write_totals(computed, stored):
+    """Make the stored totals equal to the computed ones; returns the number of rows changed."""
+    changed = 0
+    for key in set(stored) - set(computed):  # no published reports anymore
+        institution_id, year = key
+        ImpactTotal.objects.filter(institution_id=institution_id, year=year).delete()
+        changed += 1
+    for key, values in computed.items():
+        if stored.get(key) == values:
+            continue
+        institution_id, year = key
+        ImpactTotal.objects.update_or_create(institution_id=institution_id, year=year, defaults=values)
+        changed += 1
+    return changed
+
+
+@transaction.atomic
+def update_impact_totals(*institution_ids):
+    """Recompute the totals of the institutions, and the directory totals of the years in which they changed."""
+    computed = aggregate_totals(published_reports().filter(institution_id__in=institution_ids), 'institution_id')
+    stored = stored_totals(ImpactTotal.objects.filter(institution_id__in=institution_ids))
+    differ = [key for key in set(computed) | set(stored) if computed.get(key) != stored.get(key)]
+    years = {year for institution_id, year in differ}
+    changed = write_totals(computed, stored)
+    if years:
+        directory = ImpactTotal.objects.filter(institution=None, year__in=years)
+        changed += write_totals(directory_totals(years), stored_totals(directory))
+    return changed
+
+
+def reconcile_impact_totals(fix=True):
+    """Compare all stored totals to the reports; returns the keys which differ (fixed unless `fix` is False)."""
+    computed, stored = computed_totals(), stored_totals()
+    drift = sorted((key for key in set(computed) | set(stored) if computed.get(key) != stored.get(key)), key=str)
+    if fix and drift:
+        write_totals(computed, stored)
+    return drift
@@ -0,0 +1,81 @@
+"""
+Postgres indexes which cannot be declared on the models in Django 1.10 (GIN and other non-btree indexes, partial
+and partial unique indexes).
+
+They are (re)created after every `manage.py migrate` by the post_migrate handler connected in apps.py, together with
+the extensions they need. The trigram indexes are skipped if pg_trgm cannot be installed (it needs a superuser);
+what is skipped is printed at verbosity 2 and above.
+"""
+from django.db import DatabaseError, connections, transaction
+
+from .models import (
+    Abstract, AnnualImpactReport, Event, ImpactTotal, Institution, InstitutionProfile, Policy, Program, Resource,
+    SearchDocument,
+)
+
+EXTENSIONS = ['pg_trgm']
+
+# (index name, model, index definition)
+INDEXES = [
+    ('organizations_program_funding_source_gin', Program, 'USING gin (funding_source jsonb_path_ops)'),
+    ('organizations_program_incentives_gin', Program, 'USING gin (incentives jsonb_path_ops)'),
+    ('organizations_event_type_gin', Event, 'USING gin (type jsonb_path_ops)'),
+    ('organizations_resource_type_gin', Resource, 'USING gin (type)'),
+    ('organizations_resource_audience_gin', Resource, 'USING gin (audience)'),
+
+    # full-text search, see search.py
+    ('organizations_institution_search_gin', Institution, 'USING gin (search_vector)'),
+    ('organizations_institutionprofile_search_gin', InstitutionProfile, 'USING gin (search_vector)'),
+    ('organizations_program_search_gin', Program, 'USING gin (search_vector)'),
+    ('organizations_policy_search_gin', Policy, 'USING gin (search_vector)'),
+    ('organizations_event_search_gin', Event, 'USING gin (search_vector)'),
+    ('organizations_resource_search_gin', Resource, 'USING gin (search_vector)'),
+    ('organizations_searchdocument_search_gin', SearchDocument, 'USING gin (search_vector)'),
+    ('organizations_institution_name_trgm', Institution, 'USING gin (name gin_trgm_ops)'),
+    ('organizations_program_name_trgm', Program, 'USING gin (name gin_trgm_ops)'),
+    ('organizations_policy_name_trgm', Policy, 'USING gin (name gin_trgm_ops)'),
+    ('organizations_event_name_trgm', Event, 'USING gin (name gin_trgm_ops)'),
+    ('organizations_resource_name_trgm', Resource, 'USING gin (name gin_trgm_ops)'),
+
+    # the review queue, see review.py
+    ('organizations_institutionprofile_review', InstitutionProfile, '(updated_at, id) WHERE NOT reviewed'),
+    ('organizations_program_review', Program, '(updated_at, id) WHERE NOT reviewed'),
+    ('organizations_policy_review', Policy, '(updated_at, id) WHERE NOT reviewed'),
+    ('organizations_event_review', Event, '(updated_at, id) WHERE NOT reviewed'),
+    ('organizations_resource_review', Resource, '(updated_at, id) WHERE NOT reviewed'),
+    ('organizations_annualimpactreport_review', AnnualImpactReport, '(updated_at, id) WHERE NOT reviewed'),
+    ('organizations_abstract_review', Abstract, '(updated_at, id) WHERE NOT reviewed'),
+]
+
+# (index name, model, index definition)
+UNIQUE_INDEXES = [
+    # unique_together does not cover the directory totals: their institution is NULL, see impact.py
+    ('organizations_impacttotal_directory_year_uniq', ImpactTotal, '(year) WHERE institution_id IS NULL'),
+]
+
+
+def create_indexes(sender=None, using='default', verbosity=1, **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for extension in EXTENSIONS:
+            try:
+                with transaction.atomic(using=using):
+                    cursor.execute('CREATE EXTENSION IF NOT EXISTS {}'.format(extension))
+            except DatabaseError as e:
+                if verbosity >= 2:
+                    print('Skipping extension {}: {}'.format(extension, e))
+
+        indexes = [('INDEX', index) for index in INDEXES] + [('UNIQUE INDEX', index) for index in UNIQUE_INDEXES]
+        for kind, (name, model, definition) in indexes:
+            try:
+                # a savepoint, so a failing index (e.g. a column not converted yet) does not break the others
+                with transaction.atomic(using=using):
+                    cursor.execute('CREATE {kind} IF NOT EXISTS {name} ON {table} {definition}'.format(
+                        kind=kind, name=name, table=model._meta.db_table, definition=definition,
+                    ))
+            except DatabaseError as e:
+                if verbosity >= 2:
+                    print('Skipping index {}: {}'.format(name, e))
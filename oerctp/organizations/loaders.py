@@ -0,0 +1,37 @@
+from django.db.models import Prefetch
+
+from .models import Abstract, Event, Policy, Program, Resource
+from .tagging import resolve_tags
+
+# Child collections displayed on the public institution page:
+# (related name on Institution, model, attribute holding the prefetched list)
+PUBLISHED_CHILDREN = [
+    ('additional_languages', Abstract, 'published_abstracts'),
+    ('program_set', Program, 'published_programs'),
+    ('policy_set', Policy, 'published_policies'),
+    ('event_set', Event, 'published_events'),
+    ('resource_set', Resource, 'published_resources'),
+]
+
+
+def published_children_prefetches():
+    """Prefetch objects loading every reviewed, non-hidden child collection into a plain list."""
+    return [
+        Prefetch(related_name, queryset=model.objects.filter(reviewed=True, hidden=False), to_attr=to_attr)
+        for related_name, model, to_attr in PUBLISHED_CHILDREN
+    ]
+
+
+def load_institution_page(queryset, **lookup):
+    """
+    Load a single institution with everything the public institution page displays.
+
+    The institution and its profile are fetched in one query, each published child collection in one query
+    and the tags in two, so the number of queries does not depend on the number of activities. The results
+    are stored as lists on the returned object (`published_programs`, `published_tags`, ...) which the template
+    can test and iterate as many times as it needs to.
+    """
+    institution = queryset.select_related('profile').prefetch_related(*published_children_prefetches()).get(**lookup)
+    resolve_tags([institution])
+    institution.published_tags = institution.tag_list
+    return institution
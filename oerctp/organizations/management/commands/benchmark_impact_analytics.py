@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+
+from oerctp.organizations.analytics import DIMENSIONS, MEASURES, RATING_VALUES, RATINGS, compute_analytics, encode
+
+
+class Command(BaseCommand):
+    help = 'Times the impact analytics (see analytics.py) of generated annual impact reports.'
+
+    # The reports are generated in memory as the rows of the query in analytics.load_columns(); the conversion of the
+    # rows to columns and the computation are timed, the database is not used.
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=100000, help='Number of reports (100000 by default).')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of runs; the fastest one is reported.')
+
+    def handle(self, *args, **options):
+        columns = self.generate(options['reports'])
+
+        timings = []
+        for i in range(options['repeat']):
+            start = time.perf_counter()
+            encoded = dict(columns)
+            for name, title, field, labels in DIMENSIONS:
+                encoded[name] = encode(columns[name])
+            compute_analytics(encoded)
+            timings.append(time.perf_counter() - start)
+
+        self.stdout.write('{} reports: {:.3f} s (fastest of {} runs, slowest {:.3f} s).'.format(
+            options['reports'], min(timings), len(timings), max(timings),
+        ))
+
+    def generate(self, count):
+        random = np.random.RandomState(0)
+        columns = {}
+        for name, title, field, labels in DIMENSIONS:
+            keys = list(labels) or ['{} {}'.format(title, i) for i in range(30)]
+            columns[name] = [(keys + [''])[i] for i in random.randint(0, len(keys) + 1, count)]
+        for field in MEASURES:
+            values = random.lognormal(5, 2, count).round()
+            values[random.rand(count) < 0.3] = np.nan  # optional answers
+            columns[field] = values
+        for field in RATINGS:
+            ratings = random.randint(RATING_VALUES[0], RATING_VALUES[-1] + 1, count).astype(float)
+            ratings[random.rand(count) < 0.2] = np.nan  # not sure
+            columns[field] = ratings
+        return columns
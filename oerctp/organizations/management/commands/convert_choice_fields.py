@@ -0,0 +1,105 @@
+import ast
+import json
+
+from django.apps import apps
+from django.contrib.postgres.fields import JSONField
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from oerctp.organizations.fields import ChoiceArrayField, RatingField
+from oerctp.organizations.indexes import create_indexes
+
+
+class Command(BaseCommand):
+    help = 'Converts multi-choice answers stored as Python literals ("[\'a\', \'b\']") to array and JSON columns, ' \
+           'and ratings stored as text (\'1\' to \'10\', \'unknown\') to numbers.'
+
+    # Run this once, before `manage.py migrate` alters the columns: Postgres cannot cast the literals itself.
+    # Columns which already have the new type are skipped, so the command can be run repeatedly.
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Postgres refuses to alter a table with deferred foreign key checks pending in the transaction
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            for model in apps.get_app_config('organizations').get_models():
+                for field in model._meta.get_fields():
+                    if isinstance(field, (ChoiceArrayField, JSONField)):
+                        self.convert(model, field)
+                    elif isinstance(field, RatingField):
+                        self.convert_rating(model, field)
+
+        create_indexes(verbosity=options['verbosity'])
+        self.stdout.write(self.style.SUCCESS('Choice fields successfully converted!'))
+
+    def is_text(self, table, column):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT data_type FROM information_schema.columns WHERE table_name = %s AND column_name = %s',
+                [table, column],
+            )
+            row = cursor.fetchone()
+        return row is not None and row[0] in ('text', 'character varying')
+
+    def convert(self, model, field):
+        table = model._meta.db_table
+        column = field.column
+        label = '{}.{}'.format(model.__name__, field.name)
+
+        if not self.is_text(table, column):
+            self.stdout.write('{} is already converted.'.format(label))
+            return
+
+        with connection.cursor() as cursor:
+            # rewrite every value as text Postgres can cast (an array literal or JSON), then change the column type
+            cursor.execute('SELECT id, {} FROM {}'.format(column, table))
+            rows = [(self.castable(field, self.parse(label, pk, value, field)), pk) for pk, value in cursor.fetchall()]
+            cursor.executemany('UPDATE {} SET {} = %s WHERE id = %s'.format(table, column), rows)
+            cursor.execute('ALTER TABLE {table} ALTER COLUMN {column} TYPE {type} USING {column}::{type}'.format(
+                table=table, column=column, type=field.db_type(connection),
+            ))
+
+        self.stdout.write('{}: {} rows converted.'.format(label, len(rows)))
+
+    def convert_rating(self, model, field):
+        table = model._meta.db_table
+        column = field.column
+        label = '{}.{}'.format(model.__name__, field.name)
+
+        if not self.is_text(table, column):
+            self.stdout.write('{} is already converted.'.format(label))
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM {} WHERE {} !~ '^\\s*[0-9]+\\s*$'".format(table, column))
+            not_sure = cursor.fetchone()[0]
+            # 'unknown' ("Not sure") and anything else which is not a number becomes NULL
+            cursor.execute(
+                "ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL, ALTER COLUMN {column} TYPE {type} "
+                "USING CASE WHEN {column} ~ '^\\s*[0-9]+\\s*$' THEN trim({column})::{type} END".format(
+                    table=table, column=column, type=field.db_type(connection),
+                )
+            )
+
+        self.stdout.write('{}: converted to numbers, {} rows "Not sure".'.format(label, not_sure))
+
+    def parse(self, label, pk, value, field):
+        if value is None:
+            return None
+
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            self.stdout.write(self.style.WARNING('{} {}: cannot parse {!r}, value dropped.'.format(label, pk, value)))
+            return None if field.null else []
+
+        if isinstance(field, ChoiceArrayField):
+            return [str(item) for item in value]
+        return list(value)
+
+    def castable(self, field, value):
+        if value is None:
+            return None
+        if isinstance(field, ChoiceArrayField):
+            return '{' + ','.join('"{}"'.format(item.replace('\\', '\\\\').replace('"', '\\"')) for item in value) + '}'
+        return json.dumps(value)
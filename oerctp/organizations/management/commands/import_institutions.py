@@ -1,119 +1,190 @@
 import csv
+import hashlib
+import json
+import time
 
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 
-from oerctp.organizations.models import InstitutionProfile, Institution
+from oerctp.organizations.facets import invalidate_profile_facet_choices
+from oerctp.organizations.models import InstitutionProfile, Institution, PublishedInstitution
+from oerctp.organizations.search import rebuild_search_documents, update_search_vectors
+from oerctp.organizations.versions import bump_directory_version
+
+BATCH_SIZE = 500
+
+
+def sparc_member(value):
+    return {'Yes': True, 'SPARC': True, 'No': False}.get(value.strip(), False)  # default is False
+
+
+def enrollment(value):
+    return int(value) if value.isdigit() else None
+
+
+# source data: https://docs.google.com/spreadsheets/d/12q8xpaGKaKpfieLQ4DIm8wOSyAL36S9benNtPStfvdQ/edit
+# (profile field, CSV column, conversion of the CSV text)
+COLUMNS = [
+    ('source_id', 0, None),
+    ('sparc_member', 3, sparc_member),
+    ('address', 4, None),
+    ('city', 5, None),
+    ('state_province', 6, None),
+    ('country', 7, None),
+    ('zip', 8, None),
+    ('main_url', 9, None),
+    ('level', 10, None),
+    ('control', 11, None),
+    ('highest_degree', 12, None),
+    ('carnegie', 13, None),
+    ('location_type', 14, None),
+    ('size', 15, None),
+    ('system_source_id', 16, None),
+    ('congressional_district', 17, None),
+    ('longitude', 18, None),
+    ('latitude', 19, None),
+    ('enrollment', 20, enrollment),
+    ('type', 21, None),
+    ('source_data', 22, None),
+    ('instcat', 23, None),
+    ('institution_website', 9, None),  # same as main_url
+]
+NAME_COLUMN = 1  # display_name (official_name in column 2 is not imported)
+
+FIELDS = [field for field, column, convert in COLUMNS]
+UPDATED_FIELDS = FIELDS[1:]  # all but source_id
+
+
+def parse(row):
+    return {field: convert(row[column]) if convert else row[column] for field, column, convert in COLUMNS}
+
+
+def content_hash(values):
+    """Hash of the imported columns of a profile (CSV row or database row), to tell whether it has changed."""
+    content = json.dumps([values[field] for field in UPDATED_FIELDS])
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def changed_fields(old, new):
+    return [field for field in UPDATED_FIELDS if old[field] != new[field]]
 
 
 class Command(BaseCommand):
-    help = 'Load data'
+    help = 'Imports institutions and their profiles from a CSV file, updating the profiles imported before.'
+
+    # New institutions are created with unreviewed profiles. Existing profiles are updated with queryset updates
+    # (not save()), which keeps their review status. Everything is done in batches in a single transaction.
+    # Profiles whose imported columns hash the same as the CSV row are not written at all.
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', nargs='?', default='data/institutions.csv')
+        parser.add_argument(
+            '--dry-run', action='store_true', dest='dry_run', default=False,
+            help='Compare the CSV file with the database without writing anything.',
+        )
+        parser.add_argument(
+            '--diff', action='store_true', dest='diff', default=False,
+            help='List the new institutions and the changed columns of every changed profile.',
+        )
 
     def handle(self, *args, **options):
+        started = time.time()
+        self.dry_run = options['dry_run']
+        self.created = self.updated = self.unchanged = 0
+        self.to_create = []
+        self.to_update = []
 
-        # source data: https://docs.google.com/spreadsheets/d/12q8xpaGKaKpfieLQ4DIm8wOSyAL36S9benNtPStfvdQ/edit
-        with open('data/institutions.csv') as csvfile:
+        with open(options['csv_file'], encoding='utf-8') as csvfile, transaction.atomic():
             reader = csv.reader(csvfile, delimiter=',', quotechar='"')
             next(reader)  # skip csv file header (because the first line contains field names)
 
-            for i, row in enumerate(reader):
-                profile, created = InstitutionProfile.objects.get_or_create(source_id=row[0])
-
-                profile_source_id = row[0]
-                profile_name = row[1] # display_name
-                # profile_name2 = row[2] # official_name
-
-                profile_sparc_member_raw = row[3]
-                profile_sparc_member = {'Yes': True, 'SPARC': True, 'No': False}.get(profile_sparc_member_raw.strip(), False) # default is False
-
-                profile_address = row[4]
-                profile_city = row[5]
-                profile_state_province = row[6]
-                profile_country = row[7]
-                profile_zip = row[8]
-                profile_main_url = row[9]
-                profile_level = row[10]
-                profile_control = row[11]
-                profile_highest_degree = row[12]
-                profile_carnegie = row[13]
-                profile_location_type = row[14]
-                profile_size = row[15]
-                profile_system_source_id = row[16]
-                profile_congressional_district = row[17]
-                profile_longitude = row[18]
-                profile_latitude = row[19]
-
-                profile_enrollment_raw = row[20]
-                if profile_enrollment_raw.isdigit():
-                    profile_enrollment = profile_enrollment_raw
-                else:
-                    profile_enrollment = None
-
-                profile_type = row[21]
-                profile_source_data = row[22]
-                profile_instcat = row[23]
-
-                profile_institution_website = profile_main_url # row[9]
-
-                # #todo -- clean up (rewrite): instead of explicitly listing all element *twice* when using "if", iterate over a single list of fields in both locations
-
-                if created:
-                    profile.source_id = profile_source_id
-                    profile.name = profile_name
-                    # profile.name2 = profile_name2
-                    profile.sparc_member = profile_sparc_member
-                    profile.address = profile_address
-                    profile.city = profile_city
-                    profile.state_province = profile_state_province
-                    profile.country = profile_country
-                    profile.zip = profile_zip
-                    profile.main_url = profile_main_url
-                    profile.level = profile_level
-                    profile.control = profile_control
-                    profile.highest_degree = profile_highest_degree
-                    profile.carnegie = profile_carnegie
-                    profile.location_type = profile_location_type
-                    profile.size = profile_size
-                    profile.system_source_id = profile_system_source_id
-                    profile.congressional_district = profile_congressional_district
-                    profile.longitude = profile_longitude
-                    profile.latitude = profile_latitude
-                    profile.enrollment = profile_enrollment
-                    profile.type = profile_type
-                    profile.source_data = profile_source_data
-                    profile.instcat = profile_instcat
-                    profile.institution_website = profile_institution_website
-                    profile.save()
-
-                    obj = Institution(name=row[1], profile=profile)
-                    obj.save()
-
-                # if data exists, use "update" instead of "save" to avoid post_save trigger
-                # (save triggers clearing profile moderated status, so updating data would otherwise force moderation)
+            existing = {profile['source_id']: profile for profile in InstitutionProfile.objects.values(*FIELDS)}
+            hashes = {source_id: content_hash(profile) for source_id, profile in existing.items()}
+            for row in reader:
+                values = parse(row)
+                source_id = values['source_id']
+                current = existing.get(source_id)
+                row_hash = content_hash(values)
+
+                if current is None:
+                    self.to_create.append((row[NAME_COLUMN], values))
+                    if options['diff']:
+                        self.stdout.write('+ {} {}'.format(source_id, row[NAME_COLUMN]))
+                elif hashes[source_id] != row_hash:
+                    self.to_update.append(values)
+                    if options['diff']:
+                        for field in changed_fields(current, values):
+                            self.stdout.write('~ {} {}: {!r} -> {!r}'.format(
+                                source_id, field, current[field], values[field],
+                            ))
                 else:
-                    obj = InstitutionProfile.objects.filter(source_id=profile_source_id)
-                    # DOES NOT EXIST: obj.update(name = profile_name)
-                    # obj.update(name2 = profile_name2)
-                    obj.update(sparc_member = profile_sparc_member)
-                    obj.update(address = profile_address)
-                    obj.update(city = profile_city)
-                    obj.update(state_province = profile_state_province)
-                    obj.update(country = profile_country)
-                    obj.update(zip = profile_zip)
-                    obj.update(main_url = profile_main_url)
-                    obj.update(level = profile_level)
-                    obj.update(control = profile_control)
-                    obj.update(highest_degree = profile_highest_degree)
-                    obj.update(carnegie = profile_carnegie)
-                    obj.update(location_type = profile_location_type)
-                    obj.update(size = profile_size)
-                    obj.update(system_source_id = profile_system_source_id)
-                    obj.update(congressional_district = profile_congressional_district)
-                    obj.update(longitude = profile_longitude)
-                    obj.update(latitude = profile_latitude)
-                    obj.update(enrollment = profile_enrollment)
-                    obj.update(type = profile_type)
-                    obj.update(source_data = profile_source_data)
-                    obj.update(instcat = profile_instcat)
-                    obj.update(institution_website = profile_institution_website)
-
-                self.stdout.write('{} saved.'.format(profile.institution_website))
+                    self.unchanged += 1
+                existing[source_id] = values
+                hashes[source_id] = row_hash
+
+                if len(self.to_create) >= BATCH_SIZE or len(self.to_update) >= BATCH_SIZE:
+                    self.flush()
+            self.flush()
+
+            if (self.created or self.updated) and not self.dry_run:
+                # bulk operations do not send post_save, so refresh what the receivers in signals.py would
+                invalidate_profile_facet_choices()
+                bump_directory_version()
+                update_search_vectors(InstitutionProfile)
+                update_search_vectors(Institution)
+                rebuild_search_documents(Institution)
+
+        self.stdout.write(self.style.SUCCESS(
+            '{} rows {} in {:.1f} s: {} created, {} updated, {} unchanged.'.format(
+                self.created + self.updated + self.unchanged, 'compared' if self.dry_run else 'imported',
+                time.time() - started,
+                self.created, self.updated, self.unchanged,
+            )
+        ))
+
+    def flush(self):
+        # create first: a source_id repeated in the file may be updated right after it is created
+        if self.to_create:
+            if not self.dry_run:
+                self.create(self.to_create)
+            self.created += len(self.to_create)
+            self.to_create = []
+        if self.to_update:
+            if not self.dry_run:
+                self.update(self.to_update)
+            self.updated += len(self.to_update)
+            self.to_update = []
+
+    def create(self, rows):
+        profiles = [InstitutionProfile(**values) for name, values in rows]
+        InstitutionProfile.objects.bulk_create(profiles)
+        Institution.objects.bulk_create([
+            Institution(name=name, profile=profile) for (name, values), profile in zip(rows, profiles)
+        ])
+
+    def update(self, rows):
+        """Update the given profiles with a single UPDATE ... FROM (VALUES ...) statement."""
+        quote = connection.ops.quote_name
+        table = quote(InstitutionProfile._meta.db_table)
+        fields = [InstitutionProfile._meta.get_field(name) for name in FIELDS]
+
+        sql = 'UPDATE {table} SET {assignments} FROM (VALUES {rows}) AS new ({columns}) WHERE {key} = new.{key_column}'
+        sql = sql.format(
+            table=table,
+            assignments=', '.join(
+                '{0} = new.{0}::{1}'.format(quote(field.column), field.db_type(connection)) for field in fields[1:]
+            ),
+            rows=', '.join(['({})'.format(', '.join(['%s'] * len(fields)))] * len(rows)),
+            columns=', '.join(quote(field.column) for field in fields),
+            key='{}.{}'.format(table, quote(fields[0].column)),
+            key_column=quote(fields[0].column),
+        )
+        params = [field.get_db_prep_save(values[field.name], connection) for values in rows for field in fields]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+        # the public pages of these institutions are rebuilt by the next rebuild_published_institutions (see publish.py)
+        PublishedInstitution.objects.filter(
+            institution__profile__source_id__in=[values['source_id'] for values in rows]
+        ).update(stale=True)
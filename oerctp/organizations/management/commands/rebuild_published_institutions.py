@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from oerctp.organizations.models import Institution, PublishedInstitution
+from oerctp.organizations.publish import publish_institution, publish_stale_institutions
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the documents the public institution pages are rendered from.'
+
+    # Saving an institution or one of its children marks its document stale, and its page shows the stale document
+    # until it is rebuilt: schedule this with --stale every minute (cron). Run it without --stale after changes made
+    # with queryset updates or raw SQL (e.g. import_institutions), and once after upgrading an existing database.
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale', action='store_true', dest='stale', default=False,
+            help='Only rebuild the documents marked stale and build the missing ones.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stale']:
+            count = publish_stale_institutions()
+        else:
+            institution_ids = list(Institution.objects.values_list('pk', flat=True))
+            for institution_id in institution_ids:
+                publish_institution(institution_id)
+            PublishedInstitution.objects.exclude(pk__in=institution_ids).delete()
+            count = len(institution_ids)
+
+        self.stdout.write(self.style.SUCCESS('{} published institutions rebuilt.'.format(count)))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from oerctp.organizations.impact import reconcile_impact_totals
+
+
+class Command(BaseCommand):
+    help = 'Compares the impact totals to the published annual reports and fixes the totals which differ.'
+
+    # Saving a report updates the totals; run this after changes made with queryset updates or raw SQL, once after
+    # upgrading an existing database, and periodically (e.g. by cron) to catch any drift.
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', dest='check',
+            help='Only list the totals which differ, do not fix them.',
+        )
+
+    def handle(self, *args, **options):
+        drift = reconcile_impact_totals(fix=not options['check'])
+        for institution_id, year in drift:
+            self.stdout.write('{} {}'.format(institution_id or 'directory', year or 'all years'))
+
+        verb = 'differ' if options['check'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS('{} impact totals {}.'.format(len(drift), verb)))
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+
+from oerctp.organizations.models import Abstract
+
+BATCH_SIZE = 500
+
+COLUMNS = ['language_code', 'language_label', 'language_slug']
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the decoded language columns (code, label, slug) of the abstracts.'
+
+    # Saving an abstract updates its columns; run this after changes made with queryset updates or raw SQL, and
+    # once after upgrading an existing database.
+    # The slug of an abstract is unique per institution. If two abstracts of an institution decode to the same slug
+    # (e.g. ['fr', ''] and ['other', 'French']), nothing is written: fix their languages in the admin and run it again.
+
+    def handle(self, *args, **options):
+        rows = Abstract.objects.values_list('pk', 'institution_id', 'institution__name', 'language', *COLUMNS)
+        changed = {}  # pk: (code, label, slug)
+        slugs = defaultdict(list)  # (institution id, institution name, slug): [pk, ...]
+        for pk, institution_id, institution_name, language, *stored in rows:
+            columns = Abstract.language_columns(language)
+            slugs[institution_id, institution_name, columns[2]].append(pk)
+            if tuple(stored) != columns:
+                changed[pk] = columns
+
+        collisions = {key: pks for key, pks in slugs.items() if len(pks) > 1}
+        if collisions:
+            for (institution_id, institution_name, slug), pks in sorted(collisions.items(), key=str):
+                self.stderr.write('{} ({}): abstracts {} are all in the language "{}".'.format(
+                    institution_name, institution_id, ', '.join(str(pk) for pk in pks), slug,
+                ))
+            raise CommandError('{} abstract languages collide, nothing was updated.'.format(len(collisions)))
+
+        with transaction.atomic():
+            # clear the slugs first, so an abstract can take the slug another one is giving up
+            Abstract.objects.filter(pk__in=changed).update(language_slug=None)
+            pks = list(changed)
+            for start in range(0, len(pks), BATCH_SIZE):
+                batch = pks[start:start + BATCH_SIZE]
+                # a queryset update: saving the abstract would reset its reviewed flag
+                Abstract.objects.filter(pk__in=batch).update(**{
+                    column: Case(
+                        *[When(pk=pk, then=Value(changed[pk][i])) for pk in batch], output_field=CharField()
+                    ) for i, column in enumerate(COLUMNS)
+                })
+
+        self.stdout.write('Abstract: {} rows updated.'.format(len(changed)))
+        self.stdout.write(self.style.SUCCESS('Abstract languages successfully updated!'))
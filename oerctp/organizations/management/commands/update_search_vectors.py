@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from oerctp.organizations.search import (
+    SEARCH_DOCUMENTS, SEARCH_FIELDS, rebuild_search_documents, update_search_vectors,
+)
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the full-text search columns and the documents searched by /search/.'
+
+    # Saving an object updates its search column and document; run this after changes made with queryset updates
+    # or raw SQL, and once after upgrading an existing database.
+
+    def handle(self, *args, **options):
+        for model in SEARCH_FIELDS:
+            count = update_search_vectors(model)
+            self.stdout.write('{}: {} rows updated.'.format(model.__name__, count))
+
+        for model in SEARCH_DOCUMENTS:
+            count = rebuild_search_documents(model)
+            self.stdout.write('{}: {} search documents written.'.format(model.__name__, count))
+
+        self.stdout.write(self.style.SUCCESS('Search columns successfully updated!'))
@@ -1,36 +1,84 @@
-import json
-from urllib.request import urlopen
+import time
 
 from django.core.management.base import BaseCommand
 
+from oerctp.organizations.avatars import (
+    AvatarRefresher, needs_mirror, needs_refresh, save_avatar_thumbnails, save_avatar_urls, thumbnail_storage,
+)
 from oerctp.organizations.models import InstitutionProfile
 
+
 class Command(BaseCommand):
-    help = 'Updates URLs for Twitter Avatars where missing.'
+    help = 'Updates URLs for Twitter Avatars where missing and makes local thumbnails of the new ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='all', default=False,
+            help='Update all avatars, including those already present.',
+        )
+        parser.add_argument(
+            '--no-thumbnails', action='store_false', dest='thumbnails', default=True,
+            help='Do not download the avatars and make their thumbnails.',
+        )
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of profiles handled at once.')
+        parser.add_argument(
+            '--interval', type=float, default=0.25, help='Minimum number of seconds between requests to one host.',
+        )
+        parser.add_argument('--timeout', type=float, default=10, help='Timeout of each request in seconds.')
+        parser.add_argument('--retries', type=int, default=3, help='Number of retries of a failed request.')
 
     def handle(self, *args, **options):
+        started = time.time()
+        profiles = InstitutionProfile.objects.exclude(institution_twitter__isnull=True).exclude(institution_twitter='')
+        profiles = [
+            profile for profile in profiles.only('id', 'institution_twitter', 'twitter_image_url')
+            if options['all'] or needs_refresh(profile)
+        ]
+
+        refresher = self.get_refresher(options)
+        urls = {}
+        for profile, url, error in refresher.refresh(profiles):
+            if url:
+                urls[profile.id] = url
+            else:
+                self.stderr.write(
+                    'Updating Twitter Avatar failed for {}: {}'.format(profile.institution_twitter, error)
+                )
+
+        # the profiles are updated in one query, without save() -- which would send them to moderation again
+        save_avatar_urls(urls)
+        self.stdout.write(self.style.SUCCESS('{} of {} avatars updated in {:.1f} s.'.format(
+            len(urls), len(profiles), time.time() - started,
+        )))
+
+        if options['thumbnails']:
+            self.make_thumbnails(refresher)
+
+    def make_thumbnails(self, refresher):
+        started = time.time()
+        profiles = InstitutionProfile.objects.exclude(twitter_image_url__isnull=True).exclude(twitter_image_url='')
+        profiles = [
+            profile for profile in profiles.only(
+                'id', 'institution_twitter', 'twitter_image_url', 'twitter_image_source', 'twitter_image_thumbnails',
+            ) if needs_mirror(profile)
+        ]
+
+        thumbnails = {}
+        for profile, names, error in refresher.mirror(profiles, thumbnail_storage()):
+            if names:
+                thumbnails[profile] = names
+            else:
+                self.stderr.write('Making thumbnails failed for {}: {}'.format(profile.institution_twitter, error))
+
+        save_avatar_thumbnails(thumbnails)
+        self.stdout.write(self.style.SUCCESS('Thumbnails of {} of {} avatars made in {:.1f} s.'.format(
+            len(thumbnails), len(profiles), time.time() - started,
+        )))
 
-        for profile in InstitutionProfile.objects.filter(institution_twitter__isnull=False):
-
-            prefix = 'https://'  # all URLs should start with this
-            suffix = '#twitter_username=' + profile.institution_twitter_username  # all URLs should end with this -- but why bother? -- avatar URLs don't contain usernames, so if an institution changed its Twitter handle, we would otherwise have no way of knowing what username their avatar URL refers to
-
-            if not (profile.twitter_image_url.startswith(prefix) and profile.twitter_image_url.endswith(suffix)):
-            # if True:  # force updates of all images, including those already present
-                try:
-                    twitter_response_str = urlopen('https://twitter.com/' + profile.institution_twitter_username).read().decode('utf-8')
-                    # find "data-resolved-url-large" and extract string between two quotation marks that follow it
-                    avatar_url=twitter_response_str.split('data-resolved-url-large')[1].split('"')[1]
-                    urlopen('https://web.archive.org/save/' + avatar_url)
-                    wayback_response = urlopen('https://archive.org/wayback/available?url=' + avatar_url)
-                    wayback_json = json.loads(wayback_response.read().decode('utf-8'))
-                    latest_snapshot = wayback_json['archived_snapshots']['closest']['url']
-                    latest_snapshot_fixed = latest_snapshot.replace('http://', 'https://')
-                    latest_snapshot_fixed += suffix
-                    # FYI: "profile.save()" triggers save signal which means the institutional profile will need to be moderated (which may seem confusing to the users) -- to avoid sending the signal and therefore triggering the moderation, use a workaround from https://web.archive.org/web/20170503084040/https://stackoverflow.com/questions/1555060/how-to-save-a-model-without-sending-a-signal (update queryset directly)
-                    # profile.twitter_image_url = latest_snapshot_fixed
-                    # profile.save()
-                    InstitutionProfile.objects.filter(id=profile.id).update(twitter_image_url = latest_snapshot_fixed)
-                    print('Avatar updated for ' + str(profile))
-                except:
-                    print('Updating Twitter Avatar failed for ' + str(profile))
+    def get_refresher(self, options):
+        return AvatarRefresher(
+            concurrency=options['concurrency'],
+            interval=options['interval'],
+            timeout=options['timeout'],
+            retries=options['retries'],
+        )
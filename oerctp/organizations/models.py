@@ -1,9 +1,14 @@
-import ast
 import uuid
 import markdown
 
+from django.contrib.postgres.fields import JSONField
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import default_storage
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.shortcuts import reverse
+from django.utils.functional import cached_property
+from django.utils.text import slugify
 from taggit.managers import TaggableManager
 from taggit.models import GenericUUIDTaggedItemBase, TaggedItemBase
 
@@ -14,20 +19,28 @@ from django.contrib.humanize.templatetags.humanize import intcomma
 from .validators import none_validator, twitter_handle_validator, MinChoicesValidator, \
     MaxChoicesValidator, no_validator, date_year_validator, ack_checked_validator, \
     na_validator, notsure_unknown_validator, unknown_validator
+from .fields import ChoiceArrayField, RatingField
 
 
 class UUIDTaggedItem(GenericUUIDTaggedItemBase, TaggedItemBase):
-    pass
+    class Meta:
+        index_together = [('tag', 'content_type', 'object_id')]  # the members of a tag, see tagging.tag_members()
 
 
-class ModelMixinManager(models.Model):
+class ModelMixinManager(models.Manager):
     def active(self):
         return self.get_queryset().filter(reviewed=True, hidden=False)
 
     def to_review(self, user=None):
+        """Objects waiting for a review; with `user`, only those of the institutions the user edits."""
         queryset = self.get_queryset().filter(reviewed=False)
-        if user:  # todo: test it!
-            queryset = queryset.filter(institution__editors=user)
+        if user:
+            try:
+                self.model._meta.get_field('editors')
+                editors = 'editors'  # Institution
+            except FieldDoesNotExist:
+                editors = 'institution__editors'
+            queryset = queryset.filter(**{editors: user})
 
         return queryset
 
@@ -95,6 +108,7 @@ class TagMixin(models.Model):
 
     @property
     def tags(self):
+        # two queries for every object; to display the tags of many objects, see tagging.resolve_tags()
         tags = list(self._tags_raw.all().all().values_list('slug', flat=True))
         return Tag.objects.filter(slug__in=tags).order_by('type', 'name')
 
@@ -168,40 +182,44 @@ class AnnualImpactReport(ModelMixin, models.Model):
     )
 
     AWARENESS_CHOICES = (
-        ('10', '10 (Highest)'),
-        ('9', '9'),
-        ('8', '8'),
-        ('7', '7'),
-        ('6', '6'),
-        ('5', '5'),
-        ('4', '4'),
-        ('3', '3'),
-        ('2', '2'),
-        ('1', '1 (Lowest)'),
-        ('unknown', 'Not sure'),
-    )
-
-    awareness_rating_admin = models.CharField(
+        (10, '10 (Highest)'),
+        (9, '9'),
+        (8, '8'),
+        (7, '7'),
+        (6, '6'),
+        (5, '5'),
+        (4, '4'),
+        (3, '3'),
+        (2, '2'),
+        (1, '1 (Lowest)'),
+        (None, 'Not sure'),
+    )
+
+    awareness_rating_admin = RatingField(
         verbose_name='Administration',
         choices=AWARENESS_CHOICES,
-        max_length=10,
+        db_index=True,
     )
-    awareness_rating_faculty = models.CharField(
+    awareness_rating_faculty = RatingField(
         verbose_name='Faculty',
         choices=AWARENESS_CHOICES,
-        max_length=10,
+        db_index=True,
     )
-    awareness_rating_library = models.CharField(
+    awareness_rating_library = RatingField(
         verbose_name='Library',
         choices=AWARENESS_CHOICES,
-        max_length=10,
+        db_index=True,
     )
-    awareness_rating_students = models.CharField(
+    awareness_rating_students = RatingField(
         verbose_name='Students',
         choices=AWARENESS_CHOICES,
-        max_length=10,
+        db_index=True,
     )
 
+    AWARENESS_FIELDS = [
+        'awareness_rating_admin', 'awareness_rating_faculty', 'awareness_rating_library', 'awareness_rating_students',
+    ]
+
     private_comments = models.TextField(
         verbose_name='Private Comments',
         help_text='Please use this space for any additional comments you would like to add.',
@@ -308,8 +326,8 @@ class Abstract(ModelMixin, models.Model):
         ('other', 'Other, please specify'),
     )
 
-    language = models.CharField(
-        max_length=100,
+    language = JSONField(
+        # [code, other]
         # DO NOT include "choices" (because we're displaying a custom multifield)
     )
 
@@ -325,28 +343,39 @@ class Abstract(ModelMixin, models.Model):
         return self.abstract_raw
         # return markdown.markdown(self.abstract_raw)
 
+    # `language` decoded, kept in sync by save(): the public abstract page is looked up by (institution, language_slug)
+    language_code = models.CharField(max_length=20, editable=False, null=True, db_index=True)
+    language_label = models.CharField(max_length=100, editable=False, null=True)
+    language_slug = models.SlugField(max_length=100, editable=False, null=True)
+
+    @classmethod
+    def language_columns(cls, language):
+        """The (code, label, slug) of a stored `language` value ([code, other])."""
+        try:
+            code = language[0]
+            label = language[1] if code == 'other' else dict(cls.LANGUAGE_CHOICES)[code]
+        except (TypeError, IndexError, KeyError):
+            code, label = None, 'Unknown language'
+        return code, label, slugify(label)
+
     @property
     def name(self):
         """Language of the text. This method is created just for code consistency"""
-        try:
-            import ast
-            lang = ast.literal_eval(self.language)
-            if lang[0] == 'other':
-                return lang[1]
-            return dict(self.LANGUAGE_CHOICES)[lang[0]]
-        except (ValueError, KeyError):
-            return 'Unknown language'
+        return self.language_columns(self.language)[1]
 
     @property
     def slug(self):
-        from django.utils.text import slugify
-        return slugify(self.name)
+        return self.language_columns(self.language)[2]
+
+    def save(self, *args, **kwargs):
+        self.language_code, self.language_label, self.language_slug = self.language_columns(self.language)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return 'Abstract for {institution} in {lang}'.format(institution=self.institution, lang=self.name)
 
     class Meta:
-        unique_together = [('institution', 'language')]
+        unique_together = [('institution', 'language'), ('institution', 'language_slug')]
 
     def get_absolute_url(self):
         return reverse('language', kwargs={'uuid': self.access_uuid})
@@ -379,6 +408,22 @@ class InstitutionProfile(ModelMixin, models.Model):
     # store the logo URL in the database, so that we don't have to hit Twitter API during each visit to each page
     twitter_image_url = models.URLField(max_length=255, blank=True, null=True,)
 
+    # local thumbnails of the logo (see avatars.py): the twitter_image_url they were made from and
+    # {size: {format: file name in the media storage}}
+    twitter_image_source = models.CharField(max_length=255, blank=True, null=True, editable=False)
+    twitter_image_thumbnails = JSONField(default=dict, blank=True, editable=False)
+
+    @property
+    def twitter_image_thumbnail(self):
+        """URLs of the largest local thumbnail of the logo by format (e.g. {'png': ..., 'webp': ...}), or None."""
+        if not self.twitter_image_thumbnails or self.twitter_image_source != self.twitter_image_url:
+            return None
+        size = max(self.twitter_image_thumbnails, key=int)
+        return {
+            image_format: default_storage.url(name)
+            for image_format, name in self.twitter_image_thumbnails[size].items()
+        }
+
     @property
     def institution_twitter_username(self):
         if self.institution_twitter.startswith('@'):
@@ -498,35 +543,31 @@ class InstitutionProfile(ModelMixin, models.Model):
         ('none', 'None of the Above'),
     )
 
-    campus_engagement = models.TextField(
+    campus_engagement = ChoiceArrayField(
+        choices=CAMPUS_ENGAGEMENT_CHOICES,
         verbose_name='Which of the following entities are actively engaged in efforts to '
                      'advance OER on campus?',
         help_text='Please select all that apply. You will have the '
                   'opportunity to indicate which entities are involved in specific projects under Campus Activities, '
                   'and you may return to update this information at any time.',
         validators=[none_validator],
-        # DO NOT include "choices" (because we're displaying checkboxes)
         null=True,
     )
 
     @property
     def campus_engagement_directorypage(self):  # nomalized for displaying on the webpage
-        # ast.literal_eval converts string (value saved in the database) to list
-        try:
-            lst = ast.literal_eval(self.campus_engagement)
-            dct = dict(self.CAMPUS_ENGAGEMENT_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            if len(lst) == 1 and lst[0] == "none":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-                # print("K : " + item)
-                # print("V : " + dct.get(item))
-            return output
-        except ValueError:
+        lst = self.campus_engagement or []
+        dct = dict(self.CAMPUS_ENGAGEMENT_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
+            return None
+        if len(lst) == 1 and lst[0] == "none":
             return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+            # print("K : " + item)
+            # print("V : " + dct.get(item))
+        return output
 
     LIBRARY_ENGAGEMENT_CHOICES = (
         ('admin', 'Administration'),
@@ -541,31 +582,28 @@ class InstitutionProfile(ModelMixin, models.Model):
         ('na', 'Not Applicable'),
     )
 
-    library_engagement = models.TextField(
+    library_engagement = ChoiceArrayField(
+        choices=LIBRARY_ENGAGEMENT_CHOICES,
         verbose_name='If the Library is actively engaged in advancing OER, which department is leading these efforts?',
         help_text='Please select the best option. If there are multiple departments, you may select up to three.',
         validators=[MinChoicesValidator(1), MaxChoicesValidator(3), na_validator, notsure_unknown_validator],
-        # DO NOT include "choices" (because we're displaying checkboxes)
         null=True,
     )
 
     @property
     def library_engagement_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.library_engagement)
-            dct = dict(self.LIBRARY_ENGAGEMENT_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            if len(lst) == 1 and lst[0] == "unknown":
-                return None
-            if len(lst) == 1 and lst[0] == "na":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.library_engagement or []
+        dct = dict(self.LIBRARY_ENGAGEMENT_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
+            return None
+        if len(lst) == 1 and lst[0] == "unknown":
             return None
+        if len(lst) == 1 and lst[0] == "na":
+            return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     SUBJECT_ENGAGEMENT_CHOICES = (
         ('un08', 'Agriculture, forestry, fisheries and veterinary'),
@@ -602,31 +640,28 @@ class InstitutionProfile(ModelMixin, models.Model):
         ('un99', 'Other'),
     )
 
-    subject_engagement = models.TextField(
+    subject_engagement = ChoiceArrayField(
+        choices=SUBJECT_ENGAGEMENT_CHOICES,
         verbose_name='In which of the following academic subjects would you consider OER to have the most traction '
                      'at your institution?',
         help_text='Please select the academic subjects where OER seems to have the most traction on campus to date, '
                   'generally speaking.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
         validators=[none_validator],
         null=True,
     )
 
     @property
     def subject_engagement_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.subject_engagement)
-            dct = dict(self.SUBJECT_ENGAGEMENT_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            if len(lst) == 1 and lst[0] == "na":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.subject_engagement or []
+        dct = dict(self.SUBJECT_ENGAGEMENT_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
             return None
+        if len(lst) == 1 and lst[0] == "na":
+            return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     url_oer = models.URLField(
         verbose_name='Does your institution have a webpage dedicated to OER information and/or activities on campus?',
@@ -701,30 +736,27 @@ class InstitutionProfile(ModelMixin, models.Model):
         ('none', 'None of the Above'),
     )
 
-    staff_location = models.TextField(
+    staff_location = ChoiceArrayField(
+        choices=STAFF_LOCATION_CHOICES,
         verbose_name='If yes, where is the position located within the institution?',
         help_text='Please select the option that best describes where the position is located within the institution, or select None of the Above. '
                   'If there are multiple positions, you may select additional options as appropriate.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
         validators=[none_validator],
         null=True,
     )
 
     @property
     def staff_location_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.staff_location)
-            dct = dict(self.STAFF_LOCATION_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            if len(lst) == 1 and lst[0] == "none":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.staff_location or []
+        dct = dict(self.STAFF_LOCATION_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
+            return None
+        if len(lst) == 1 and lst[0] == "none":
             return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     CATALOG_CHOICES=(
         ('oer', 'OER (open course content)'),
@@ -734,12 +766,12 @@ class InstitutionProfile(ModelMixin, models.Model):
         ('unknown', 'Not sure'),
     )
 
-    catalog = models.TextField(
+    catalog = ChoiceArrayField(
+        choices=CATALOG_CHOICES,
         verbose_name='Does your institution mark the Course Catalog students use for registration to indicate courses '
                      'using any of the following?',
         help_text='Please select an option. If multiple options are applicable, please select the first one that '
                   'applies.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
         validators=[none_validator, notsure_unknown_validator],
         null=True,
     )
@@ -758,28 +790,25 @@ class InstitutionProfile(ModelMixin, models.Model):
         ('none', 'None of the Above'),
     )
 
-    oer_included = models.TextField(
+    oer_included = ChoiceArrayField(
+        choices=OER_INCLUDED_CHOICES,
         verbose_name='Are mechanisms to support OER explicitly included in any of the following at your institution?',
         help_text='Please select all that apply. You will have the opportunity to add additional information about '
                   'any options you select under the Campus Activities section.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
         validators=[none_validator],
         null=True,
     )
 
     @property
     def oer_included_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.oer_included)
-            dct = dict(self.OER_INCLUDED_CHOICES)
-            if len(lst) == 1 and lst[0] == "none":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.oer_included or []
+        dct = dict(self.OER_INCLUDED_CHOICES)
+        if len(lst) == 1 and lst[0] == "none":
             return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     OERDEGREE_OFFERED_CHOICES = (
         ('offering', 'An OER degree pathway is currently offered'),
@@ -829,6 +858,8 @@ class InstitutionProfile(ModelMixin, models.Model):
         blank=True, null=True,
     )
 
+    search_vector = SearchVectorField(null=True, editable=False)  # see search.py
+
     STATE_PROVINCE_CHOICES = (
         ('AL', 'USA: Alabama'),
         ('AK', 'USA: Alaska'),
@@ -1732,6 +1763,9 @@ class InstitutionProfile(ModelMixin, models.Model):
 
 
 class Program(ModelMixin, TagMixin, models.Model):
+    class Meta:
+        index_together = [('name', 'id')]
+
     institution = models.ForeignKey('Institution', related_name='program_set')
 
     name = models.CharField(
@@ -1742,6 +1776,8 @@ class Program(ModelMixin, TagMixin, models.Model):
         max_length=140,
     )
 
+    search_vector = SearchVectorField(null=True, editable=False)  # see search.py
+
     TYPE_CHOICES = (
         ('awards', 'Award Program'),
         ('campaign', 'Campaign'),
@@ -1846,33 +1882,30 @@ class Program(ModelMixin, TagMixin, models.Model):
         ('none', 'None of the Above'),
     )
 
-    partners = models.TextField(
+    partners = ChoiceArrayField(
+        choices=PARTNERS_CHOICES,
         verbose_name='Program Partners',
         help_text='Please select any options below that are formal partners in the program. You may include a '
                   'list of partners in the program abstract above.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
         validators=[none_validator],
     )
 
     @property
     def partners_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.partners)
-            dct = dict(self.PARTNERS_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            if len(lst) == 1 and lst[0] == "none":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.partners or []
+        dct = dict(self.PARTNERS_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
             return None
+        if len(lst) == 1 and lst[0] == "none":
+            return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     @property
     def partners_clean(self):
-        lst = ast.literal_eval(self.partners)
+        lst = self.partners
         dct = dict(self.PARTNERS_CHOICES)
         return '; '.join(map(lambda val: dct[val], lst))
 
@@ -2073,16 +2106,17 @@ class Program(ModelMixin, TagMixin, models.Model):
         ('other', 'Other funding source, please specify'),
     )
 
-    funding_source = models.TextField(
+    funding_source = JSONField(
         verbose_name='Source(s) of Program Funding',
         help_text='Please select all sources of program funding below.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
+        # [[codes], other]
+        # DO NOT include "choices" (because we're displaying a custom multifield)
         validators=[na_validator, unknown_validator],
     )
 
     @property
     def funding_source_clean(self):
-        lst = ast.literal_eval(self.funding_source)
+        lst = self.funding_source
         dct = dict(self.FUNDING_SOURCE_CHOICES)
         selected = '; '.join(map(lambda val: dct[val], lst[0]))
         custom = ': ' + lst[1] if lst[1] else ''
@@ -2090,7 +2124,7 @@ class Program(ModelMixin, TagMixin, models.Model):
 
     @property
     def funding_source_directorypage(self): #multiwidget:checkboxes
-        lst = ast.literal_eval(self.funding_source)
+        lst = self.funding_source
         dct = dict(self.FUNDING_SOURCE_CHOICES)
         dct['other'] = 'Other'
         if 'na' in lst:
@@ -2112,36 +2146,33 @@ class Program(ModelMixin, TagMixin, models.Model):
         ('unknown', 'Not Sure'),
     )
 
-    funding_library = models.TextField(
+    funding_library = ChoiceArrayField(
+        choices=FUNDING_LIBRARY_CHOICES,
         verbose_name='If the source of funding includes the Library’s general operating budget or departmental budget, '
                      'please select the Library department(s) from which the funds came. If the source of funding '
                      'includes the Library’s general operating budget or departmental budget, please select the '
                      'Library department(s) from which the funds came.',
         help_text='If this question is not applicable, please select “Not Applicable”.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
         validators=[na_validator, notsure_unknown_validator],
     )
 
     @property
     def funding_library_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.funding_library)
-            dct = dict(self.FUNDING_LIBRARY_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            if len(lst) == 1 and lst[0] == "na":
-                return None
-            if len(lst) == 1 and lst[0] == "unknown":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.funding_library or []
+        dct = dict(self.FUNDING_LIBRARY_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
+            return None
+        if len(lst) == 1 and lst[0] == "na":
             return None
+        if len(lst) == 1 and lst[0] == "unknown":
+            return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     def funding_library_clean(self):
-        lst = ast.literal_eval(self.funding_library)
+        lst = self.funding_library
         dct = dict(self.FUNDING_LIBRARY_CHOICES)
         return '; '.join(map(lambda val: dct[val], lst))
 
@@ -2219,7 +2250,8 @@ class Program(ModelMixin, TagMixin, models.Model):
         ('other', 'Other incentive, please briefly specify'),
     )
 
-    incentives = models.TextField(
+    incentives = JSONField(
+        # [[codes], other]
         # verbose_name -> defined in admin_forms.py
         # help_text -> defined in admin_forms.py
         # choices -> defined in admin_forms.py
@@ -2228,7 +2260,7 @@ class Program(ModelMixin, TagMixin, models.Model):
 
     @property
     def incentives_clean(self):
-        lst = ast.literal_eval(self.incentives)
+        lst = self.incentives
         dct = dict(self.INCENTIVES_CHOICES)
         selected = '; '.join(map(lambda val: dct[val], lst[0]))
         custom = ': ' + lst[1] if lst[1] else ''
@@ -2236,7 +2268,7 @@ class Program(ModelMixin, TagMixin, models.Model):
 
     @property
     def incentives_directorypage(self): #multiwidget:checkboxes
-        lst = ast.literal_eval(self.incentives)
+        lst = self.incentives
         dct = dict(self.INCENTIVES_CHOICES)
         dct['other'] = 'Other'
         if 'na' in lst:
@@ -2373,6 +2405,7 @@ class Program(ModelMixin, TagMixin, models.Model):
 class Policy(ModelMixin, TagMixin, models.Model):
     class Meta:
         verbose_name_plural = "policies"
+        index_together = [('name', 'id')]
 
     institution = models.ForeignKey('Institution', related_name='policy_set')
 
@@ -2381,6 +2414,8 @@ class Policy(ModelMixin, TagMixin, models.Model):
         max_length=255,
     )
 
+    search_vector = SearchVectorField(null=True, editable=False)  # see search.py
+
     POLICY_TYPE_CHOICES=(
         ('rule', 'Formal Policy (rule, regulation, law, etc.)'),
         ('resolution', 'Resolution/Declaration (faculty senate, position statement, etc.)'),
@@ -2537,6 +2572,9 @@ class Policy(ModelMixin, TagMixin, models.Model):
 
 
 class Event(ModelMixin, TagMixin, models.Model):
+    class Meta:
+        index_together = [('name', 'id')]
+
     institution = models.ForeignKey('Institution', related_name='event_set')
 
     name = models.CharField(
@@ -2545,6 +2583,8 @@ class Event(ModelMixin, TagMixin, models.Model):
         max_length=140,
     )
 
+    search_vector = SearchVectorField(null=True, editable=False)  # see search.py
+
     TYPE_CHOICES = (
         ('talk', 'Talk/Presentation'),
         ('workshop', 'Workshop/Professional Development'),
@@ -2554,16 +2594,17 @@ class Event(ModelMixin, TagMixin, models.Model):
         ('other', 'Other'),
     )
 
-    type = models.TextField(
+    type = JSONField(
         verbose_name='Event Type',
         help_text='Please indicate the type of event. Please note that we are looking for only events that '
                   'were directly organized by your institution.',
+        # [code, other]
         # DO NOT include "choices" (because we're displaying a custom multifield)
     )
 
     @property
     def type_directorypage(self): #multiwidget:radio
-        lst = ast.literal_eval(self.type)
+        lst = self.type
         dct = dict(self.TYPE_CHOICES)
         try:
             if lst[0] == 'other':
@@ -2695,6 +2736,9 @@ class Event(ModelMixin, TagMixin, models.Model):
 
 
 class Resource(ModelMixin, TagMixin, models.Model):
+    class Meta:
+        index_together = [('name', 'id')]
+
     institution = models.ForeignKey('Institution', related_name='resource_set')
 
     name = models.CharField(
@@ -2703,6 +2747,8 @@ class Resource(ModelMixin, TagMixin, models.Model):
         max_length=140,
     )
 
+    search_vector = SearchVectorField(null=True, editable=False)  # see search.py
+
     TYPE_CHOICES=(
         ('story', 'Success Story'),
         ('awareness', 'Fact Sheet or Awareness Resource'),
@@ -2718,26 +2764,23 @@ class Resource(ModelMixin, TagMixin, models.Model):
         ('other', 'Other'),
     )
 
-    type = models.TextField(
+    type = ChoiceArrayField(
+        choices=TYPE_CHOICES,
         verbose_name='Resource Type',
         help_text='Please select the options that best describe the type of resource. Please note that this category '
                   'is intended for resources about OER, not as a listing of individual OER.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
     )
 
     @property
     def type_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.type)
-            dct = dict(self.TYPE_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.type or []
+        dct = dict(self.TYPE_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
             return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     @property
     def type_directorypage_string(self):
@@ -2794,16 +2837,17 @@ class Resource(ModelMixin, TagMixin, models.Model):
         ('other', 'Other (please specify)'),
     )
 
-    license = models.TextField(
+    license = JSONField(
         verbose_name='Resource License',
         help_text='Please specify the copyright permissions of the work.',
+        # [code, other]
         # DO NOT include "choices" (because we're displaying a custom multifield)
         null=True,
     )
 
     @property
     def license_directorypage(self): #multiwidget:radio
-        lst = ast.literal_eval(self.license)
+        lst = self.license
         dct = dict(self.LICENSE_CHOICES)
         try:
             if lst[0] == 'unknown':
@@ -2826,25 +2870,22 @@ class Resource(ModelMixin, TagMixin, models.Model):
         ('other', 'Other'),
     )
 
-    audience = models.TextField(
+    audience = ChoiceArrayField(
+        choices=AUDIENCE_CHOICES,
         verbose_name='Intended Audience of Resource',
         help_text='Please select the audience(s) for which the resource is intended. Select all that apply.',
-        # DO NOT include "choices" (because we're displaying checkboxes)
     )
 
     @property
     def audience_directorypage(self):
-        try:
-            lst = ast.literal_eval(self.audience)
-            dct = dict(self.AUDIENCE_CHOICES)
-            if len(lst) == 1 and lst[0] == "other":
-                return None
-            output = []
-            for item in lst:
-                output.append(dct.get(item))
-            return output
-        except ValueError:
+        lst = self.audience or []
+        dct = dict(self.AUDIENCE_CHOICES)
+        if len(lst) == 1 and lst[0] == "other":
             return None
+        output = []
+        for item in lst:
+            output.append(dct.get(item))
+        return output
 
     url = models.URLField(
         verbose_name='Link to Access the Resource',
@@ -2870,8 +2911,12 @@ class Resource(ModelMixin, TagMixin, models.Model):
 
 
 class Institution(ModelMixin, TagMixin, models.Model):
+    class Meta:
+        index_together = [('name', 'id')]  # the sort key of the directory pages, see pagination.py
+
     slug = models.SlugField(blank=True, null=True)
     name = models.CharField(max_length=100)
+    search_vector = SearchVectorField(null=True, editable=False)  # see search.py
     profile = models.OneToOneField('InstitutionProfile')
     editors = models.ManyToManyField('users.User', blank=True)
 
@@ -2888,9 +2933,22 @@ class Institution(ModelMixin, TagMixin, models.Model):
             raise ValidationError({'slug':'Institution with this slug already exists'})
         return super().clean()
 
+    @cached_property
+    def impact_total(self):
+        """The ImpactTotal of all years (unsaved and empty if there are no published reports), see impact.py."""
+        return self.impact_totals.filter(year='').first() or ImpactTotal(institution=self)
+
     @property
     def students_impacted_total(self):
-        return sum(self.annual_reports.all().values_list('impact_students', flat=True))
+        return self.impact_total.students
+
+    @property
+    def faculty_impacted_total(self):
+        return self.impact_total.faculty
+
+    @property
+    def courses_impacted_total(self):
+        return self.impact_total.courses
 
     def __str__(self):
         return self.name
@@ -3092,3 +3150,86 @@ class AccessLink(ModelMixin, models.Model):
     @property
     def object_type(self):
         return dict(self.TYPE_CHOICES)[self.type]
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a published institution, activity, abstract or tag, maintained by search.py.
+
+    All kinds of objects live in this one table, so a search across the whole directory is a single indexed lookup.
+    """
+    KIND_INSTITUTION = 'institution'
+    KIND_PROGRAM = 'program'
+    KIND_POLICY = 'policy'
+    KIND_EVENT = 'event'
+    KIND_RESOURCE = 'resource'
+    KIND_ABSTRACT = 'abstract'
+    KIND_TAG = 'tag'
+
+    KIND_CHOICES = (
+        (KIND_INSTITUTION, 'Institutions'),
+        (KIND_PROGRAM, 'Programs'),
+        (KIND_POLICY, 'Policies'),
+        (KIND_EVENT, 'Events'),
+        (KIND_RESOURCE, 'Resources'),
+        (KIND_ABSTRACT, 'Abstracts'),
+        (KIND_TAG, 'Tags'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    institution = models.ForeignKey('Institution', null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=255)
+    search_vector = SearchVectorField(null=True)
+
+    class Meta:
+        unique_together = [('kind', 'object_id')]
+
+    def __str__(self):
+        return '{} {}'.format(self.kind, self.title)
+
+
+class PublishedInstitution(models.Model):
+    """
+    Everything the public page of an institution displays, as one JSON document maintained by publish.py.
+
+    The public institution page and the directory homepage read this table only.
+    """
+    institution = models.OneToOneField(
+        'Institution', primary_key=True, on_delete=models.CASCADE, related_name='published',
+    )
+    slug = models.SlugField(blank=True, null=True)
+    name = models.CharField(max_length=100)
+    listed = models.BooleanField(default=False)  # displayed on the directory homepage
+    document = JSONField(default=dict)
+    stale = models.BooleanField(default=True)  # the institution or one of its children changed since the build
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ImpactTotal(models.Model):
+    """
+    Sums of the impact numbers of the published (reviewed, not hidden) annual reports, maintained by impact.py.
+
+    One row per institution and year, per institution for all years (`year` empty), and for the whole directory
+    (`institution` empty), so the totals are read without touching the report table.
+    """
+    institution = models.ForeignKey(
+        'Institution', null=True, blank=True, on_delete=models.CASCADE, related_name='impact_totals',
+    )
+    year = models.CharField(max_length=6, blank=True, choices=AnnualImpactReport.YEAR_CHOICES)
+    reports = models.IntegerField(default=0)
+    students = models.IntegerField(default=0)
+    faculty = models.IntegerField(default=0)
+    courses = models.IntegerField(default=0)
+
+    class Meta:
+        # the directory rows (institution NULL) are unique per year by a partial index, see indexes.py
+        unique_together = [('institution', 'year')]
+
+    def __str__(self):
+        return 'Impact of {} in {}'.format(self.institution or 'the directory', self.get_year_display() or 'all years')
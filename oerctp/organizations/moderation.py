@@ -0,0 +1,115 @@
+"""
+Bulk moderation: approve, hide or unhide a whole selection of objects, from the review queue or the admin.
+
+Each model of the selection is changed by one UPDATE, all of them in one transaction, instead of saving the objects
+one at a time. Queryset updates send no signals, so what the receivers in signals.py keep up to date is refreshed here
+once for the whole selection: the search documents, the published institution documents (marked stale), the impact
+totals, the profile facet choices, the review counts and the directory version.
+"""
+from collections import OrderedDict, defaultdict
+
+from django.apps import apps
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.utils import timezone
+
+from .facets import invalidate_profile_facet_choices
+from .impact import update_impact_totals
+from .loaders import PUBLISHED_CHILDREN
+from .models import AnnualImpactReport, Institution, InstitutionProfile, ModelMixin, Tag
+from .publish import mark_stale
+from .resolvers import parse_uuid
+from .review import invalidate_review_counts
+from .search import SEARCH_DOCUMENTS, update_search_documents
+from .versions import bump_directory_version
+
+# action: (changed fields, past tense for the messages)
+ACTIONS = OrderedDict([
+    ('review', ({'reviewed': True}, 'approved')),
+    ('hide', ({'hidden': True}, 'hidden')),
+    ('unhide', ({'hidden': False}, 'unhidden')),
+])
+
+# the models shown on the published institution pages, see publish.py
+PUBLISHED_MODELS = {Institution, InstitutionProfile, Tag} | {model for name, model, to_attr in PUBLISHED_CHILDREN}
+
+
+def moderated_model(name):
+    """The model named `name` (e.g. 'Program') if its objects are moderated, otherwise None."""
+    try:
+        model = apps.get_model(app_label='organizations', model_name=name)
+    except (LookupError, ValueError):
+        return None
+    return model if issubclass(model, ModelMixin) else None
+
+
+def parse_selection(items):
+    """{model: [primary key, ...]} of `items` ('<model name>:<primary key>'); invalid items are left out."""
+    selection = defaultdict(list)
+    for item in items:
+        name, sep, pk = item.partition(':')
+        model, pk = moderated_model(name), parse_uuid(pk)
+        if model is not None and pk is not None:
+            selection[model].append(pk)
+    return dict(selection)
+
+
+def trusted(user):
+    """Whether the changes of `user` need no review, as in ModelMixin.save()."""
+    return user is not None and user.is_authenticated and user.can_review()
+
+
+def institution_ids(model, pks):
+    """The ids of the institutions whose published documents show the objects."""
+    if model is Institution:
+        institutions = Institution.objects.filter(pk__in=pks)
+    elif model is InstitutionProfile:
+        institutions = Institution.objects.filter(profile__in=pks)
+    elif model is Tag:
+        institutions = Institution.objects.filter(_tags_raw__slug__in=Tag.objects.filter(pk__in=pks).values('slug'))
+    else:
+        return set(model._default_manager.filter(pk__in=pks).values_list('institution_id', flat=True))
+    return set(institutions.values_list('pk', flat=True))
+
+
+def refresh(selection):
+    """Bring everything derived from the objects of `selection` ({model: pks}) up to date after an update."""
+    published_institutions = set()
+    for model, pks in selection.items():
+        if model in SEARCH_DOCUMENTS:
+            update_search_documents(model, pks)
+        if model in PUBLISHED_MODELS or model is AnnualImpactReport:
+            ids = institution_ids(model, pks)
+            if model is InstitutionProfile:
+                update_search_documents(Institution, ids)  # the institution documents depend on the profile
+                invalidate_profile_facet_choices()
+            if model is AnnualImpactReport:
+                update_impact_totals(*ids)
+            else:
+                published_institutions |= ids
+
+    mark_stale(*published_institutions)
+    invalidate_review_counts()
+    bump_directory_version()
+
+
+@transaction.atomic
+def moderate(selection, action, user=None):
+    """
+    Apply `action` (see ACTIONS) to the objects of `selection` ({model: primary keys}); returns the number changed.
+
+    As when an object is saved: unless a trusted user moderates, the objects need a review again (and only trusted
+    users may approve them).
+    """
+    changes = dict(ACTIONS[action][0], updated_at=timezone.now())
+    if not trusted(user):
+        if action == 'review':
+            raise PermissionDenied
+        changes['reviewed'] = False
+
+    selection = {model: list(pks) for model, pks in selection.items() if pks}
+    count = 0
+    for model, pks in selection.items():
+        count += model._default_manager.filter(pk__in=pks).update(**changes)
+    refresh(selection)
+    return count
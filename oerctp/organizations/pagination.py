@@ -0,0 +1,148 @@
+"""
+Keyset (seek) pagination of the directory filter results.
+
+Instead of OFFSET, a page starts right after (or, going back, right before) the sort key of the last row seen,
+e.g. `WHERE (name, id) > ('MIT', '...') ORDER BY name, id LIMIT 51`. With an index on the sort key every page
+costs the same, however deep it is. The sort key of a row is passed between pages as an opaque cursor.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except ValueError:  # also covers binascii.Error and UnicodeDecodeError
+        raise Http404('Invalid page')
+    if not isinstance(key, list):
+        raise Http404('Invalid page')
+    return key
+
+
+def seek(fields, key, forward=True):
+    """
+    Q object selecting the rows sorted after (or before) `key` by `fields` (ORDER BY fields, '-' meaning DESC).
+
+    E.g. (a, b) > (x, y) is a > x OR (a = x AND b > y).
+    """
+    q = Q()
+    for i, field in enumerate(fields):
+        name = field.lstrip('-')
+        lookup = 'gt' if forward != field.startswith('-') else 'lt'
+        condition = Q(**{'{}__{}'.format(name, lookup): key[i]})
+        for previous_field, previous_value in zip(fields[:i], key[:i]):
+            condition &= Q(**{previous_field.lstrip('-'): previous_value})
+        q |= condition
+    return q
+
+
+def reverse_ordering(fields):
+    return [field[1:] if field.startswith('-') else '-' + field for field in fields]
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def next_cursor(self):
+        return encode_cursor(self.paginator.key(self.object_list[-1]))
+
+    def previous_cursor(self):
+        return encode_cursor(self.paginator.key(self.object_list[0]))
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset ordered by fields which are unique together (e.g. `order_by('name', 'id')`).
+
+    `count` is the number of all rows matching the queryset, computed on first use unless the caller knows it.
+    """
+
+    def __init__(self, queryset, per_page, count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields = list(queryset.query.order_by)
+        if not self.fields:
+            raise ValueError('KeysetPaginator needs an ordered queryset.')
+        self._count = count
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    def key(self, obj):
+        key = []
+        for field in self.fields:
+            value = obj
+            for attr in field.lstrip('-').split('__'):
+                value = getattr(value, attr)
+            key.append(value if isinstance(value, (int, str)) else str(value))
+        return key
+
+    def seek(self, cursor, forward=True):
+        key = decode_cursor(cursor)
+        if len(key) != len(self.fields):
+            raise Http404('Invalid page')
+        try:
+            return self.queryset.filter(seek(self.fields, key, forward))
+        except (TypeError, ValueError):  # e.g. text instead of a number
+            raise Http404('Invalid page')
+
+    def page(self, after=None, before=None):
+        """The page following the `after` cursor, preceding the `before` cursor, or the first page."""
+        if before:
+            queryset = self.seek(before, forward=False).order_by(*reverse_ordering(self.fields))
+        elif after:
+            queryset = self.seek(after)
+        else:
+            queryset = self.queryset
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if before:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=bool(rows), has_previous=has_more)
+        return KeysetPage(rows, self, has_next=has_more, has_previous=bool(after and rows))
+
+
+def iterate_chunks(queryset, chunk_size=500):
+    """Iterate over an ordered queryset (e.g. by id) in lists of at most `chunk_size` objects, see iterate_in_chunks."""
+    paginator = KeysetPaginator(queryset, chunk_size)
+    page = paginator.page()
+    while True:
+        if page.object_list:
+            yield page.object_list
+        if not page.has_next:
+            return
+        page = paginator.page(after=page.next_cursor())
+
+
+def iterate_in_chunks(queryset, chunk_size=500):
+    """
+    Iterate over an ordered queryset (e.g. by id) one keyset page at a time.
+
+    Unlike QuerySet.iterator(), which in Django 1.10 still fetches the whole result into the database client,
+    at most `chunk_size` rows are held in memory.
+    """
+    for chunk in iterate_chunks(queryset, chunk_size):
+        yield from chunk
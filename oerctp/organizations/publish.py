@@ -0,0 +1,146 @@
+"""
+Published institutions: everything the public institution page displays, as one JSON document per institution.
+
+The document is built from the institution, its profile, its published children and its tags (see loaders.py),
+with the `*_directorypage` lists decoded, markdown rendered to HTML and dates formatted, so the page is rendered
+from a single row fetched by primary key. The keys follow the attribute names the template used to read from the
+model objects (`object.profile.city`, `object.published_programs`, ...).
+
+Saving an institution or one of its children marks its document stale (see signals.py). Rendering markdown and
+loading the tags stays off the request path: the page keeps showing the stale document until
+`manage.py rebuild_published_institutions --stale`, run by cron, rebuilds it. Only an institution which has no
+document yet (e.g. one created since the last run) has it built by the first request which reads it.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import formats
+
+from .loaders import load_institution_page
+from .models import Institution, PublishedInstitution
+from .templatetags.markdown_helper import render_markdown
+
+PROFILE_ATTRIBUTES = [
+    'reviewed', 'twitter_image_displayed', 'twitter_image_url', 'twitter_image_thumbnail',
+    'institution_twitter', 'institution_twitter_url', 'institution_twitter_username',
+    'city', 'state_province', 'country', 'main_url', 'type', 'enrollment_normalized', 'sparc_member',
+    'url_oer', 'url_libguide', 'overview',
+    'campus_engagement_directorypage', 'library_engagement_directorypage', 'subject_engagement_directorypage',
+    'oer_included_directorypage', 'staff_location_directorypage',
+    'poc_visible', 'poc_name', 'poc_url', 'poc_job', 'poc_twitter', 'poc_twitter_url', 'poc_twitter_username',
+]
+
+# to_attr of the child collection (see loaders.PUBLISHED_CHILDREN): attributes displayed
+CHILD_ATTRIBUTES = {
+    'published_abstracts': ['name', 'slug'],
+    'published_programs': [
+        'name', 'abstract', 'type_directorypage', 'program_date_start', 'program_date_end', 'url_program',
+        'scope_directorypage', 'strategy_primary_directorypage', 'strategy_secondary_directorypage',
+        'home_directorypage', 'partners_directorypage', 'funding_source_directorypage',
+        'funding_library_directorypage', 'funding_total_directorypage', 'savings_total_directorypage',
+        'incentives_directorypage', 'incentives_conditions_directorypage', 'grant_funding_directorypage',
+        'grant_number_directorypage', 'grant_typical_directorypage', 'url_mou', 'url_assess', 'url_job', 'url_other',
+    ],
+    'published_policies': [
+        'name', 'policy_abstract', 'policy_date_start', 'policy_date_end', 'policy_type_directorypage',
+        'scope_directorypage', 'policy_level_directorypage', 'url_text', 'url_description', 'url_announcement',
+        'url_report',
+    ],
+    'published_events': [
+        'name', 'abstract', 'date_start', 'date_end', 'type_directorypage', 'scope_directorypage',
+        'attendees_directorypage', 'hashtag', 'url_summary', 'url_promo', 'url_recording', 'url_slides',
+        'url_photos', 'url_news',
+    ],
+    'published_resources': ['name', 'url', 'abstract', 'license_directorypage', 'date', 'citation'],
+}
+
+# markdown attributes, stored as rendered HTML under '<attribute>_html'
+MARKDOWN_ATTRIBUTES = ['overview', 'abstract', 'policy_abstract']
+
+# date attributes displayed in another format than DATE_FORMAT
+DATE_FORMATS = {
+    'published_resources': {'date': 'F Y'},
+}
+
+
+def read_attributes(obj, attributes, date_formats=None):
+    date_formats = date_formats or {}
+    values = {}
+    for attribute in attributes:
+        try:
+            value = getattr(obj, attribute)
+        except (AttributeError, TypeError, ValueError):  # e.g. the username of a missing Twitter handle
+            value = None  # the template displayed nothing either
+        if hasattr(value, 'isoformat'):
+            value = formats.date_format(value, date_formats[attribute]) if attribute in date_formats \
+                else formats.localize(value)
+        if attribute in MARKDOWN_ATTRIBUTES and value:
+            values[attribute + '_html'] = render_markdown(value)
+        values[attribute] = value
+    return values
+
+
+def institution_document(institution):
+    """The document of an institution loaded by load_institution_page()."""
+    document = {
+        'id': institution.id,
+        'name': institution.name,
+        'slug': institution.slug,
+        'profile': read_attributes(institution.profile, PROFILE_ATTRIBUTES),
+        'published_tags': [{'name': tag.name, 'slug': tag.slug} for tag in institution.published_tags],
+    }
+    for to_attr, attributes in CHILD_ATTRIBUTES.items():
+        document[to_attr] = [
+            read_attributes(child, attributes, DATE_FORMATS.get(to_attr)) for child in getattr(institution, to_attr)
+        ]
+    # JSONField (Django 1.10) has no encoder option: turn UUIDs, decimals etc. to plain JSON values here
+    return json.loads(json.dumps(document, cls=DjangoJSONEncoder))
+
+
+def listed(institution):
+    """Whether the institution is shown on the directory homepage: filled out, reviewed and not hidden."""
+    profile = institution.profile
+    return bool(profile.filled_in_by) and profile.reviewed and not profile.hidden
+
+
+def publish_institution(institution_id):
+    """Build the document of an institution and store it; returns the PublishedInstitution."""
+    institution = load_institution_page(Institution.objects.all(), pk=institution_id)
+    published, created = PublishedInstitution.objects.update_or_create(
+        institution_id=institution.pk,
+        defaults={
+            'slug': institution.slug,
+            'name': institution.name,
+            'listed': listed(institution),
+            'document': institution_document(institution),
+            'stale': False,
+        },
+    )
+    return published
+
+
+def publish_stale_institutions():
+    """Rebuild the documents marked stale and build the missing ones; returns their number."""
+    stale = list(PublishedInstitution.objects.filter(stale=True).values_list('pk', flat=True))
+    stale += Institution.objects.filter(published=None).values_list('pk', flat=True)
+    for institution_id in stale:
+        publish_institution(institution_id)
+    return len(stale)
+
+
+def mark_stale(*institution_ids):
+    """Mark the documents of the institutions stale (in one query), to be rebuilt by publish_stale_institutions()."""
+    if institution_ids:
+        PublishedInstitution.objects.filter(pk__in=institution_ids).update(stale=True)
+
+
+def load_published(institution_id):
+    """
+    The PublishedInstitution of an institution, for resolvers.resolve_institution().
+
+    If it has not been built yet, an unsaved stale one without a document: the page reading it builds it (see
+    views_public.py).
+    """
+    published = PublishedInstitution.objects.filter(pk=institution_id).first()
+    return published or PublishedInstitution(institution_id=institution_id, stale=True)
+
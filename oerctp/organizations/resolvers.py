@@ -0,0 +1,79 @@
+"""
+Resolve the `uuid_or_slug` of the public institution URLs to the institution id.
+
+The key is parsed up front: a UUID is the id itself, so no lookup is needed. A slug is mapped to the id by a small
+cache in each process, holding the SLUG_CACHE_SIZE most recently used slugs. A miss costs one query. The cache is
+cleared for an institution when it is saved or deleted in this process (see signals.py). Another process may still
+hold the old mapping after a slug changed, so an object loaded through a cached slug is checked against the slug and
+looked up again if it does not match.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.exceptions import ObjectDoesNotExist
+
+from .models import Institution
+
+SLUG_CACHE_SIZE = 1024
+
+_slug_ids = OrderedDict()  # slug: institution id, least recently used first
+_lock = threading.Lock()
+
+
+def parse_uuid(value):
+    """The UUID written in `value`, or None if it is not a UUID (e.g. a slug)."""
+    try:
+        return uuid.UUID(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def cached_institution_id(slug):
+    with _lock:
+        institution_id = _slug_ids.get(slug)
+        if institution_id is not None:
+            _slug_ids.move_to_end(slug)
+        return institution_id
+
+
+def cache_institution_id(slug, institution_id):
+    with _lock:
+        _slug_ids[slug] = institution_id
+        _slug_ids.move_to_end(slug)
+        while len(_slug_ids) > SLUG_CACHE_SIZE:
+            _slug_ids.popitem(last=False)
+
+
+def forget_institution(institution_id):
+    """Drop the cached slugs of an institution, e.g. after its slug changed."""
+    with _lock:
+        for slug in [slug for slug, cached_id in _slug_ids.items() if cached_id == institution_id]:
+            del _slug_ids[slug]
+
+
+def resolve_institution(uuid_or_slug, load, slug=lambda obj: obj.slug):
+    """
+    The object `load(institution_id)` returns for the institution with the id or slug `uuid_or_slug`.
+
+    `load` raises an ObjectDoesNotExist exception if there is no such object. `slug(obj)` is the slug of the institution
+    of the object, used to check objects loaded through a cached slug. Raises Institution.DoesNotExist for an unknown
+    slug.
+    """
+    institution_id = parse_uuid(uuid_or_slug)
+    if institution_id is not None:
+        return load(institution_id)
+
+    institution_id = cached_institution_id(uuid_or_slug)
+    if institution_id is not None:
+        try:
+            obj = load(institution_id)
+        except ObjectDoesNotExist:
+            obj = None
+        if obj is not None and slug(obj) == uuid_or_slug:
+            return obj
+        forget_institution(institution_id)  # the slug was changed or removed (in another process)
+
+    institution_id = Institution.objects.values_list('pk', flat=True).get(slug=uuid_or_slug)
+    cache_institution_id(uuid_or_slug, institution_id)
+    return load(institution_id)
@@ -1,6 +1,18 @@
 from import_export import resources, fields
+
+from .fields import RatingChoiceField
 from .models import AnnualImpactReport, Abstract, Institution, InstitutionProfile, Program, Policy, Event, Resource, Tag
 
+
+class TaggedResourceMixin:
+    """Export the tags attached by tagging.resolve_tags() (see CSVExportView) instead of querying them for each row."""
+
+    def dehydrate__tags_raw(self, obj):
+        if not hasattr(obj, 'raw_tag_ids'):
+            return self.fields['_tags_raw'].export(obj)
+        return ','.join(str(tag_id) for tag_id in obj.raw_tag_ids)
+
+
 class AnnualImpactReportResource(resources.ModelResource):
     class Meta:
         model = AnnualImpactReport
@@ -11,6 +23,12 @@ class AnnualImpactReportResource(resources.ModelResource):
     def get_queryset(self):
         return self._meta.model.objects.order_by('id') # sort
 
+    def export_field(self, field, obj):
+        value = super().export_field(field, obj)
+        if field.attribute in AnnualImpactReport.AWARENESS_FIELDS and value == '':
+            return RatingChoiceField.NOT_SURE  # "Not sure" (NULL) is exported as it used to be stored
+        return value
+
 
 class AbstractResource(resources.ModelResource):
     class Meta:
@@ -20,9 +38,10 @@ class AbstractResource(resources.ModelResource):
         return self._meta.model.objects.order_by('id') # sort
 
 
-class InstitutionResource(resources.ModelResource):
+class InstitutionResource(TaggedResourceMixin, resources.ModelResource):
     class Meta:
         model = Institution
+        exclude = ('search_vector',)
 
     def get_queryset(self):
         return self._meta.model.objects.exclude(profile__filled_in_by__isnull=True).exclude(profile__filled_in_by='').order_by('id') # sort
@@ -42,33 +61,37 @@ class InstitutionProfileResource(resources.ModelResource):
         return self._meta.model.objects.exclude(filled_in_by__isnull=True).exclude(filled_in_by='').order_by('id') # sort
 
 
-class ProgramResource(resources.ModelResource):
+class ProgramResource(TaggedResourceMixin, resources.ModelResource):
     class Meta:
         model = Program
+        exclude = ('search_vector',)
 
     def get_queryset(self):
         return self._meta.model.objects.order_by('id') # sort
 
 
-class PolicyResource(resources.ModelResource):
+class PolicyResource(TaggedResourceMixin, resources.ModelResource):
     class Meta:
         model = Policy
+        exclude = ('search_vector',)
 
     def get_queryset(self):
         return self._meta.model.objects.order_by('id') # sort
 
 
-class EventResource(resources.ModelResource):
+class EventResource(TaggedResourceMixin, resources.ModelResource):
     class Meta:
         model = Event
+        exclude = ('search_vector',)
 
     def get_queryset(self):
         return self._meta.model.objects.order_by('id') # sort
 
 
-class ResourceResource(resources.ModelResource):
+class ResourceResource(TaggedResourceMixin, resources.ModelResource):
     class Meta:
         model = Resource
+        exclude = ('search_vector',)
 
     def get_queryset(self):
         return self._meta.model.objects.order_by('id') # sort
@@ -0,0 +1,140 @@
+"""
+The review queue: everything waiting for a review by the staff, across the content types, oldest change first.
+
+The unreviewed rows of every table are selected by a partial index on (updated_at, id) WHERE NOT reviewed (see
+indexes.py) and merged in a single UNION ALL query, so a page of the queue costs one query however many rows are
+waiting. The numbers of waiting rows of each type are cached; saving or deleting a reviewed object invalidates them
+(see signals.py), changes made by queryset updates are picked up after REVIEW_COUNTS_TIMEOUT seconds at the latest.
+"""
+from collections import OrderedDict, namedtuple
+
+from django.core.cache import cache
+from django.db import connection
+from django.shortcuts import reverse
+
+from .models import AnnualImpactReport, Abstract, Event, Institution, InstitutionProfile, Policy, Program, Resource
+
+REVIEW_COUNTS_CACHE_KEY = 'review-queue-counts'
+REVIEW_COUNTS_TIMEOUT = 60 * 5
+
+# the reviewed models in the order of the type filter: (model, column of the displayed name or None)
+REVIEW_MODELS = [
+    (InstitutionProfile, None),
+    (Program, 'name'),
+    (Policy, 'name'),
+    (Event, 'name'),
+    (Resource, 'name'),
+    (AnnualImpactReport, 'year'),
+    (Abstract, 'language_label'),
+]
+
+REVIEW_KINDS = OrderedDict((model._meta.model_name, model) for model, column in REVIEW_MODELS)
+
+REVIEW_SELECT = """
+    (SELECT %s AS kind, o.id, {name} AS name, o.updated_at,
+            institution.id AS institution_id, institution.name AS institution_name
+     FROM {table} o
+     LEFT JOIN {institution_table} institution ON {institution_join}
+     WHERE NOT o.reviewed
+     ORDER BY o.updated_at, o.id
+     LIMIT %s)
+"""
+
+REVIEW_QUEUE_QUERY = """
+    SELECT kind, id, name, updated_at, institution_id, institution_name
+    FROM ({selects}) queue
+    ORDER BY updated_at, kind, id
+    LIMIT %s OFFSET %s
+"""
+
+REVIEW_COUNT_SELECT = 'SELECT %s, count(*) FROM {table} WHERE NOT reviewed'
+
+
+class ReviewItem(namedtuple('ReviewItem', 'kind id name updated_at institution')):
+    """An object waiting for a review, as listed by the queue."""
+
+    @property
+    def model(self):
+        return REVIEW_KINDS[self.kind]
+
+    def class_name(self):
+        return self.model.__name__
+
+    def verbose_name(self):
+        return self.model._meta.verbose_name
+
+    def get_review_url(self):
+        return reverse('review', kwargs={'pk': self.id, 'type': self.class_name()})
+
+
+def review_item(kind, id, name, updated_at, institution_id, institution_name):
+    model = REVIEW_KINDS[kind]
+    if model is InstitutionProfile:
+        name = 'Institutional Profile'
+    elif model is AnnualImpactReport:
+        name = dict(AnnualImpactReport.YEAR_CHOICES).get(name, name)
+    institution = Institution(id=institution_id, name=institution_name) if institution_id else None
+    return ReviewItem(kind, id, name, updated_at, institution)
+
+
+def review_select(model, column):
+    if model is InstitutionProfile:
+        institution_join = 'institution.profile_id = o.id'
+    else:
+        institution_join = 'institution.id = o.institution_id'
+    return REVIEW_SELECT.format(
+        name='o.{}'.format(model._meta.get_field(column).column) if column else 'NULL',
+        table=model._meta.db_table,
+        institution_table=Institution._meta.db_table,
+        institution_join=institution_join,
+    )
+
+
+def review_counts():
+    """The number of objects waiting for a review of every type (kind: count), cached."""
+    counts = cache.get(REVIEW_COUNTS_CACHE_KEY)
+    if counts is None:
+        query = ' UNION ALL '.join(
+            REVIEW_COUNT_SELECT.format(table=model._meta.db_table) for model, column in REVIEW_MODELS
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(query, list(REVIEW_KINDS))
+            counts = dict(cursor.fetchall())
+        cache.set(REVIEW_COUNTS_CACHE_KEY, counts, REVIEW_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate_review_counts():
+    cache.delete(REVIEW_COUNTS_CACHE_KEY)
+
+
+class ReviewQueue:
+    """
+    The objects waiting for a review, optionally of one `kind` (model name) only, for django.core.paginator.
+
+    count() reads the cached counts, slicing runs the queue query for the slice.
+    """
+
+    def __init__(self, kind=None):
+        if kind is not None and kind not in REVIEW_KINDS:
+            raise ValueError('Unknown kind {!r}'.format(kind))
+        self.kind = kind
+
+    def count(self):
+        counts = review_counts()
+        return counts.get(self.kind, 0) if self.kind else sum(counts.values())
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step:
+            raise TypeError('ReviewQueue supports slices only.')
+        offset = index.start or 0
+        limit = index.stop - offset
+        models = [(model, column) for model, column in REVIEW_MODELS if self.kind in (None, model._meta.model_name)]
+
+        params = []
+        for model, column in models:
+            params += [model._meta.model_name, offset + limit]  # no table contributes more rows than that
+        query = REVIEW_QUEUE_QUERY.format(selects=' UNION ALL '.join(review_select(*model) for model in models))
+        with connection.cursor() as cursor:
+            cursor.execute(query, params + [limit, offset])
+            return [review_item(*row) for row in cursor.fetchall()]
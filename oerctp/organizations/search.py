@@ -0,0 +1,197 @@
+"""
+Full-text search of the directory.
+
+The `q` parameter of the filter pages: every searchable model has a `search_vector` column (tsvector) holding its
+weighted text, kept up to date by the post_save receiver in signals.py (or `manage.py update_search_vectors` after
+bulk changes) and indexed by GIN (see indexes.py). When the pg_trgm extension is installed, names are also matched
+by trigram similarity, which finds parts of words and misspellings.
+
+The /search/ page: published institutions, activities, abstracts and tags are copied to the SearchDocument table,
+so the whole directory is searched with one indexed query. A document is written when its object is saved (also
+when it is reviewed or hidden) and deleted when the object stops being published.
+"""
+import functools
+import operator
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, transaction
+from django.db.models import Count, F, IntegerField
+from django.db.models.functions import Cast
+from django.shortcuts import reverse
+
+from .models import (
+    Abstract, Event, Institution, InstitutionProfile, Policy, Program, Resource, SearchDocument, Tag
+)
+
+# names of institutions, people and places: do not stem or drop stop words
+SEARCH_CONFIG = 'simple'
+
+# model: [(field, weight), ...]
+SEARCH_FIELDS = {
+    Institution: [('name', 'A')],
+    InstitutionProfile: [('city', 'B'), ('poc_name', 'B')],
+    Program: [('name', 'A')],
+    Policy: [('name', 'A')],
+    Event: [('name', 'A')],
+    Resource: [('name', 'A')],
+}
+
+
+def search_vector(model):
+    vectors = [SearchVector(field, weight=weight, config=SEARCH_CONFIG) for field, weight in SEARCH_FIELDS[model]]
+    return functools.reduce(operator.add, vectors)
+
+
+def update_search_vectors(model, **lookup):
+    """Recompute the search_vector of the rows matching `lookup` (all rows by default) in a single UPDATE."""
+    return model._default_manager.filter(**lookup).update(search_vector=search_vector(model))
+
+
+_trigram_available = {}
+
+
+def trigram_available(using='default'):
+    """Whether the pg_trgm extension is installed (checked once per process and database)."""
+    if using not in _trigram_available:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available[using] = cursor.fetchone() is not None
+    return _trigram_available[using]
+
+
+def institution_url(institution_id):
+    return reverse('institution_public', kwargs={'uuid_or_slug': institution_id})
+
+
+def published(obj):
+    return obj.reviewed and not obj.hidden
+
+
+def institution_document(institution):
+    profile = institution.profile
+    if not published(profile):
+        return None
+    state_province = dict(InstitutionProfile.STATE_PROVINCE_CHOICES).get(profile.state_province)
+    return {
+        'institution': institution,
+        'title': institution.name,
+        'body': ' '.join(filter(None, [profile.city, state_province, profile.overview_raw])),
+        'url': institution_url(institution.id),
+    }
+
+
+def activity_document(activity):
+    if not published(activity):
+        return None
+    return {
+        'institution_id': activity.institution_id,
+        'title': activity.name,
+        'body': (activity.policy_abstract if isinstance(activity, Policy) else activity.abstract) or '',
+        'url': institution_url(activity.institution_id),
+    }
+
+
+def abstract_document(abstract):
+    if not published(abstract):
+        return None
+    return {
+        'institution_id': abstract.institution_id,
+        'title': '{} ({})'.format(abstract.institution.name, abstract.name),
+        'body': abstract.abstract_raw or '',
+        'url': reverse('institution_public_abstract', kwargs={
+            'uuid_or_slug': abstract.institution_id, 'lang': abstract.slug,
+        }),
+    }
+
+
+def tag_document(tag):
+    if not published(tag) or tag.type == Tag.TYPE_HIDDEN:
+        return None
+    return {
+        'title': tag.name,
+        'body': ' '.join(filter(None, [tag.description, tag.expertise, tag.profession, tag.institution])),
+        'url': reverse('tag', kwargs={'slug': tag.slug}),
+    }
+
+
+# model: (function returning the document fields of a published object or None, related objects it reads)
+SEARCH_DOCUMENTS = {
+    Institution: (institution_document, ['profile']),
+    Program: (activity_document, []),
+    Policy: (activity_document, []),
+    Event: (activity_document, []),
+    Resource: (activity_document, []),
+    Abstract: (abstract_document, ['institution']),
+    Tag: (tag_document, []),
+}
+
+
+def document_vector():
+    return (SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('body', weight='B', config=SEARCH_CONFIG))
+
+
+def update_search_document(obj):
+    """Write (or delete, if `obj` is not published) the search document of a single object."""
+    model = type(obj)
+    kind = model._meta.model_name
+    fields = SEARCH_DOCUMENTS[model][0](obj)
+    if fields is None:
+        SearchDocument.objects.filter(kind=kind, object_id=obj.pk).delete()
+        return
+
+    document, created = SearchDocument.objects.update_or_create(kind=kind, object_id=obj.pk, defaults=fields)
+    SearchDocument.objects.filter(pk=document.pk).update(search_vector=document_vector())
+
+
+@transaction.atomic
+def update_search_documents(model, pks=None):
+    """
+    Rewrite the search documents of the objects of `model` with the primary keys `pks` (of all objects by default).
+
+    A handful of queries, however many objects there are; objects which are not published lose their documents.
+    Returns the number of published objects.
+    """
+    kind = model._meta.model_name
+    build, related = SEARCH_DOCUMENTS[model]
+    objects = model._default_manager.select_related(*related)
+    existing = SearchDocument.objects.filter(kind=kind)
+    if pks is not None:
+        objects = objects.filter(pk__in=pks)
+        existing = existing.filter(object_id__in=pks)
+
+    documents = []
+    for obj in objects.iterator():
+        fields = build(obj)
+        if fields is not None:
+            documents.append(SearchDocument(kind=kind, object_id=obj.pk, **fields))
+
+    existing.delete()
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+    existing.update(search_vector=document_vector())
+    return len(documents)
+
+
+def rebuild_search_documents(model):
+    """Replace the search documents of all objects of `model`; returns the number of published objects."""
+    return update_search_documents(model)
+
+
+def search_documents(text, kind=None):
+    """
+    Search the directory: (documents, facets).
+
+    `documents` are the matching SearchDocuments of `kind` (or all kinds) ordered by relevance (`search_rank`),
+    `facets` is the number of matches of each kind.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG)
+    documents = SearchDocument.objects.filter(search_vector=query)
+
+    facets = dict(documents.order_by().values_list('kind').annotate(count=Count('id')))
+
+    if kind:
+        documents = documents.filter(kind=kind)
+    documents = documents.select_related('institution').annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query) * 1000000, IntegerField()),
+    ).order_by('-search_rank', 'id')
+    return documents, facets
@@ -0,0 +1,84 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .facets import invalidate_profile_facet_choices
+from .impact import update_impact_totals
+from .loaders import PUBLISHED_CHILDREN
+from .models import (
+    AnnualImpactReport, Institution, InstitutionProfile, ModelMixin, SearchDocument, Tag, UUIDTaggedItem,
+)
+from .publish import mark_stale
+from .resolvers import forget_institution
+from .review import REVIEW_KINDS, invalidate_review_counts
+from .search import SEARCH_DOCUMENTS, SEARCH_FIELDS, update_search_document, update_search_vectors
+from .versions import bump_directory_version
+
+PUBLISHED_CHILD_MODELS = [model for related_name, model, to_attr in PUBLISHED_CHILDREN]
+
+
+@receiver([post_save, post_delete], sender=InstitutionProfile)
+def invalidate_facet_choices(sender, **kwargs):
+    invalidate_profile_facet_choices()
+
+
+@receiver([post_save, post_delete])
+def invalidate_review_queue(sender, **kwargs):
+    if sender in REVIEW_KINDS.values():
+        invalidate_review_counts()
+
+
+@receiver([post_save, post_delete], sender=AnnualImpactReport)
+def update_impact(sender, instance, **kwargs):
+    update_impact_totals(instance.institution_id)
+
+
+@receiver([post_save, post_delete], sender=Institution)
+def forget_institution_slug(sender, instance, **kwargs):
+    forget_institution(instance.pk)
+
+
+@receiver(post_save)
+def update_search_vector(sender, instance, **kwargs):
+    if sender in SEARCH_FIELDS:
+        update_search_vectors(sender, pk=instance.pk)
+
+
+@receiver(post_save)
+def save_search_document(sender, instance, **kwargs):
+    if sender in SEARCH_DOCUMENTS:
+        update_search_document(instance)
+    if sender is Institution:
+        # abstract titles contain the institution name
+        for abstract in instance.additional_languages.all():
+            update_search_document(abstract)
+    if sender is InstitutionProfile:
+        try:
+            update_search_document(instance.institution)
+        except Institution.DoesNotExist:
+            pass
+
+
+@receiver(post_delete)
+def delete_search_document(sender, instance, **kwargs):
+    if sender in SEARCH_DOCUMENTS:
+        SearchDocument.objects.filter(kind=sender._meta.model_name, object_id=instance.pk).delete()
+
+
+@receiver([post_save, post_delete])
+def publish_institution(sender, instance, signal, **kwargs):
+    if sender is Institution and signal is post_save:
+        mark_stale(instance.pk)
+    elif sender in PUBLISHED_CHILD_MODELS:
+        mark_stale(instance.institution_id)
+    elif sender is InstitutionProfile:
+        mark_stale(*Institution.objects.filter(profile=instance).values_list('pk', flat=True))
+    elif sender is UUIDTaggedItem and instance.content_type.model_class() is Institution:
+        mark_stale(instance.object_id)
+    elif sender is Tag:
+        mark_stale(*Institution.objects.filter(_tags_raw__slug=instance.slug).values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete])
+def change_directory_version(sender, **kwargs):
+    if issubclass(sender, ModelMixin) or sender is UUIDTaggedItem:
+        bump_directory_version()
@@ -0,0 +1,179 @@
+"""
+Tags of many objects at once, and all objects of a tag at once.
+
+TagMixin.tags costs two queries per object: its taggit items, then the Tag rows with their slugs. resolve_tags()
+loads the taggit items of any number of tagged objects (of any TagMixin models) in one query and the Tag rows of all
+of them in another, and attaches the results to the objects.
+
+The tag landing page lists the institutions, programs, policies, events and resources tagged with a tag.
+tag_members() selects one page of them, with their institutions and the number of members of each type, in a single
+query: the taggit items of the tag are found by the (tag, content type, object id) index of UUIDTaggedItem and
+joined to each of the tables.
+"""
+from collections import OrderedDict, defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.http import Http404
+
+from .models import Event, Institution, Policy, Program, Resource, Tag, UUIDTaggedItem
+
+
+def resolve_tags(objects):
+    """
+    Attach the tags of `objects` to each of them, in two queries.
+
+    `obj.tag_list` are the Tag objects (ordered like TagMixin.tags: by type and name), `obj.raw_tag_ids` the ids of
+    the taggit tags (the values of the `_tags_raw` field). Returns `objects` as a list.
+    """
+    objects = list(objects)
+    # ContentType.objects caches the content types, so this does not query the database after the first use
+    content_types = {model: ContentType.objects.get_for_model(model) for model in {type(obj) for obj in objects}}
+
+    raw_tags = defaultdict(list)  # (content type id, object id): [(taggit tag id, slug), ...]
+    if objects:
+        items = UUIDTaggedItem.objects.filter(
+            content_type__in=content_types.values(), object_id__in={obj.pk for obj in objects},
+        ).values_list('content_type_id', 'object_id', 'tag_id', 'tag__slug')
+        for content_type_id, object_id, tag_id, slug in items:
+            raw_tags[content_type_id, object_id].append((tag_id, slug))
+
+    slugs = {slug for tags in raw_tags.values() for tag_id, slug in tags}
+    tags = list(Tag.objects.filter(slug__in=slugs).order_by('type', 'name')) if slugs else []
+
+    for obj in objects:
+        obj_tags = raw_tags[content_types[type(obj)].pk, obj.pk]
+        obj_slugs = {slug for tag_id, slug in obj_tags}
+        obj.tag_list = [tag for tag in tags if tag.slug in obj_slugs]
+        obj.raw_tag_ids = [tag_id for tag_id, slug in obj_tags]
+    return objects
+
+
+# the tagged models in the order the tag page lists them: (model, field displayed next to the name or None)
+TAG_MEMBER_MODELS = [
+    (Institution, None),
+    (Program, 'type'),
+    (Policy, 'policy_type'),
+    (Event, 'type'),
+    (Resource, 'type'),
+]
+
+TAG_MEMBER_KINDS = OrderedDict((model._meta.model_name, model) for model, field in TAG_MEMBER_MODELS)
+
+TAG_MEMBER_SELECT = """
+    SELECT items.kind, {position} AS position, o.id, o.name, {type} AS type,
+           institution.id AS institution_id, institution.name AS institution_name
+    FROM items
+    JOIN {table} o ON o.id = items.object_id
+    JOIN {institution_table} institution ON institution.id = {institution_column}
+    WHERE items.kind = %s
+"""
+
+TAG_MEMBERS_QUERY = """
+    WITH items AS (
+        SELECT content_type.model AS kind, item.object_id
+        FROM {item_table} item
+        JOIN {tag_table} tag ON tag.id = item.tag_id
+        JOIN {content_type_table} content_type ON content_type.id = item.content_type_id
+        WHERE tag.slug = %s AND content_type.app_label = %s
+    ), members AS ({members})
+    SELECT page.kind, page.id, page.name, page.type, page.institution_id, page.institution_name, counts.counts
+    FROM (
+        SELECT json_object_agg(kind, count) AS counts
+        FROM (SELECT kind, count(*) AS count FROM members GROUP BY kind) grouped
+    ) counts
+    LEFT JOIN LATERAL (
+        SELECT * FROM members
+        WHERE %s IS NULL OR kind = %s
+        ORDER BY position, institution_name, name, id
+        LIMIT %s OFFSET %s
+    ) page ON TRUE
+    ORDER BY page.position, page.institution_name, page.name, page.id
+"""
+
+
+def tag_members_query():
+    selects = []
+    for position, (model, field) in enumerate(TAG_MEMBER_MODELS):
+        selects.append(TAG_MEMBER_SELECT.format(
+            position=position,
+            type='to_jsonb(o.{})'.format(model._meta.get_field(field).column) if field else 'NULL::jsonb',
+            table=model._meta.db_table,
+            institution_table=Institution._meta.db_table,
+            institution_column='o.id' if model is Institution else 'o.institution_id',
+        ))
+    return TAG_MEMBERS_QUERY.format(
+        item_table=UUIDTaggedItem._meta.db_table,
+        tag_table=UUIDTaggedItem._meta.get_field('tag').related_model._meta.db_table,
+        content_type_table=ContentType._meta.db_table,
+        members=' UNION ALL '.join(selects),
+    )
+
+
+def tag_member(kind, id, name, type, institution_id, institution_name):
+    """An (unsaved) object built from a row of the members query, with its institution."""
+    model = TAG_MEMBER_KINDS[kind]
+    institution = Institution(id=institution_id, name=institution_name)
+    if model is Institution:
+        return institution
+    field = dict(TAG_MEMBER_MODELS)[model]
+    obj = model(id=id, name=name, **{field: type})
+    obj.institution = institution
+    return obj
+
+
+class TagMembersPage:
+    """One page of the members of a tag; `counts` are the numbers of members of every type (kind: count)."""
+
+    def __init__(self, object_list, counts, number, per_page, kind=None):
+        self.object_list = object_list
+        self.counts = counts
+        self.number = number
+        self.per_page = per_page
+        self.count = counts.get(kind, 0) if kind else sum(counts.values())
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def by_kind(self, kind):
+        model = TAG_MEMBER_KINDS[kind]
+        return [obj for obj in self.object_list if type(obj) is model]
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_next(self):
+        return self.number * self.per_page < self.count
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+def tag_members(slug, page=1, per_page=100, kind=None):
+    """
+    A page (TagMembersPage) of the objects tagged with the tag `slug`, optionally of one `kind` (model name) only.
+
+    The objects are sorted by type, institution and name; they are unsaved model instances holding the fields the
+    tag page displays, with `obj.institution` set. Raises Http404 for a page past the last one.
+    """
+    if kind is not None and kind not in TAG_MEMBER_KINDS:
+        raise ValueError('Unknown kind {!r}'.format(kind))
+    params = [slug, Institution._meta.app_label] + list(TAG_MEMBER_KINDS)
+    params += [kind, kind, per_page, (page - 1) * per_page]
+
+    with connection.cursor() as cursor:
+        cursor.execute(tag_members_query(), params)
+        rows = cursor.fetchall()
+
+    # the counts are on every row; without members on the page there is a single row holding only them
+    counts = rows[0][-1] or {}
+    objects = [tag_member(*row[:-1]) for row in rows if row[0] is not None]
+    if not objects and page > 1:
+        raise Http404('Invalid page')
+    return TagMembersPage(objects, counts, page, per_page, kind)
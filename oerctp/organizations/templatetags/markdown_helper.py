@@ -1,21 +1,33 @@
 # markdown filter based on https://web.archive.org/web/20170331191111/https://stackoverflow.com/questions/25135346/using-markdownsafe-in-django-gives-syntax-error
 
-# #todo -- consider using "bleach" https://web.archive.org/web/20170401043601/https://stackoverflow.com/questions/37757474/django-rendering-markdown-sanitizied-with-bleach
+# sanitized with "bleach" https://web.archive.org/web/20170401043601/https://stackoverflow.com/questions/37757474/django-rendering-markdown-sanitizied-with-bleach
 
 # #todo -- bleach has "linkify" function -- see https://web.archive.org/web/20170401044238/https://raw.githubusercontent.com/vchrisb/emc_phoenix3/4ee59cc3ff3dfdc62a460308e157d702371df69c/content/templatetags/markdown_filter.py
 
+import functools
+import hashlib
+
+import bleach
 import markdown
 
 from django import template
+from django.core.cache import cache
 from django.template.defaultfilters import stringfilter
 from django.utils.encoding import force_text
 from django.utils.safestring import mark_safe
 
 register = template.Library()
 
-@register.filter(is_safe=False)
-@stringfilter
-def markdown_to_html(value):
+# tags and attributes the markdown below produces; anything else (e.g. raw HTML typed into a form) is removed
+ALLOWED_TAGS = ['p', 'br', 'h4', 'strong', 'em', 'a', 'ul', 'ol', 'li', 'blockquote', 'code', 'pre', 'hr']
+ALLOWED_ATTRIBUTES = {'a': ['href', 'title']}
+
+# change the version when the rendering changes, so that the HTML cached before is not used anymore
+MARKDOWN_CACHE_VERSION = 1
+MARKDOWN_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def render_markdown_uncached(value):
     extensions = ["nl2br", ]
 
     value='\n'+value  # if the text starts with heading, make sure we catch it
@@ -23,7 +35,27 @@ def markdown_to_html(value):
     value=value.replace('\n## ', '\n#### ')
     value=value.replace('\n### ', '\n#### ')
 
-    return mark_safe(markdown.markdown(force_text(value),
-                                       extensions,
-                                       safe_mode=False,
-                                       enable_attributes=False))
+    html = markdown.markdown(value, extensions, safe_mode=False, enable_attributes=False)
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+
+@functools.lru_cache(maxsize=1024)
+def render_markdown(value):
+    """
+    Sanitized HTML of the markdown `value`.
+
+    The same texts are displayed over and over, so the HTML is kept by the hash of the text in the shared cache
+    (rendered once for all processes) and the most recent texts also in this process.
+    """
+    key = 'markdown:{}:{}'.format(MARKDOWN_CACHE_VERSION, hashlib.sha1(value.encode()).hexdigest())
+    html = cache.get(key)
+    if html is None:
+        html = render_markdown_uncached(value)
+        cache.set(key, html, MARKDOWN_CACHE_TIMEOUT)
+    return html
+
+
+@register.filter(is_safe=False)
+@stringfilter
+def markdown_to_html(value):
+    return mark_safe(render_markdown(force_text(value)))
@@ -0,0 +1,165 @@
+import datetime
+
+import factory
+
+from ..models import (
+    Abstract, AnnualImpactReport, Event, Institution, InstitutionProfile, Policy, Program, Resource, Tag,
+)
+
+
+class ModelMixinFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        abstract = True
+
+    filled_in_by = 'librarian@example.edu'
+    acknowledgments = True
+
+    reviewed = True
+
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        """ModelMixin.save() clears the reviewed flag unless a trusted user saves the object, so set it afterwards."""
+        reviewed = kwargs.pop('reviewed')
+        obj = super()._create(model_class, *args, **kwargs)
+        if reviewed:
+            model_class.objects.filter(pk=obj.pk).update(reviewed=True)
+            obj.reviewed = True
+        return obj
+
+
+class InstitutionProfileFactory(ModelMixinFactory):
+    class Meta:
+        model = InstitutionProfile
+
+    institution_website = 'https://www.example.edu'
+    poc_name = 'Jane Doe'
+    poc_job = 'Scholarly Communication Librarian'
+    poc_email = 'jane.doe@example.edu'
+    poc_visibility = 'visible'
+    overview_raw = 'Open educational resources are ' * 20
+    campus_engagement = ['library', 'tlc']
+    library_engagement = ['scholcomm']
+    subject_engagement = ['un01']
+    taskforce = 'yes_1'
+    staff = 'yes_title'
+    staff_location = ['library']
+    catalog = ['oer']
+    oer_included = ['library']
+    oerdegree_offered = 'offering'
+    city = 'Springfield'
+    state_province = 'IL'
+    country = 'United States'
+
+
+class InstitutionFactory(ModelMixinFactory):
+    class Meta:
+        model = Institution
+
+    name = factory.Sequence(lambda n: 'University {0}'.format(n))
+    profile = factory.SubFactory(InstitutionProfileFactory)
+
+
+class ActivityFactory(ModelMixinFactory):
+    class Meta:
+        abstract = True
+
+    institution = factory.SubFactory(InstitutionFactory)
+
+
+class ProgramFactory(ActivityFactory):
+    class Meta:
+        model = Program
+
+    name = factory.Sequence(lambda n: 'Program {0}'.format(n))
+    type = 'grants'
+    abstract = 'The program supports faculty adopting open textbooks. ' * 5
+    home = 'library'
+    partners = ['library', 'store']
+    scope = 'oer'
+    strategy_adaptation = 'primary'
+    strategy_adoption = 'secondary'
+    strategy_awareness = 'na'
+    strategy_curation = 'na'
+    strategy_pedagogy = 'na'
+    strategy_publication = 'na'
+    strategy_review = 'na'
+    strategy_research = 'na'
+    program_date_start = '01/2017'
+    funding_source = [['grants', 'lib_operating'], '']
+    funding_library = ['scholcomm']
+    funding_total = 10000
+    financial_sustainability = 'progress'
+    incentives = [['grants', 'time'], '']
+    incentives_conditions = 'open_required'
+    url_program = 'https://www.example.edu/oer'
+
+
+class PolicyFactory(ActivityFactory):
+    class Meta:
+        model = Policy
+
+    name = factory.Sequence(lambda n: 'Policy {0}'.format(n))
+    policy_type = 'rule'
+    policy_abstract = 'The policy encourages the use of open educational resources.'
+    scope = 'oer'
+    policy_level = 'institution'
+    policy_date_start = '01/2017'
+    policy_definition = 'yes'
+    url_text = 'https://www.example.edu/policy'
+
+
+class EventFactory(ActivityFactory):
+    class Meta:
+        model = Event
+
+    name = factory.Sequence(lambda n: 'Event {0}'.format(n))
+    type = ['workshop', '']
+    abstract = 'A workshop introducing faculty to open educational resources. ' * 3
+    scope = 'oer'
+    date_start = datetime.date(2017, 10, 23)
+    attendees = 40
+    url_summary = 'https://www.example.edu/event'
+
+
+class ResourceFactory(ActivityFactory):
+    class Meta:
+        model = Resource
+
+    name = factory.Sequence(lambda n: 'Resource {0}'.format(n))
+    type = ['guide', 'video']
+    abstract = 'A guide to finding open textbooks.'
+    scope = 'oer'
+    license = ['ccby', '']
+    audience = ['faculty', 'students']
+    url = 'https://www.example.edu/guide'
+
+
+class AnnualImpactReportFactory(ActivityFactory):
+    class Meta:
+        model = AnnualImpactReport
+
+    year = factory.Iterator([year for year, label in AnnualImpactReport.YEAR_CHOICES])
+    impact_students = 1200
+    impact_faculty = 12
+    impact_courses = 30
+    awareness_rating_admin = 5
+    awareness_rating_faculty = 6
+    awareness_rating_library = 9
+    awareness_rating_students = None
+
+
+class AbstractFactory(ActivityFactory):
+    class Meta:
+        model = Abstract
+
+    language = factory.Iterator([[code, ''] for code, name in Abstract.LANGUAGE_CHOICES[:-1]])
+    abstract_raw = 'Les ressources éducatives libres sont ' * 20
+
+
+class TagFactory(ModelMixinFactory):
+    class Meta:
+        model = Tag
+
+    type = Tag.TYPE_MEMBERSHIP
+    name = factory.Sequence(lambda n: 'Tag {0}'.format(n))
+    slug = factory.Sequence(lambda n: 'tag-{0}'.format(n))
@@ -0,0 +1,82 @@
+import numpy as np
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models import Avg, Count
+from test_plus.test import TestCase
+
+from ..analytics import compute_analytics, group_percentiles, impact_analytics, load_columns, published_reports
+from .factories import AnnualImpactReportFactory, InstitutionFactory
+
+
+class TestImpactAnalytics(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        illinois = InstitutionFactory(profile__state_province='IL', profile__control='Public')
+        ohio = InstitutionFactory(profile__state_province='OH', profile__control='Private not-for-profit')
+        AnnualImpactReportFactory(institution=illinois, year='ay2017', impact_students=100, impact_faculty=None,
+                                  awareness_rating_admin=10)
+        AnnualImpactReportFactory(institution=illinois, year='ay2016', impact_students=300,
+                                  awareness_rating_admin=None)
+        AnnualImpactReportFactory(institution=ohio, year='ay2017', impact_students=200, awareness_rating_admin=4)
+        AnnualImpactReportFactory(institution=ohio, year='ay2016', impact_students=5000, hidden=True)
+
+    def test_rollups(self):
+        analytics = compute_analytics(load_columns())
+
+        overall = analytics['overall']
+        self.assertEqual(analytics['reports'], 3)
+        self.assertEqual(overall['impact_students']['total'], 600)
+        self.assertEqual(overall['impact_students']['percentiles']['50'], 200)
+        self.assertEqual(overall['impact_faculty']['count'], 2)
+        self.assertEqual(overall['awareness_rating_admin']['unknown'], 1)
+        self.assertEqual(overall['awareness_rating_admin']['median'], 7)
+
+        years = {row['key']: row for row in analytics['rollups']['year']}
+        self.assertEqual(years['ay2017']['label'], '2016-2017')
+        self.assertEqual(years['ay2017']['impact_students']['percentiles']['25'], 125)
+        self.assertEqual(years['ay2017']['awareness_rating_admin']['distribution'][3], 1)
+        states = {row['key']: row for row in analytics['rollups']['state_province']}
+        self.assertEqual(states['IL']['impact_students']['mean'], 200)
+
+    def test_ratings_aggregate_in_the_database(self):
+        reports = published_reports()
+        overall = compute_analytics(load_columns())['overall']
+
+        self.assertEqual(reports.aggregate(mean=Avg('awareness_rating_admin'))['mean'],
+                         overall['awareness_rating_admin']['mean'])
+        histogram = dict(reports.values_list('awareness_rating_admin').annotate(count=Count('id')))
+        self.assertEqual(histogram, {10: 1, 4: 1, None: 1})
+
+    def test_group_percentiles_match_numpy(self):
+        random = np.random.RandomState(0)
+        values = random.rand(500)
+        values[random.rand(500) < 0.2] = np.nan
+        groups = random.randint(0, 4, 500)
+
+        result = group_percentiles(values, groups, 5, [10, 50, 90])
+
+        for group in range(4):
+            np.testing.assert_allclose(result[group], np.nanpercentile(values[groups == group], [10, 50, 90]))
+        self.assertTrue(np.isnan(result[4]).all())  # no values
+
+    def test_cached_until_a_report_changes(self):
+        self.assertEqual(impact_analytics()['reports'], 3)
+        with self.assertNumQueries(1):  # the data version
+            impact_analytics()
+
+        AnnualImpactReportFactory(year='ay2015')
+        self.assertEqual(impact_analytics()['reports'], 4)
+
+    def test_dashboard_is_for_staff_only(self):
+        user = self.make_user()
+        with self.login(user):
+            self.response_404(self.get('impact_analytics'))
+
+        user.groups.add(Group.objects.create(name='SPARC Staff'))
+        with self.login(user):
+            page = self.get('impact_analytics')
+            response = self.get('impact_analytics', data={'format': 'json'})
+        self.assertContains(page, '2016-2017')
+        self.assertEqual(response.json()['overall']['impact_students']['total'], 600)
@@ -0,0 +1,137 @@
+import io
+import json
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.core.files.storage import FileSystemStorage
+from PIL import Image
+from test_plus.test import TestCase
+
+from ..avatars import (
+    AvatarRefresher, needs_mirror, needs_refresh, save_avatar_thumbnails, save_avatar_urls, thumbnail_formats,
+    urlopen_client, THUMBNAIL_SIZES,
+)
+from ..models import InstitutionProfile
+from .factories import InstitutionProfileFactory
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers like Twitter and the Wayback Machine; /twitter/flaky fails once, /twitter/missing is not found."""
+    failed = set()
+
+    def do_GET(self):
+        if self.path.startswith('/twitter/'):
+            username = self.path[len('/twitter/'):]
+            if username == 'missing':
+                return self.send_error(404)
+            if username == 'flaky' and username not in self.failed:
+                self.failed.add(username)
+                return self.send_error(503)
+            body = '<img data-resolved-url-large="https://pbs.example.com/{}.png">'.format(username)
+        elif self.path.startswith('/save/'):
+            body = ''
+        elif self.path == '/avatar.png':
+            output = io.BytesIO()
+            Image.new('RGB', (400, 400), 'red').save(output, 'PNG')
+            self.send_response(200)
+            self.end_headers()
+            return self.wfile.write(output.getvalue())
+        else:
+            avatar_url = 'http://web.archive.org/web/2017/' + self.path.split('url=')[1]
+            body = json.dumps({'archived_snapshots': {'closest': {'url': avatar_url}}})
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAvatarRefresher(TestCase):
+
+    def setUp(self):
+        StubHandler.failed = set()
+        self.server = HTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = base_url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+        self.refresher = AvatarRefresher(
+            concurrency=4, interval=0, timeout=5, retries=1, backoff=0,
+            twitter_url=base_url + 'twitter/', save_url=base_url + 'save/', available_url=base_url + 'available?url=',
+        )
+
+    def test_avatars_are_refreshed(self):
+        profiles = [
+            InstitutionProfileFactory(institution_twitter='@first'),
+            InstitutionProfileFactory(institution_twitter='flaky'),
+            InstitutionProfileFactory(institution_twitter='@missing'),
+        ]
+
+        results = list(self.refresher.refresh(profiles))
+
+        self.assertEqual([profile for profile, url, error in results], profiles)
+        self.assertEqual(
+            results[0][1], 'https://web.archive.org/web/2017/https%3A%2F%2Fpbs.example.com%2Ffirst.png'
+                           '#twitter_username=first'
+        )
+        self.assertTrue(results[1][1].endswith('#twitter_username=flaky'))  # retried after the 503
+        self.assertIsNone(results[2][1])
+        self.assertIn('404', str(results[2][2]))
+
+    def test_malformed_handle_fails_alone(self):
+        urls = []
+
+        def client(url, timeout):
+            urls.append(url)
+            return urlopen_client(url, timeout)
+
+        self.refresher.client = client
+        profiles = [InstitutionProfileFactory(institution_twitter='@first account'),
+                    InstitutionProfileFactory(institution_twitter='@first')]
+
+        results = list(self.refresher.refresh(profiles))
+
+        self.assertIsNone(results[0][1])
+        self.assertIn('is not a valid URL', str(results[0][2]))
+        self.assertEqual(len([url for url in urls if url.endswith('first account')]), 1)  # not retried
+        self.assertTrue(results[1][1].endswith('#twitter_username=first'))
+
+    def test_urls_are_saved_without_moderation(self):
+        profile = InstitutionProfileFactory(institution_twitter='@first')
+        self.assertTrue(needs_refresh(profile))
+
+        save_avatar_urls({profile.id: 'https://web.archive.org/web/2017/a.png#twitter_username=first'})
+
+        profile = InstitutionProfile.objects.get(pk=profile.pk)
+        self.assertFalse(needs_refresh(profile))
+        self.assertTrue(profile.reviewed)
+
+    def test_thumbnails_are_stored_once(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storage = FileSystemStorage(location=location)
+        url = self.base_url + 'avatar.png#twitter_username=first'
+        first = InstitutionProfileFactory(institution_twitter='@first', twitter_image_url=url)
+        second = InstitutionProfileFactory(institution_twitter='@second', twitter_image_url=url)
+        self.assertTrue(needs_mirror(first))
+
+        results = list(self.refresher.mirror([first, second], storage))
+        save_avatar_thumbnails({profile: names for profile, names, error in results})
+
+        first = InstitutionProfile.objects.get(pk=first.pk)
+        self.assertFalse(needs_mirror(first))
+        self.assertEqual(list(first.twitter_image_thumbnails), ['220'])
+        second = InstitutionProfile.objects.get(pk=second.pk)
+        self.assertEqual(first.twitter_image_thumbnails, second.twitter_image_thumbnails)
+        name = first.twitter_image_thumbnails['220']['png']
+        self.assertEqual(Image.open(storage.path(name)).size, (220, 220))
+        self.assertEqual(len(storage.listdir('avatars')[1]), len(THUMBNAIL_SIZES) * len(thumbnail_formats()))
+        self.assertEqual(first.twitter_image_thumbnail['png'], '/media/' + first.twitter_image_thumbnails['220']['png'])
+
+        InstitutionProfile.objects.filter(pk=first.pk).update(twitter_image_url=url + '-renamed')
+        first = InstitutionProfile.objects.get(pk=first.pk)
+        self.assertTrue(needs_mirror(first))
+        self.assertIsNone(first.twitter_image_thumbnail)
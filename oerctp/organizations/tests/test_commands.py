@@ -0,0 +1,170 @@
+import csv
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils.six import StringIO
+
+from test_plus.test import TestCase
+
+from ..indexes import INDEXES
+from ..models import Abstract, AnnualImpactReport, Institution, InstitutionProfile, Resource
+from .factories import AbstractFactory, AnnualImpactReportFactory, ResourceFactory
+
+
+class TestConvertChoiceFields(TestCase):
+
+    def revert_to_literal(self, model, field, values):
+        """Turn a converted column back into the old text column holding Python literals."""
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            # fire the pending foreign key checks of the test transaction, Postgres refuses to alter the table otherwise
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            for name, index_model, definition in INDEXES:
+                if index_model is model and field in definition.replace('(', ' ').replace(')', ' ').split():
+                    cursor.execute('DROP INDEX {}'.format(name))
+            cursor.execute('ALTER TABLE {0} ALTER COLUMN {1} TYPE text USING {1}::text'.format(table, field))
+            for obj, value in values.items():
+                cursor.execute('UPDATE {0} SET {1} = %s WHERE id = %s'.format(table, field), [value, obj.pk])
+
+    def test_literals_are_converted(self):
+        resource = ResourceFactory()
+        first, second = AbstractFactory(), AbstractFactory(institution=resource.institution)
+        self.revert_to_literal(Resource, 'type', {resource: "['guide', 'video']"})
+        self.revert_to_literal(Resource, 'license', {resource: "('other', 'Mixed \"licenses\"')"})
+        self.revert_to_literal(Abstract, 'language', {first: "('es', '')", second: "('other', 'Latin')"})
+
+        call_command('convert_choice_fields', stdout=StringIO())
+
+        resource = Resource.objects.get(pk=resource.pk)
+        self.assertEqual(resource.type, ['guide', 'video'])
+        self.assertEqual(resource.license, ['other', 'Mixed "licenses"'])
+        self.assertEqual(Abstract.objects.get(pk=first.pk).name, 'Spanish; Castilian')
+        self.assertEqual(Abstract.objects.get(pk=second.pk).name, 'Latin')
+        self.assertEqual(Resource.objects.filter(type__contains=['video']).count(), 1)
+
+    def test_converted_columns_are_skipped(self):
+        resource = ResourceFactory(type=['guide'])
+        out = StringIO()
+
+        call_command('convert_choice_fields', stdout=out)
+
+        self.assertIn('Resource.type is already converted.', out.getvalue())
+        self.assertEqual(Resource.objects.get(pk=resource.pk).type, ['guide'])
+
+    def test_ratings_are_converted_to_numbers(self):
+        first, second = AnnualImpactReportFactory(), AnnualImpactReportFactory()
+        self.revert_to_literal(AnnualImpactReport, 'awareness_rating_admin', {first: '10', second: 'unknown'})
+        out = StringIO()
+
+        call_command('convert_choice_fields', stdout=out)
+
+        self.assertIn('AnnualImpactReport.awareness_rating_admin: converted to numbers, 1 rows', out.getvalue())
+        self.assertEqual(AnnualImpactReport.objects.get(pk=first.pk).awareness_rating_admin, 10)
+        self.assertIsNone(AnnualImpactReport.objects.get(pk=second.pk).awareness_rating_admin)
+
+
+class TestUpdateAbstractLanguages(TestCase):
+
+    def test_columns_are_filled_in(self):
+        abstract = AbstractFactory(language=['other', 'Old Norse'])
+        Abstract.objects.filter(pk=abstract.pk).update(language_code=None, language_label=None, language_slug=None)
+
+        call_command('update_abstract_languages', stdout=StringIO())
+
+        abstract = Abstract.objects.get(pk=abstract.pk)
+        self.assertEqual(abstract.language_code, 'other')
+        self.assertEqual(abstract.language_label, 'Old Norse')
+        self.assertEqual(abstract.language_slug, 'old-norse')
+
+    def test_colliding_languages_stop_the_update(self):
+        french = AbstractFactory(language=['fr', ''])
+        other = AbstractFactory(institution=french.institution, language=['es', ''])
+        renamed = AbstractFactory(language=['de', ''])
+        Abstract.objects.filter(pk=other.pk).update(language=['other', 'French'])
+        Abstract.objects.filter(pk=renamed.pk).update(language=['other', 'Old Norse'])
+        err = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command('update_abstract_languages', stdout=StringIO(), stderr=err)
+
+        self.assertIn(str(other.pk), err.getvalue())
+        self.assertEqual(Abstract.objects.get(pk=other.pk).language_slug, 'spanish-castilian')
+        self.assertEqual(Abstract.objects.get(pk=renamed.pk).language_slug, 'german')  # nothing was written
+
+
+class TestImportInstitutions(TestCase):
+    header = [
+        'source_id', 'display_name', 'official_name', 'sparc_member', 'address', 'city', 'state_province', 'country',
+        'zip', 'main_url', 'level', 'control', 'highest_degree', 'carnegie', 'location_type', 'size',
+        'system_source_id', 'congressional_district', 'longitude', 'latitude', 'enrollment', 'type', 'source',
+        'instcat',
+    ]
+
+    def row(self, source_id, name, city='Anchorage', enrollment='17151', sparc_member=''):
+        return [
+            source_id, name, name, sparc_member, '3211 Providence Drive', city, 'AK', 'United States', '99508',
+            'http://www.example.edu', 'Four or more years', 'Public', "Doctor's degree", 'No answer', 'City: Large',
+            '10,000 - 19,999', '', 'AK, District 00', '-149.826135', '61.189554', enrollment, 'Public 4-Year',
+            'hd2015/ef2014', '',
+        ]
+
+    def import_rows(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(self.header)
+            writer.writerows(rows)
+        self.addCleanup(os.remove, csvfile.name)
+        out = StringIO()
+        call_command('import_institutions', csvfile.name, *args, stdout=out)
+        return out.getvalue()
+
+    def test_new_institutions_are_created(self):
+        out = self.import_rows([
+            self.row('1', 'First College', sparc_member='SPARC'),
+            self.row('2', 'Second College', enrollment='n/a'),
+        ])
+
+        self.assertIn('2 rows imported', out)
+        self.assertIn('2 created, 0 updated, 0 unchanged', out)
+        first = Institution.objects.get(name='First College')
+        self.assertEqual(first.profile.source_id, '1')
+        self.assertIs(first.profile.sparc_member, True)
+        self.assertEqual(first.profile.enrollment, 17151)
+        self.assertEqual(first.profile.institution_website, 'http://www.example.edu')
+        self.assertFalse(first.profile.reviewed)
+        second = InstitutionProfile.objects.get(source_id='2')
+        self.assertIs(second.sparc_member, False)
+        self.assertIsNone(second.enrollment)
+
+    def test_only_changed_profiles_are_updated(self):
+        self.import_rows([self.row('1', 'First College'), self.row('2', 'Second College')])
+        InstitutionProfile.objects.filter(source_id='1').update(reviewed=True)
+
+        out = self.import_rows([
+            self.row('1', 'First College', city='Juneau', enrollment=''),
+            self.row('2', 'Second College'),
+            self.row('3', 'Third College'),
+        ])
+
+        self.assertIn('1 created, 1 updated, 1 unchanged', out)
+        profile = InstitutionProfile.objects.get(source_id='1')
+        self.assertEqual(profile.city, 'Juneau')
+        self.assertIsNone(profile.enrollment)
+        self.assertTrue(profile.reviewed)
+        self.assertEqual(InstitutionProfile.objects.get(source_id='2').city, 'Anchorage')
+        self.assertEqual(Institution.objects.count(), 3)
+
+    def test_dry_run_diff_writes_nothing(self):
+        self.import_rows([self.row('1', 'First College')])
+
+        out = self.import_rows([self.row('1', 'First College', city='Juneau'), self.row('2', 'Second College')],
+                               '--dry-run', '--diff')
+
+        self.assertIn('+ 2 Second College', out)
+        self.assertIn("~ 1 city: 'Anchorage' -> 'Juneau'", out)
+        self.assertIn('2 rows compared', out)
+        self.assertIn('1 created, 1 updated, 0 unchanged', out)
+        self.assertEqual(InstitutionProfile.objects.get(source_id='1').city, 'Anchorage')
+        self.assertFalse(InstitutionProfile.objects.filter(source_id='2').exists())
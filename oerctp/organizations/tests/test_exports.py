@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from test_plus.test import TestCase
+
+from ..resources import AnnualImpactReportResource, InstitutionProfileResource, ProgramResource
+from ..views import CSVExportView
+from ..models import Program
+from .factories import AnnualImpactReportFactory, InstitutionFactory, ProgramFactory, TagFactory
+
+
+@mock.patch.object(CSVExportView, 'chunk_size', 2)
+class TestCSVExport(TestCase):
+
+    def setUp(self):
+        self.user = self.make_user()
+        for i in range(5):
+            ProgramFactory(institution=InstitutionFactory(profile__filled_in_by='librarian@example.edu'))
+
+    def export(self, url_name):
+        with self.login(self.user):
+            response = self.get(url_name)
+        self.response_200(response)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_streamed_export_matches_dataset_export(self):
+        self.assertEqual(self.export('export_programs'), ProgramResource().export().csv)
+
+    def test_tags_are_exported_in_bulk(self):
+        tag = TagFactory()
+        for program in Program.objects.all():
+            program._tags_raw.add(tag.slug)
+        expected = ProgramResource().export().csv
+
+        with CaptureQueriesContext(connection) as queries:
+            csv = self.export('export_programs')
+
+        self.assertEqual(csv, expected)
+        tag_queries = [query for query in queries.captured_queries if 'uuidtaggeditem' in query['sql']]
+        self.assertEqual(len(tag_queries), 3)  # one for each chunk of 2 programs, instead of one for each program
+
+    def test_streamed_export_of_filtered_queryset(self):
+        csv = self.export('export_institutionprofiles')
+
+        self.assertEqual(csv, InstitutionProfileResource().export().csv)
+        self.assertEqual(len(csv.splitlines()), 6)
+
+    def test_export_requires_login(self):
+        response = self.get('export_programs')
+
+        self.response_302(response)
+
+    def test_not_sure_rating_is_exported_as_unknown(self):
+        AnnualImpactReportFactory(awareness_rating_admin=10, awareness_rating_students=None)
+        dataset = AnnualImpactReportResource().export()
+
+        self.assertEqual(dataset['awareness_rating_admin'], [10])
+        self.assertEqual(dataset['awareness_rating_students'], ['unknown'])
@@ -0,0 +1,158 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from test_plus.test import TestCase
+
+from ..filters import InstitutionFilter
+from ..models import Resource
+from .factories import (
+    AbstractFactory, EventFactory, InstitutionFactory, InstitutionProfileFactory, ProgramFactory, ResourceFactory,
+)
+
+
+class TestInstitutionFilter(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        InstitutionProfileFactory(state_province='IL')
+        InstitutionProfileFactory(state_province='CA')
+        InstitutionProfileFactory(state_province='NY', reviewed=False)
+
+    def state_province_choices(self):
+        return InstitutionFilter().form.fields['state_province'].choices
+
+    def test_creating_filterset_issues_no_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            InstitutionFilter()
+
+        self.assertEqual(len(queries), 0)
+
+    def test_choices_offer_reviewed_values_sorted_by_label(self):
+        self.assertEqual(self.state_province_choices(), [('CA', 'USA: California'), ('IL', 'USA: Illinois')])
+
+    def test_choices_are_cached(self):
+        self.state_province_choices()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.state_province_choices()
+
+        self.assertEqual(len(queries), 0)
+
+    def test_saving_profile_invalidates_choices(self):
+        self.state_province_choices()
+
+        InstitutionProfileFactory(state_province='OH')
+
+        self.assertIn(('OH', 'USA: Ohio'), self.state_province_choices())
+
+
+class TestResourceFilter(TestCase):
+
+    def setUp(self):
+        ResourceFactory(name='Guide resource', type=['guide'])
+        ResourceFactory(name='Video resource', type=['video'])
+        ResourceFactory(name='Guide and video resource', type=['guide', 'video'])
+
+    def test_type_facet_offers_each_option_once(self):
+        response = self.get('filter_resources')
+
+        choices = response.context['filter'].form.fields['resource_type'].choices
+        self.assertEqual(choices, list(Resource.TYPE_CHOICES))
+
+    def test_filter_by_any_selected_type(self):
+        response = self.get('filter_resources', data={'resource_type': ['guide', 'video']})
+
+        names = [resource.name for resource in response.context['filter'].qs()]
+        self.assertEqual(names, ['Guide and video resource', 'Guide resource', 'Video resource'])
+
+    def test_filter_by_all_selected_types(self):
+        data = {'resource_type': ['guide', 'video'], 'resource_type_match': 'all'}
+        response = self.get('filter_resources', data=data)
+
+        names = [resource.name for resource in response.context['filter'].qs()]
+        self.assertEqual(names, ['Guide and video resource'])
+
+
+class TestProgramFilter(TestCase):
+
+    def setUp(self):
+        ProgramFactory(name='Grants program', funding_source=[['grants'], ''])
+        ProgramFactory(name='State program', funding_source=[['state', 'other'], 'Foundation'])
+        ProgramFactory(name='Grants and state program', funding_source=[['grants', 'state'], ''])
+
+    def test_filter_by_any_funding_source(self):
+        response = self.get('filter_programs', data={'funding_source': ['grants', 'state']})
+
+        names = [program.name for program in response.context['filter'].qs()]
+        self.assertEqual(names, ['Grants and state program', 'Grants program', 'State program'])
+
+    def test_filter_by_all_funding_sources(self):
+        data = {'funding_source': ['grants', 'state'], 'funding_source_match': 'all'}
+        response = self.get('filter_programs', data=data)
+
+        names = [program.name for program in response.context['filter'].qs()]
+        self.assertEqual(names, ['Grants and state program'])
+
+
+class TestEventFilter(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_filter_by_custom_type(self):
+        EventFactory(name='Hackathon event', type=['other', 'Hackathon'])
+        EventFactory(name='Workshop event', type=['workshop', ''])
+
+        response = self.get('filter_events', data={'event_type': json.dumps(['other', 'Hackathon'])})
+
+        self.response_200(response)
+        self.assertContains(response, 'Hackathon (Custom Type)')
+        self.assertContains(response, 'Hackathon event')
+        self.assertNotContains(response, 'Workshop event')
+
+    def test_warm_request_only_checks_data_version(self):
+        EventFactory(name='Workshop event', type=['workshop', ''])
+        self.get('filter_events')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get('filter_events')
+
+        self.assertFalse([query for query in queries if 'DISTINCT' in query['sql']])
+
+    def test_new_value_rebuilds_choices(self):
+        EventFactory(name='Workshop event', type=['workshop', ''])
+        self.get('filter_events')
+
+        EventFactory(name='Hackathon event', type=['other', 'Hackathon'])
+        response = self.get('filter_events')
+
+        self.assertContains(response, 'Hackathon (Custom Type)')
+
+
+class TestAbstractFilter(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_filter_by_language_slug(self):
+        AbstractFactory(institution=InstitutionFactory(name='French College'), language=['fr', ''])
+        AbstractFactory(institution=InstitutionFactory(name='Latin College'), language=['other', 'Latin'])
+
+        response = self.get('filter_abstracts', data={'language': 'latin'})
+
+        self.response_200(response)
+        self.assertContains(response, 'Latin College')
+        self.assertNotContains(response, 'French College')
+
+    def test_warm_request_only_checks_data_version(self):
+        AbstractFactory(language=['es', ''])
+        response = self.get('filter_abstracts')
+        self.assertIn(('spanish-castilian', 'Spanish; Castilian'),
+                      response.context['filter'].form.fields['language'].choices)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get('filter_abstracts')
+
+        self.assertFalse([query for query in queries if 'DISTINCT' in query['sql']])
@@ -0,0 +1,103 @@
+from test_plus.test import TestCase
+
+from ..admin_forms import ProgramAdminForm
+from ..forms import AnnualImpactReportForm, InstitutionProfileForm, ResourceForm
+from ..models import AnnualImpactReport, Resource
+from .factories import AnnualImpactReportFactory, InstitutionFactory
+
+
+class TestResourceForm(TestCase):
+
+    def setUp(self):
+        self.data = {
+            'name': 'Open Textbook Guide',
+            'type': ['guide', 'video'],
+            'scope': 'oer',
+            'license_0': 'other',
+            'license_1': 'CC BY 4.0 with exceptions',
+            'audience': ['faculty'],
+            'url': 'https://www.example.edu/guide',
+            'filled_in_by': 'librarian@example.edu',
+            'acknowledgments': 'on',
+        }
+
+    def test_choices_are_saved_as_lists(self):
+        form = ResourceForm(data=self.data)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.institution = InstitutionFactory()
+        resource = form.save()
+
+        resource = Resource.objects.get(pk=resource.pk)
+        self.assertEqual(resource.type, ['guide', 'video'])
+        self.assertEqual(resource.audience, ['faculty'])
+        self.assertEqual(resource.license, ['other', 'CC BY 4.0 with exceptions'])
+        self.assertEqual(resource.type_directorypage, ['Guide (e.g. LibGuide)', 'Video'])
+
+    def test_unknown_choice_is_rejected(self):
+        self.data['type'] = ['guide', 'podcast']
+        form = ResourceForm(data=self.data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('type', form.errors)
+
+
+class TestInstitutionProfileForm(TestCase):
+
+    def test_none_cannot_be_combined_with_other_options(self):
+        form = InstitutionProfileForm(data={'campus_engagement': ['library', 'none']})
+        self.assertFalse(form.is_valid())
+        self.assertIn('You cannot choose both "None"', form.errors['campus_engagement'][0])
+
+    def test_library_engagement_allows_at_most_three_choices(self):
+        form = InstitutionProfileForm(data={'library_engagement': ['admin', 'collections', 'reference', 'press']})
+        self.assertFalse(form.is_valid())
+        self.assertIn('at most 3 choices', form.errors['library_engagement'][0])
+
+
+class TestProgramAdminForm(TestCase):
+
+    def test_not_applicable_cannot_be_combined_with_other_options(self):
+        form = ProgramAdminForm(data={'incentives_0': ['na', 'grants'], 'incentives_1': ''})
+        self.assertFalse(form.is_valid())
+        self.assertIn('You cannot choose both "Not Applicable"', form.errors['incentives'][0])
+
+        form = ProgramAdminForm(data={'incentives_0': ['na'], 'incentives_1': ''})
+        form.is_valid()
+        self.assertNotIn('incentives', form.errors)
+
+
+class TestAnnualImpactReportForm(TestCase):
+
+    def setUp(self):
+        self.data = {
+            'year': 'ay2016',
+            'impact_students': '1200',
+            'awareness_rating_admin': '10',
+            'awareness_rating_faculty': '1',
+            'awareness_rating_library': '7',
+            'awareness_rating_students': 'unknown',
+            'filled_in_by': 'librarian@example.edu',
+            'acknowledgments': 'on',
+        }
+
+    def test_ratings_are_saved_as_numbers(self):
+        form = AnnualImpactReportForm(data=self.data)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.institution = InstitutionFactory()
+        report = AnnualImpactReport.objects.get(pk=form.save().pk)
+
+        self.assertEqual(report.awareness_rating_admin, 10)
+        self.assertEqual(report.awareness_rating_faculty, 1)
+        self.assertIsNone(report.awareness_rating_students)
+        self.assertEqual(report.get_awareness_rating_students_display(), 'Not sure')
+
+    def test_rating_is_required(self):
+        self.data['awareness_rating_admin'] = ''
+        form = AnnualImpactReportForm(data=self.data)
+        self.assertFalse(form.is_valid())
+        self.assertIn('awareness_rating_admin', form.errors)
+
+    def test_not_sure_is_selected_for_saved_report(self):
+        report = AnnualImpactReportFactory(awareness_rating_students=None)
+        form = AnnualImpactReportForm(instance=report)
+        self.assertIn('value="unknown" selected', str(form['awareness_rating_students']))
+        self.assertNotIn('value="unknown" selected', str(AnnualImpactReportForm()['awareness_rating_students']))
@@ -0,0 +1,89 @@
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from test_plus.test import TestCase
+
+from ..impact import reconcile_impact_totals, update_impact_totals
+from ..models import AnnualImpactReport, ImpactTotal, Institution
+from .factories import AnnualImpactReportFactory, InstitutionFactory
+
+
+class TestImpactTotals(TestCase):
+
+    def setUp(self):
+        self.institution = InstitutionFactory()
+        self.first = AnnualImpactReportFactory(institution=self.institution, year='ay2016', impact_faculty=None)
+        self.second = AnnualImpactReportFactory(institution=self.institution, year='ay2017', impact_students=300)
+        AnnualImpactReportFactory(year='ay2017', impact_students=5)  # another institution
+        AnnualImpactReportFactory(institution=self.institution, year='ay2015', hidden=True)
+        reconcile_impact_totals()  # the factories mark the reports reviewed by a queryset update
+
+    def totals(self, institution=None, year=''):
+        return ImpactTotal.objects.get(institution=institution, year=year)
+
+    def test_totals_are_summed_per_institution_year_and_directory(self):
+        total = self.totals(self.institution)
+        self.assertEqual((total.reports, total.students, total.faculty, total.courses), (2, 1500, 12, 60))
+        self.assertEqual(self.totals(self.institution, 'ay2017').students, 300)
+        self.assertEqual(self.totals(year='ay2017').students, 305)
+        self.assertEqual(self.totals().students, 1505)
+
+    def test_totals_are_read_without_the_reports(self):
+        institution = Institution.objects.get(pk=self.institution.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            totals = [institution.students_impacted_total, institution.faculty_impacted_total,
+                      institution.courses_impacted_total]
+
+        self.assertEqual(totals, [1500, 12, 60])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn(AnnualImpactReport._meta.db_table, queries[0]['sql'])
+
+    def test_totals_follow_saves_and_deletes(self):
+        self.second.delete()
+        self.assertEqual(self.totals(self.institution).students, 1200)
+        self.assertFalse(ImpactTotal.objects.filter(institution=self.institution, year='ay2017').exists())
+
+        self.first.impact_students = 100
+        self.first.save()  # not saved by a trusted user: waits for a review again
+        self.assertFalse(ImpactTotal.objects.filter(institution=self.institution).exists())
+
+        AnnualImpactReport.objects.filter(pk=self.first.pk).update(reviewed=True)
+        update_impact_totals(self.institution.pk)
+        self.assertEqual(self.totals(self.institution).students, 100)
+        self.assertEqual(self.totals().students, 105)
+
+    def test_reconcile_command_fixes_drift(self):
+        AnnualImpactReport.objects.filter(pk=self.second.pk).update(impact_students=400)
+        out = StringIO()
+
+        call_command('reconcile_impact_totals', '--check', stdout=out)
+        self.assertIn('4 impact totals differ.', out.getvalue())
+        self.assertEqual(self.totals(self.institution).students, 1500)
+
+        call_command('reconcile_impact_totals', stdout=StringIO())
+        self.assertEqual(self.totals(self.institution).students, 1600)
+        self.assertEqual(reconcile_impact_totals(fix=False), [])
+
+    def test_saves_only_recompute_the_changed_years(self):
+        self.second.year = 'ay2014'
+        self.second.save()
+        AnnualImpactReport.objects.filter(pk=self.second.pk).update(reviewed=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            update_impact_totals(self.institution.pk)
+
+        self.assertEqual(self.totals(year='ay2014').students, 300)
+        self.assertEqual(self.totals(year='ay2017').students, 5)
+        self.assertEqual(self.totals(year='ay2016').students, 1200)
+        self.assertEqual(self.totals().students, 1505)
+        self.assertEqual(reconcile_impact_totals(fix=False), [])
+        report_queries = [query['sql'] for query in queries if AnnualImpactReport._meta.db_table in query['sql']]
+        self.assertEqual(len(report_queries), 1)
+        self.assertIn('"institution_id" IN', report_queries[0])
+
+    def test_directory_totals_are_unique_per_year(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ImpactTotal.objects.create(institution=None, year='ay2017')
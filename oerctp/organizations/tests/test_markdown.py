@@ -0,0 +1,33 @@
+from unittest import mock
+
+from django.core.cache import cache
+from test_plus.test import TestCase
+
+from ..templatetags import markdown_helper
+from ..templatetags.markdown_helper import markdown_to_html, render_markdown
+
+
+class TestMarkdownToHtml(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        render_markdown.cache_clear()
+
+    def test_headings_are_demoted(self):
+        self.assertEqual(markdown_to_html('# Title\nText'), '<h4>Title</h4>\n<p>Text</p>')
+
+    def test_html_is_sanitized(self):
+        html = markdown_to_html('**Bold** <script>alert(1)</script> [link](http://example.edu "Title")')
+
+        self.assertIn('<strong>Bold</strong>', html)
+        self.assertIn('<a href="http://example.edu" title="Title">link</a>', html)
+        self.assertNotIn('<script>', html)
+
+    def test_html_is_rendered_once(self):
+        with mock.patch.object(markdown_helper, 'render_markdown_uncached', return_value='<p>Text</p>') as render:
+            markdown_to_html('Text')
+            markdown_to_html('Text')
+            render_markdown.cache_clear()  # e.g. another process
+            self.assertEqual(markdown_to_html('Text'), '<p>Text</p>')
+
+        self.assertEqual(render.call_count, 1)
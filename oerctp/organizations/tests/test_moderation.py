@@ -0,0 +1,102 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from test_plus.test import TestCase
+
+from ..impact import reconcile_impact_totals
+from ..models import AnnualImpactReport, ImpactTotal, Program, SearchDocument
+from ..moderation import moderate
+from ..review import review_counts
+from ..versions import directory_version
+from .factories import AnnualImpactReportFactory, InstitutionFactory, ProgramFactory
+
+
+class TestModerate(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = self.make_user('staff')
+        self.staff.groups.add(Group.objects.create(name='SPARC Staff'))
+        self.institution = InstitutionFactory()
+        self.programs = [ProgramFactory(institution=self.institution, reviewed=False) for i in range(3)]
+        self.report = AnnualImpactReportFactory(institution=self.institution, reviewed=False)
+
+    def selection(self):
+        return {Program: [program.pk for program in self.programs], AnnualImpactReport: [self.report.pk]}
+
+    def test_one_update_per_model(self):
+        with CaptureQueriesContext(connection) as queries:
+            count = moderate(self.selection(), 'review', self.staff)
+
+        self.assertEqual(count, 4)
+        self.assertEqual(Program.objects.to_review().count(), 0)
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE') and '"reviewed" = true' in query['sql']]
+        self.assertEqual(len(updates), 2)
+
+    def test_derived_data_is_refreshed(self):
+        self.assertEqual(review_counts()['program'], 3)
+        version = directory_version()
+
+        moderate(self.selection(), 'review', self.staff)
+
+        self.assertEqual(review_counts()['program'], 0)
+        self.assertNotEqual(directory_version(), version)
+        self.assertEqual(SearchDocument.objects.filter(kind='program').count(), 3)
+        self.assertEqual(ImpactTotal.objects.get(institution=self.institution, year='').students, 1200)
+
+        moderate({Program: [self.programs[0].pk]}, 'hide', self.staff)
+        self.assertEqual(SearchDocument.objects.filter(kind='program').count(), 2)
+        self.assertTrue(Program.objects.get(pk=self.programs[0].pk).reviewed)
+
+    def test_changes_of_untrusted_users_need_a_review(self):
+        report = AnnualImpactReportFactory(institution=self.institution, year='ay2010')
+        reconcile_impact_totals()  # the factory reviewed the report by a queryset update
+
+        moderate({AnnualImpactReport: [report.pk]}, 'unhide', self.make_user('editor'))
+
+        self.assertFalse(AnnualImpactReport.objects.get(pk=report.pk).reviewed)
+        self.assertFalse(ImpactTotal.objects.filter(institution=self.institution).exists())
+        with self.assertRaises(PermissionDenied):
+            moderate(self.selection(), 'review')
+
+
+class TestModerationViews(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = self.make_user('staff')
+        self.staff.groups.add(Group.objects.create(name='SPARC Staff'))
+        self.programs = [ProgramFactory(reviewed=False) for i in range(2)]
+
+    def test_bulk_review_from_the_queue(self):
+        items = ['Program:{}'.format(program.pk) for program in self.programs] + ['Program:not-a-uuid']
+        with self.login(self.staff):
+            response = self.post('review_bulk', data={'items': items, 'action': 'review'}, follow=True)
+
+        self.assertContains(response, '2 items approved.')
+        self.assertEqual(Program.objects.to_review().count(), 0)
+
+    def test_bulk_review_is_for_staff_only(self):
+        with self.login(self.make_user('editor')):
+            self.response_404(self.post('review_bulk', data={'items': [], 'action': 'review'}))
+
+    def test_hide_unhide(self):
+        program = self.programs[0]
+        self.post('hide_unhide', data={'model': 'Program', 'id': program.pk, 'status': 'hide'})
+
+        self.assertTrue(Program.objects.get(pk=program.pk).hidden)
+
+    def test_admin_actions(self):
+        admin = self.make_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        data = {'action': 'hide', '_selected_action': [program.pk for program in self.programs]}
+
+        with self.login(admin):
+            self.post('admin:organizations_program_changelist', data=data)
+
+        self.assertEqual(Program.objects.filter(hidden=True).count(), 2)
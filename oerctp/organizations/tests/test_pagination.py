@@ -0,0 +1,77 @@
+from unittest import mock
+
+from test_plus.test import TestCase
+
+from ..views_public import DirectoryFilterView
+from .factories import AbstractFactory, InstitutionFactory, ProgramFactory
+
+
+@mock.patch.object(DirectoryFilterView, 'page_size', 2)
+class TestDirectoryPagination(TestCase):
+
+    def setUp(self):
+        for name in ['Delta College', 'Alpha College', 'Echo College', 'Charlie College', 'Bravo College']:
+            ProgramFactory(name='{} program'.format(name), institution=InstitutionFactory(name=name))
+
+    def names(self, response):
+        return [institution.name for institution in response.context['page']]
+
+    def search(self, **data):
+        return self.get('filter_institutions', data=dict(name='College', **data))
+
+    def test_pages_follow_name_order(self):
+        response = self.search()
+        self.assertEqual(self.names(response), ['Alpha College', 'Bravo College'])
+        self.assertEqual(response.context['paginator'].count, 5)
+
+        response = self.search(after=response.context['page'].next_cursor())
+        self.assertEqual(self.names(response), ['Charlie College', 'Delta College'])
+
+        response = self.search(after=response.context['page'].next_cursor())
+        self.assertEqual(self.names(response), ['Echo College'])
+        self.assertFalse(response.context['page'].has_next)
+
+    def test_previous_page(self):
+        first = self.search().context['page']
+        second = self.search(after=first.next_cursor()).context['page']
+
+        response = self.search(before=second.previous_cursor())
+
+        self.assertEqual(self.names(response), ['Alpha College', 'Bravo College'])
+        self.assertFalse(response.context['page'].has_previous)
+        self.assertTrue(response.context['page'].has_next)
+
+    def test_equal_names_are_not_skipped(self):
+        InstitutionFactory(name='Alpha College')
+
+        first = self.search().context['page']
+        second = self.search(after=first.next_cursor()).context['page']
+
+        self.assertEqual([i.name for i in first] + [i.name for i in second],
+                         ['Alpha College', 'Alpha College', 'Bravo College', 'Charlie College'])
+
+    def test_page_links_keep_filters(self):
+        response = self.search()
+
+        self.assertContains(response, '?name=College&amp;after=')
+
+    def test_invalid_cursor(self):
+        response = self.get('filter_institutions', data={'after': 'not a cursor'})
+        self.response_404(response)
+
+    def test_activity_pages(self):
+        response = self.get('filter_programs')
+
+        self.assertEqual([program.name for program in response.context['page']],
+                         ['Alpha College program', 'Bravo College program'])
+        self.assertContains(response, 'Next &raquo;')
+
+    def test_abstract_pages_follow_institution_name(self):
+        AbstractFactory(institution=InstitutionFactory(name='Zulu College'))
+        AbstractFactory(institution=InstitutionFactory(name='Yankee College'))
+
+        response = self.get('filter_abstracts')
+
+        self.response_200(response)
+        self.assertEqual([abstract.institution.name for abstract in response.context['page']],
+                         ['Yankee College', 'Zulu College'])
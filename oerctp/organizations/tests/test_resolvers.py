@@ -0,0 +1,52 @@
+from test_plus.test import TestCase
+
+from ..models import Institution
+from ..resolvers import _slug_ids, cache_institution_id, resolve_institution
+from .factories import AbstractFactory, InstitutionFactory
+
+
+def load(institution_id):
+    return Institution.objects.get(pk=institution_id)
+
+
+class TestResolveInstitution(TestCase):
+
+    def setUp(self):
+        _slug_ids.clear()
+        self.institution = InstitutionFactory(slug='first-university')
+
+    def test_uuid_needs_no_lookup(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_institution(str(self.institution.pk), load), self.institution)
+
+    def test_slug_is_looked_up_once(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(resolve_institution('first-university', load), self.institution)
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_institution('first-university', load), self.institution)
+
+    def test_changed_slug_is_forgotten(self):
+        resolve_institution('first-university', load)
+        self.institution.slug = 'renamed-university'
+        self.institution.save()
+        other = InstitutionFactory(slug='first-university')
+
+        self.assertEqual(resolve_institution('first-university', load), other)
+
+    def test_slug_cached_by_another_process_is_checked(self):
+        other = InstitutionFactory(slug='second-university')
+        cache_institution_id('first-university', other.pk)  # other had the slug before
+
+        self.assertEqual(resolve_institution('first-university', load), self.institution)
+
+    def test_unknown_slug(self):
+        with self.assertRaises(Institution.DoesNotExist):
+            resolve_institution('no-university', load)
+
+    def test_abstract_page_is_resolved_once(self):
+        abstract = AbstractFactory(institution=self.institution)
+        self.get('institution_public_abstract', uuid_or_slug='first-university', lang=abstract.slug)
+
+        with self.assertNumQueries(1):
+            response = self.get('institution_public_abstract', uuid_or_slug='first-university', lang=abstract.slug)
+        self.response_200(response)
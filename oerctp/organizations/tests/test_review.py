@@ -0,0 +1,90 @@
+import datetime
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.utils import timezone
+from test_plus.test import TestCase
+
+from ..models import AnnualImpactReport, Institution, InstitutionProfile, Policy, Program
+from ..review import ReviewQueue, review_counts
+from .factories import (
+    AbstractFactory, AnnualImpactReportFactory, InstitutionFactory, PolicyFactory, ProgramFactory,
+)
+
+
+class TestModelMixinManager(TestCase):
+
+    def test_active_and_to_review(self):
+        reviewed = ProgramFactory()
+        waiting = ProgramFactory(reviewed=False)
+        ProgramFactory(hidden=True)
+
+        self.assertEqual(list(Program.objects.active()), [reviewed])
+        self.assertEqual(list(Program.objects.to_review()), [waiting])
+
+    def test_to_review_of_an_editor(self):
+        user = self.make_user()
+        mine = ProgramFactory(reviewed=False)
+        mine.institution.editors.add(user)
+        ProgramFactory(reviewed=False)
+        institution = InstitutionFactory(reviewed=False)
+        institution.editors.add(user)
+
+        self.assertEqual(list(Program.objects.to_review(user)), [mine])
+        self.assertEqual(list(Institution.objects.to_review(user)), [institution])
+
+
+class TestReviewQueue(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.institution = InstitutionFactory(name='First University')
+        self.program = ProgramFactory(institution=self.institution, reviewed=False, name='Textbook Grants')
+        self.report = AnnualImpactReportFactory(institution=self.institution, reviewed=False, year='ay2017')
+        self.abstract = AbstractFactory(institution=self.institution, reviewed=False, language=['es', ''])
+        self.policy = PolicyFactory(institution=self.institution)  # reviewed
+        InstitutionProfile.objects.filter(pk=self.institution.profile_id).update(reviewed=False)
+
+        # the oldest change first
+        now = timezone.now()
+        for minutes, model, obj in [(4, Program, self.program), (3, AnnualImpactReport, self.report),
+                                    (2, InstitutionProfile, self.institution.profile)]:
+            model.objects.filter(pk=obj.pk).update(updated_at=now - datetime.timedelta(minutes=minutes))
+
+    def test_queue_is_merged_in_one_query(self):
+        with self.assertNumQueries(1):
+            items = ReviewQueue()[0:10]
+
+        self.assertEqual([item.id for item in items],
+                         [self.program.pk, self.report.pk, self.institution.profile_id, self.abstract.pk])
+        self.assertEqual([item.name for item in items],
+                         ['Textbook Grants', '2016-2017', 'Institutional Profile', 'Spanish; Castilian'])
+        self.assertEqual(items[0].institution.name, 'First University')
+        self.assertEqual(items[0].get_review_url(), '/edit/{}/review/Program/'.format(self.program.pk))
+
+    def test_slices_and_kinds(self):
+        self.assertEqual([item.id for item in ReviewQueue()[1:3]], [self.report.pk, self.institution.profile_id])
+        self.assertEqual([item.id for item in ReviewQueue('abstract')[0:10]], [self.abstract.pk])
+
+    def test_counts_are_cached_until_an_object_is_saved(self):
+        self.assertEqual(review_counts()['program'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(ReviewQueue().count(), 4)
+            self.assertEqual(ReviewQueue('policy').count(), 0)
+
+        self.policy.save()  # not by a trusted user: it is reviewed again
+        self.assertEqual(review_counts()['policy'], 1)
+        self.assertEqual(Policy.objects.to_review().get(), self.policy)
+
+    def test_queue_is_for_staff_only(self):
+        user = self.make_user()
+        with self.login(user):
+            self.response_404(self.get('review_queue'))
+
+        user.groups.add(Group.objects.create(name='SPARC Staff'))
+        with self.login(user):
+            response = self.get('review_queue', data={'type': 'program'})
+            self.response_404(self.get('review_queue', data={'page': 2}))
+        self.assertContains(response, 'Textbook Grants')
+        self.assertNotContains(response, 'Institutional Profile')
+        self.assertContains(response, 'Programs (1)')
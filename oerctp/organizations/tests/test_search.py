@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from test_plus.test import TestCase
+
+from oerctp.users.tests.factories import UserFactory
+from ..models import Abstract, Institution, SearchDocument
+from ..search import SEARCH_DOCUMENTS, rebuild_search_documents
+from ..views_public import DirectoryFilterView
+from .factories import AbstractFactory, InstitutionFactory, PolicyFactory, ProgramFactory, TagFactory
+
+
+class TestSearch(TestCase):
+
+    def setUp(self):
+        self.college = InstitutionFactory(name='Springfield College', profile__city='Chicago')
+        InstitutionFactory(name='Lakeside College', profile__city='Springfield')
+        InstitutionFactory(name='Hill University', profile__city='Boston')
+
+    def search(self, url_name='filter_institutions', **data):
+        response = self.get(url_name, data=data)
+        self.response_200(response)
+        return response
+
+    def names(self, response):
+        return [obj.name for obj in response.context['page']]
+
+    def test_name_matches_rank_first(self):
+        response = self.search(q='springfield')
+
+        self.assertEqual(self.names(response), ['Springfield College', 'Lakeside College'])
+
+    def test_search_combines_with_filters(self):
+        response = self.search(q='springfield', city='Chicago')
+
+        self.assertEqual(self.names(response), ['Springfield College'])
+
+    def test_saving_updates_search_column(self):
+        self.college.name = 'Shelbyville College'
+        self.college.save()
+
+        self.assertEqual(self.names(self.search(q='shelbyville')), ['Shelbyville College'])
+
+    def test_command_updates_search_columns(self):
+        Institution.objects.filter(pk=self.college.pk).update(name='Shelbyville College')
+        self.assertEqual(self.names(self.search(q='shelbyville')), [])
+
+        call_command('update_search_vectors', stdout=StringIO())
+
+        self.assertEqual(self.names(self.search(q='shelbyville')), ['Shelbyville College'])
+
+    @mock.patch.object(DirectoryFilterView, 'page_size', 1)
+    def test_ranked_results_are_paginated(self):
+        first = self.search(q='springfield')
+        second = self.search(q='springfield', after=first.context['page'].next_cursor())
+
+        self.assertEqual(self.names(first) + self.names(second), ['Springfield College', 'Lakeside College'])
+        self.assertFalse(second.context['page'].has_next)
+
+    def test_activity_search(self):
+        ProgramFactory(name='Textbook affordability grants', institution=self.college)
+        ProgramFactory(name='Open pedagogy fellowship', institution=self.college)
+
+        response = self.search('filter_programs', q='textbook grants')
+
+        self.assertEqual(self.names(response), ['Textbook affordability grants'])
+
+    def test_abstract_search_by_institution(self):
+        AbstractFactory(institution=self.college)
+
+        response = self.search('filter_abstracts', q='springfield')
+
+        self.assertEqual([abstract.institution for abstract in response.context['page']], [self.college])
+
+
+class TestSearchPage(TestCase):
+
+    def setUp(self):
+        self.college = InstitutionFactory(name='Riverside College')
+        self.program = ProgramFactory(name='Riverside textbook grants', institution=self.college)
+        PolicyFactory(name='Open policy', policy_abstract='Adopted by the Riverside senate.')
+        ProgramFactory(name='Unreviewed Riverside program', reviewed=False)
+        TagFactory(name='Riverside consortium')
+        # factories set the reviewed flag with a queryset update, which does not send post_save
+        for model in SEARCH_DOCUMENTS:
+            rebuild_search_documents(model)
+
+    def titles(self, response):
+        return [document.title for document in response.context['page']]
+
+    def test_search_all_kinds(self):
+        response = self.get('search', data={'q': 'riverside'})
+
+        self.response_200(response)
+        self.assertEqual(self.titles(response)[:2], ['Riverside College', 'Riverside textbook grants'])
+        self.assertEqual(sorted(self.titles(response)), [
+            'Open policy', 'Riverside College', 'Riverside consortium', 'Riverside textbook grants',
+        ])
+        self.assertEqual(response.context['facets'], [
+            ('institution', 'Institutions', 1),
+            ('program', 'Programs', 1),
+            ('policy', 'Policies', 1),
+            ('tag', 'Tags', 1),
+        ])
+
+    def test_search_one_kind(self):
+        response = self.get('search', data={'q': 'riverside', 'type': 'program'})
+
+        self.assertEqual(self.titles(response), ['Riverside textbook grants'])
+        self.assertEqual(len(response.context['facets']), 4)
+
+    def test_search_queries_only_documents(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get('search', data={'q': 'riverside'})
+
+        self.assertEqual(len(queries), 2)  # facets and results
+        for query in queries:
+            self.assertIn('organizations_searchdocument', query['sql'])
+
+    def test_json(self):
+        response = self.get('search', data={'q': 'grants', 'format': 'json'})
+
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['facets'], {'program': 1})
+        self.assertEqual(data['results'][0]['title'], 'Riverside textbook grants')
+        self.assertEqual(data['results'][0]['institution'], 'Riverside College')
+        self.assertTrue(data['results'][0]['url'].endswith('/directory/{}/'.format(self.college.id)))
+        self.assertIsNone(data['next'])
+
+    def test_hiding_removes_document(self):
+        self.program.hidden = True
+        self.program.save()
+
+        response = self.get('search', data={'q': 'grants'})
+
+        self.assertEqual(self.titles(response), [])
+
+    def test_reviewing_adds_document(self):
+        program = ProgramFactory(name='Newly reviewed program', reviewed=False)
+        self.assertFalse(SearchDocument.objects.filter(object_id=program.pk).exists())
+
+        program.reviewed = True
+        program.save(user=UserFactory(is_superuser=True))
+
+        self.assertEqual(self.titles(self.get('search', data={'q': 'newly reviewed'})), ['Newly reviewed program'])
+
+    def test_deleting_removes_document(self):
+        self.program.delete()
+
+        self.assertFalse(SearchDocument.objects.filter(object_id=self.program.pk).exists())
+
+    def test_abstract_document_follows_institution_name(self):
+        AbstractFactory(institution=self.college, language=['fr', ''])
+        rebuild_search_documents(Abstract)
+
+        self.college.name = 'Shelbyville College'
+        self.college.save()
+
+        titles = self.titles(self.get('search', data={'q': 'shelbyville', 'type': 'abstract'}))
+        self.assertEqual(titles, ['Shelbyville College (French)'])
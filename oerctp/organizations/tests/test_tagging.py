@@ -0,0 +1,70 @@
+from test_plus.test import TestCase
+
+from django.http import Http404
+
+from ..models import Event, Institution, Program, Tag
+from ..tagging import resolve_tags, tag_members
+from .factories import EventFactory, InstitutionFactory, PolicyFactory, ProgramFactory, ResourceFactory, TagFactory
+
+
+class TestResolveTags(TestCase):
+
+    def test_tags_of_mixed_objects_are_resolved_at_once(self):
+        institution = InstitutionFactory()
+        program = ProgramFactory(institution=institution)
+        untagged = ProgramFactory(institution=institution)
+        system = TagFactory(name='A system', type=Tag.TYPE_SYSTEM)
+        membership = TagFactory(name='B membership', type=Tag.TYPE_MEMBERSHIP)
+        institution._tags_raw.add(system.slug, membership.slug)
+        program._tags_raw.add(system.slug)
+
+        with self.assertNumQueries(2):
+            resolve_tags([institution, program, untagged])
+
+        self.assertEqual(institution.tag_list, list(institution.tags))
+        self.assertEqual(program.tag_list, [system])
+        self.assertEqual(untagged.tag_list, [])
+        self.assertEqual(len(institution.raw_tag_ids), 2)
+
+
+class TestTagMembers(TestCase):
+
+    def setUp(self):
+        self.tag = TagFactory()
+        self.institution = InstitutionFactory(name='B College')
+        self.other = InstitutionFactory(name='A University')
+        self.institution._tags_raw.add(self.tag.slug)
+        for institution in (self.institution, self.other):
+            ProgramFactory(institution=institution)._tags_raw.add(self.tag.slug)
+            EventFactory(institution=institution)._tags_raw.add(self.tag.slug)
+        PolicyFactory(institution=self.institution)  # not tagged
+        ResourceFactory(institution=self.institution)._tags_raw.add(TagFactory().slug)
+
+    def test_members_of_all_types_are_selected_in_one_query(self):
+        with self.assertNumQueries(1):
+            members = tag_members(self.tag.slug)
+
+        self.assertEqual(members.counts, {'institution': 1, 'program': 2, 'event': 2})
+        self.assertEqual([type(obj) for obj in members], [Institution, Program, Program, Event, Event])
+        programs = members.by_kind('program')
+        self.assertEqual([program.institution.name for program in programs], ['A University', 'B College'])
+        self.assertEqual(programs[0].type_directorypage, 'Grant Program')
+        self.assertEqual(members.by_kind('event')[0].type_directorypage, 'Workshop/Professional Development')
+
+    def test_pages(self):
+        first = tag_members(self.tag.slug, page=1, per_page=2, kind='program')
+        self.assertEqual(len(first), 2)
+        self.assertFalse(first.has_next())
+        self.assertEqual(first.counts['event'], 2)  # the other types are counted too
+
+        members = tag_members(self.tag.slug, page=2, per_page=3)
+        self.assertEqual(members.count, 5)
+        self.assertEqual([type(obj) for obj in members], [Event, Event])
+        with self.assertRaises(Http404):
+            tag_members(self.tag.slug, page=3, per_page=3)
+
+    def test_tag_page(self):
+        response = self.get('tag', slug=self.tag.slug, data={'type': 'event'})
+        self.response_200(response)
+        self.assertContains(response, 'Events using this tag (2)')
+        self.assertNotContains(response, 'Programs using this tag')
@@ -0,0 +1,139 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from test_plus.test import TestCase
+
+from ..models import Institution, Program, PublishedInstitution
+from .factories import (
+    AbstractFactory, EventFactory, InstitutionFactory, PolicyFactory, ProgramFactory, ResourceFactory, TagFactory
+)
+
+
+class TestInstitutionView(TestCase):
+
+    def setUp(self):
+        self.institution = InstitutionFactory()
+
+    def add_activities(self, count):
+        for i in range(count):
+            ProgramFactory(institution=self.institution)
+            PolicyFactory(institution=self.institution)
+            EventFactory(institution=self.institution)
+            ResourceFactory(institution=self.institution)
+            AbstractFactory(institution=self.institution)
+            self.institution._tags_raw.add(TagFactory().slug)
+
+    def count_queries(self):
+        """Queries of a request which builds the published document of the institution."""
+        PublishedInstitution.objects.filter(pk=self.institution.pk).delete()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('institution_public', uuid_or_slug=self.institution.id)
+        self.response_200(response)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_number_of_activities(self):
+        self.add_activities(1)
+        expected = self.count_queries()
+
+        self.add_activities(10)
+        self.assertEqual(self.count_queries(), expected)
+
+    def test_only_published_activities_are_displayed(self):
+        ProgramFactory(institution=self.institution, name='Published program')
+        ProgramFactory(institution=self.institution, name='Hidden program', hidden=True)
+        ProgramFactory(institution=self.institution, name='Unreviewed program', reviewed=False)
+
+        response = self.get('institution_public', uuid_or_slug=self.institution.id)
+
+        self.assertContains(response, 'Published program')
+        self.assertNotContains(response, 'Hidden program')
+        self.assertNotContains(response, 'Unreviewed program')
+
+
+class TestPublishedInstitution(TestCase):
+
+    def setUp(self):
+        self.institution = InstitutionFactory()
+        self.program = ProgramFactory(institution=self.institution, name='First program')
+
+    def test_page_is_served_from_one_row(self):
+        call_command('rebuild_published_institutions', stdout=StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('institution_public', uuid_or_slug=self.institution.id)
+
+        self.assertContains(response, 'First program')
+        self.assertEqual(len(queries), 1)
+
+    def test_changes_mark_the_document_stale(self):
+        call_command('rebuild_published_institutions', stdout=StringIO())
+
+        self.program.name = 'Renamed program'
+        self.program.save()
+        Program.objects.filter(pk=self.program.pk).update(reviewed=True)  # saving resets the reviewed flag
+
+        self.assertTrue(PublishedInstitution.objects.get(pk=self.institution.pk).stale)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('institution_public', uuid_or_slug=self.institution.id)
+        self.assertContains(response, 'First program')  # the stale document, not rebuilt by the request
+        self.assertEqual(len(queries), 1)
+
+        call_command('rebuild_published_institutions', '--stale', stdout=StringIO())
+        self.assertFalse(PublishedInstitution.objects.get(pk=self.institution.pk).stale)
+        self.assertContains(self.get('institution_public', uuid_or_slug=self.institution.id), 'Renamed program')
+
+    def test_missing_documents_are_built(self):
+        other = InstitutionFactory()
+        PublishedInstitution.objects.all().delete()
+
+        call_command('rebuild_published_institutions', '--stale', stdout=StringIO())
+
+        self.assertEqual(PublishedInstitution.objects.filter(stale=False).count(), 2)
+        self.assertEqual(PublishedInstitution.objects.get(pk=other.pk).name, other.name)
+
+    def test_slug_redirects(self):
+        Institution.objects.filter(pk=self.institution.pk).update(slug='first-college')
+
+        response = self.get('institution_public', uuid_or_slug=self.institution.id)
+
+        self.response_302(response)
+        self.response_200(self.get('institution_public', uuid_or_slug='first-college'))
+        self.response_404(self.get('institution_public', uuid_or_slug='unknown-college'))
+
+
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        self.institution = InstitutionFactory()
+        self.tag = TagFactory()
+
+    def assertNotModifiedUntilChanged(self, url_name, change, **kwargs):
+        response = self.get(url_name, **kwargs)
+        self.response_200(response)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Cookie')
+
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url_name, extra={'HTTP_IF_NONE_MATCH': etag}, **kwargs)
+        self.assertEqual(response.status_code, 304)
+        self.assertLessEqual(len(queries), 1)
+
+        change()
+        self.response_200(self.get(url_name, extra={'HTTP_IF_NONE_MATCH': etag}, **kwargs))
+
+    def test_institution_page(self):
+        def change():
+            ProgramFactory(institution=self.institution)
+            call_command('rebuild_published_institutions', '--stale', stdout=StringIO())
+
+        self.assertNotModifiedUntilChanged('institution_public', change, uuid_or_slug=self.institution.id)
+
+    def test_tag_page(self):
+        self.assertNotModifiedUntilChanged('tag', lambda: TagFactory(), slug=self.tag.slug)
+
+    def test_filter_page(self):
+        self.assertNotModifiedUntilChanged('filter_institutions', lambda: InstitutionFactory())
@@ -5,13 +5,13 @@ from django.views.generic.base import RedirectView
 from . import views, views_public
 from .filters import InstitutionFilter, ProgramFilter, PolicyFilter, EventFilter, ResourceFilter, AbstractFilter
 
-from django_filters.views import FilterView
-
 
 urlpatterns = [
     url(r'^edit/hide-unhide/$', views.HideUnhideView.as_view(), name='hide_unhide'),
     url(r'^edit/(?P<uuid>[^/]+)/$', views.InstitutionView.as_view(), name='institution'),
     url(r'^edit/(?P<pk>[^/]+)/review/(?P<type>[^/]+)/$', views.ReviewView.as_view(), name='review'),
+    url(r'^review/$', views.ReviewQueueView.as_view(), name='review_queue'),
+    url(r'^review/bulk/$', views.BulkModerationView.as_view(), name='review_bulk'),
     url(r'^edit/(?P<uuid>[^/]+)/access-links/$', views.AccessLinkListView.as_view(), name='access_links'),
     url(r'^edit/(?P<uuid>[^/]+)/profile/$', views.InstitutionProfileView.as_view(), name='profile'),
     url(r'^edit/(?P<uuid>[^/]+)/activity/program/$', views.ActivityProgramView.as_view(), name='activity_program'),
@@ -26,17 +26,20 @@ urlpatterns = [
     url(r'^edit/(?P<uuid>[^/]+)/link/edit/$', views.EditAccessLinkView.as_view(), name='access_edit'),
 
     # url(r'^directory/$', views_public.DirectoryHomepageView.as_view(), name='directory_homepage'),
-    url(r'^directory/$', FilterView.as_view(filterset_class=InstitutionFilter, template_name='filter/institution_filter.html'), name='filter_institutions'),
+    url(r'^directory/$', views_public.DirectoryFilterView.as_view(filterset_class=InstitutionFilter, template_name='filter/institution_filter.html'), name='filter_institutions'),
     url(r'^directory/(?P<uuid_or_slug>[^/]+)/$', views_public.InstitutionView.as_view(), name='institution_public'),
     url(r'^directory/(?P<uuid_or_slug>[^/]+)/(?P<lang>[^/]+)/$', views_public.InstitutionAbstractView.as_view(),
         name='institution_public_abstract'),
     url(r'^filter/institutions/$', RedirectView.as_view(pattern_name='filter_institutions', permanent=False), name='directory_homepage'),
-    url(r'^filter/programs/$', FilterView.as_view(filterset_class=ProgramFilter, template_name='filter/program_filter.html'), name='filter_programs'),
-    url(r'^filter/policies/$', FilterView.as_view(filterset_class=PolicyFilter, template_name='filter/policy_filter.html'), name='filter_policies'),
-    url(r'^filter/events/$', FilterView.as_view(filterset_class=EventFilter, template_name='filter/event_filter.html'), name='filter_events'),
-    url(r'^filter/resources/$', FilterView.as_view(filterset_class=ResourceFilter, template_name='filter/resource_filter.html'), name='filter_resources'),
-    url(r'^filter/abstracts/$', FilterView.as_view(filterset_class=AbstractFilter, template_name='filter/abstract_filter.html'), name='filter_abstracts'),
+    url(r'^filter/programs/$', views_public.DirectoryFilterView.as_view(filterset_class=ProgramFilter, template_name='filter/program_filter.html'), name='filter_programs'),
+    url(r'^filter/policies/$', views_public.DirectoryFilterView.as_view(filterset_class=PolicyFilter, template_name='filter/policy_filter.html'), name='filter_policies'),
+    url(r'^filter/events/$', views_public.DirectoryFilterView.as_view(filterset_class=EventFilter, template_name='filter/event_filter.html'), name='filter_events'),
+    url(r'^filter/resources/$', views_public.DirectoryFilterView.as_view(filterset_class=ResourceFilter, template_name='filter/resource_filter.html'), name='filter_resources'),
+    url(r'^filter/abstracts/$', views_public.DirectoryFilterView.as_view(filterset_class=AbstractFilter, template_name='filter/abstract_filter.html'), name='filter_abstracts'),
     url(r'^tag/(?P<slug>[^/]+)/$', views_public.TagView.as_view(), name='tag'),
+    url(r'^search/$', views_public.SearchView.as_view(), name='search'),
+
+    url(r'^analytics/impact/$', views.ImpactAnalyticsView.as_view(), name='impact_analytics'),
 
     # for regular download URLs: use login_required
     url(r'^export/impactreports/$', login_required(views.AnnualImpactReportExportView.as_view()), name='export_impactreports'),
@@ -1,6 +1,6 @@
 import csv
 from django.contrib import admin
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 
 # code based on https://web.archive.org/web/20170415183122/https://raw.githubusercontent.com/hackupc/backend/02cba72b4ea2f86cbb1382cdba2e975e26c03a93/register/utils.py which was inspired by: https://gist.github.com/mgerring/3645889
 
@@ -33,6 +33,24 @@ def export_as_csv_action(description="Export selected objects as CSV file",
     export_as_csv.short_description = description
     return export_as_csv
 
+class Echo:
+    """Pseudo-buffer for csv.writer: writerow() returns the formatted line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(rows, filename, content_type='csv'):
+    """
+    Response writing `rows` (lists of values) as CSV while they are being generated.
+
+    See https://docs.djangoproject.com/en/1.10/howto/outputting-csv/#streaming-large-csv-files
+    """
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename={}'.format(filename)
+    return response
+
 ### #djangoadmin #howto -- define multiple views per model (several ModelAdmins) -- solution: use proxy models
 
 def create_modeladmin(modeladmin, model, name = None, custom_verbose_plural = None):
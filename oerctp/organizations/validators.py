@@ -1,10 +1,22 @@
-import ast
 from datetime import datetime
 import string
 
 from django.core.validators import BaseValidator, ValidationError
 from django.utils.translation import ungettext_lazy as _
 
+
+def selected_choices(value):
+    """
+    Codes selected in a multi-choice field: an array of codes, or the codes of a JSON [[codes], other] pair. Values
+    which are not lists (e.g. a single CharField choice) select none.
+    """
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (list, tuple)):
+            return value[0]
+        return value
+    return []
+
+
 def ack_checked_validator(value):
     if not value:
         raise ValidationError('You must check the box to accept the acknowledgments.')
@@ -25,62 +37,38 @@ def twitter_handle_validator(value):
 
 
 def none_validator(value):
-    try:
-        lst = ast.literal_eval(value)
-    except ValueError:
-        print('chyba je tu1!', value)
-        lst = []
+    lst = selected_choices(value)
     if 'none' in lst and len(lst) > 1:
         raise ValidationError('You cannot choose both "None" ("None of the Above") and another option.')
 
 
 def no_validator(value):
-    try:
-        lst = ast.literal_eval(value)
-    except ValueError:
-        print('chyba je tu!2', value)
-        lst = []
+    lst = selected_choices(value)
     if 'no' in lst and len(lst) > 1:
         raise ValidationError('You cannot choose both "No" and another option.')
 
 
 def na_validator(value):
-    try:
-        lst = ast.literal_eval(value)
-    except ValueError:
-        print('chyba je tu!2a', value)
-        lst = []
+    lst = selected_choices(value)
     if 'na' in lst and len(lst) > 1:
         raise ValidationError('You cannot choose both "Not Applicable" and another option.')
 
 
 def notsure_unknown_validator(value):
-    try:
-        lst = ast.literal_eval(value)
-    except ValueError:
-        print('chyba je tu!2b', value)
-        lst = []
+    lst = selected_choices(value)
     if 'unknown' in lst and len(lst) > 1:
         raise ValidationError('You cannot choose both "Not Sure" and another option.')
 
 
 def unknown_validator(value):
-    try:
-        lst = ast.literal_eval(value)
-    except ValueError:
-        print('chyba je tu!2c', value)
-        lst = []
+    lst = selected_choices(value)
     if 'unknown' in lst and len(lst) > 1:
         raise ValidationError('You cannot choose both "Unknown" and another option.')
 
 
 # do not delete validators, even if they are unused (they are still referenced from migrations)
 def na_or_ns_validator(value):
-    try:
-        lst = ast.literal_eval(value)
-    except ValueError:
-        print('chyba je tu!3', value)
-        lst = []
+    lst = selected_choices(value)
     if ('na' in lst or 'unknown' in lst) and len(lst) > 1:
         raise ValidationError('You may not select any other options if you select “Not Sure” or “Not Applicable”')
 
@@ -97,8 +85,7 @@ class MaxChoicesValidator(BaseValidator):
         return value > limit
 
     def clean(self, x):
-        lst = ast.literal_eval(x)
-        return len(lst)
+        return len(selected_choices(x))
 
 
 class MinChoicesValidator(BaseValidator):
@@ -113,8 +100,7 @@ class MinChoicesValidator(BaseValidator):
         return value < limit
 
     def clean(self, x):
-        lst = ast.literal_eval(x)
-        return len(lst)
+        return len(selected_choices(x))
 
 
 def date_year_validator(value):
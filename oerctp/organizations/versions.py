@@ -0,0 +1,26 @@
+"""
+Versions of the data displayed by the public directory pages, the validators of their conditional GET requests.
+
+An institution page is rendered from its published document (see publish.py), so the document's `updated_at` is
+its version. The other pages (abstracts, tags, filter results) may show any object, so they share one directory
+version, kept in the configured cache and replaced whenever a directory object is saved or deleted (see signals.py).
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+DIRECTORY_VERSION_KEY = 'directory-version'
+
+
+def bump_directory_version():
+    now = timezone.now()
+    version = ('{:f}'.format(now.timestamp()), now)
+    cache.set(DIRECTORY_VERSION_KEY, version, None)
+    return version
+
+
+def directory_version():
+    """(version, time of the last change) of the whole directory."""
+    version = cache.get(DIRECTORY_VERSION_KEY)
+    if version is None:  # not known since the cache was cleared: assume everything has changed
+        version = bump_directory_version()
+    return version
@@ -2,7 +2,10 @@ import logging
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import reverse
+from django.template.defaultfilters import pluralize
 from django.views.generic import DetailView, UpdateView, View, FormView, TemplateView, ListView
 
 from .forms import (
@@ -11,10 +14,17 @@ from .forms import (
 )
 from .models import (
     Institution, InstitutionProfile, Event, Program, Policy, Resource, AnnualImpactReport,
-    Abstract, AccessLink
+    Abstract, AccessLink, TagMixin
 )
 
+from .analytics import DIMENSIONS, impact_analytics
+from .moderation import ACTIONS, moderate, moderated_model, parse_selection
+from .pagination import iterate_chunks
+from .resolvers import parse_uuid
+from .review import REVIEW_KINDS, ReviewQueue, review_counts
 from .resources import AnnualImpactReportResource, AbstractResource, InstitutionResource, InstitutionProfileResource, ProgramResource, PolicyResource, EventResource, ResourceResource, TagResource
+from .tagging import resolve_tags
+from .utils import streaming_csv_response
 
 # #todo -- there is a lot of repetition with "form_valid": if texts remain the same for all templates, consider cleaning up (create a mixin)
 
@@ -59,6 +69,8 @@ class InstitutionView(ObjectGetterMixin, SaveFormWithUserMixin, DetailView):
         self.object.profile.name = 'Institutional Profile'
         context['profile_table'] = [self.object.profile]
 
+        resolve_tags([self.object])
+
         return context
 
 
@@ -166,9 +178,10 @@ class LanguageView(ObjectGetterMixin, FormGetterMixin, SaveFormWithUserMixin, Up
         form = self.get_form(form_class)
 
         is_valid = form.is_valid()
+        # languages are also unique by their slug, which is part of the public URL (e.g. "Other: French" and French)
         languages = Abstract.objects.filter(
             institution=self.object.institution,
-            language=form.cleaned_data['language'],
+            language_slug=Abstract.language_columns(form.cleaned_data['language'])[2],
         )
         if languages.exists() and languages[0] != form.instance:
             is_valid = False
@@ -187,28 +200,22 @@ class LanguageView(ObjectGetterMixin, FormGetterMixin, SaveFormWithUserMixin, Up
 
 class HideUnhideView(View):
     def post(self, request, *args, **kwargs):
-        data = dict(request.POST)
-
         redirect_response = HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
 
-        try:
-            from django.apps import apps
-            model = apps.get_model(app_label='organizations', model_name=data['model'][0])
-        except (KeyError, LookupError):
-            logger.exception('An error occurred')
+        model = moderated_model(request.POST.get('model', ''))
+        if model is None:
+            logger.error('Cannot hide or unhide %r objects', request.POST.get('model'))
             messages.error(request, 'An error occurred, we logged it and we will try to fix it ASAP.')
             return redirect_response
 
-        try:
-            object = model.objects.get(id=data.get('id')[0])
-        except (model.DoesNotExists, ValueError):
+        # one UPDATE, see moderation.py
+        action = 'hide' if request.POST.get('status') == 'hide' else 'unhide'
+        pk = parse_uuid(request.POST.get('id'))
+        if pk is None or not moderate({model: [pk]}, action, request.user):
             messages.error(request, 'Object not found!')
             return redirect_response
 
-        object.hidden = data.get('status', [''])[0] == 'hide'
-        object.save()
-
-        msg = 'The object you selected is now hidden from the Connect OER directory. Click "unhide" to make it visible.' if object.hidden else 'This object is now visible in the Connect OER directory. Click "hide" to hide it again. Note that recent changes may not appear until they are reviewed.'
+        msg = 'The object you selected is now hidden from the Connect OER directory. Click "unhide" to make it visible.' if action == 'hide' else 'This object is now visible in the Connect OER directory. Click "hide" to hide it again. Note that recent changes may not appear until they are reviewed.'
         messages.success(request, msg)
 
         return redirect_response
@@ -327,7 +334,7 @@ class AccessFormView(ObjectGetterMixin, FormGetterMixin, DetailView, FormView):
         if model is Abstract:
             if Abstract.objects.filter(
                 institution=self.object.institution,
-                language=form.cleaned_data['language'],
+                language_slug=Abstract.language_columns(form.cleaned_data['language'])[2],
             ).exists():
                 is_valid = False
                 form.add_error('language', 'This language for this institution was already filled out!')
@@ -402,82 +409,144 @@ class ReviewView(LoginRequiredMixin, SaveFormWithUserMixin, UpdateView):
         return super().dispatch(request, *args, **kwargs)
 
 
-class AnnualImpactReportExportView(View):
+class ReviewQueueView(LoginRequiredMixin, TemplateView):
+    """
+    Everything waiting for a review, oldest change first, one page (`page`) at a time; see review.py.
+
+    `type` (a model name) lists the objects of one type only.
+    """
+    template_name = 'organizations/edit/review_queue.html'
+    page_size = 50
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.can_review():
+            raise Http404
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        kind = self.request.GET.get('type')
+        if kind not in REVIEW_KINDS:
+            kind = None
+
+        paginator = Paginator(ReviewQueue(kind), self.page_size)
+        try:
+            page = paginator.page(self.request.GET.get('page', 1))
+        except InvalidPage:
+            raise Http404('Invalid page')
+
+        counts = review_counts()
+        context.update({
+            'page_obj': page,
+            'type': kind,
+            'count': sum(counts.values()),
+            'facets': [(value, model._meta.verbose_name_plural, counts.get(value, 0))
+                       for value, model in REVIEW_KINDS.items()],
+        })
+        return context
 
-    def get(self, request, *args, **kwargs ):
-        dataset = AnnualImpactReportResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_impactreports.csv'
-        return response
 
+class BulkModerationView(LoginRequiredMixin, View):
+    """Approve, hide or unhide all the objects checked in the review queue (`items`) at once; see moderation.py."""
 
-class AbstractExportView(View):
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.can_review():
+            raise Http404
+        return super().dispatch(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        redirect_response = HttpResponseRedirect(request.META.get('HTTP_REFERER') or reverse('review_queue'))
+        action = request.POST.get('action')
+        if action not in ACTIONS:
+            messages.error(request, 'Please choose what to do with the selected items.')
+            return redirect_response
+
+        count = moderate(parse_selection(request.POST.getlist('items')), action, request.user)
+        messages.success(request, '{} item{} {}.'.format(count, pluralize(count), ACTIONS[action][1]))
+        return redirect_response
+
+
+class ImpactAnalyticsView(LoginRequiredMixin, TemplateView):
+    """Rollups of the published annual impact reports for the staff (see analytics.py); `?format=json` for JSON."""
+    template_name = 'organizations/edit/impact_analytics.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.can_review():
+            raise Http404
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        analytics = impact_analytics()
+        if request.GET.get('format') == 'json':
+            return JsonResponse(analytics)
+
+        context = self.get_context_data(
+            analytics=analytics,
+            rollups=[(title, analytics['rollups'][name]) for name, title, field, labels in DIMENSIONS],
+        )
+        return self.render_to_response(context)
 
-    def get(self, request, *args, **kwargs ):
-        dataset = AbstractResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_abstracts.csv'
-        return response
 
+class CSVExportView(View):
+    """Stream the CSV export of `resource_class`, fetching its queryset in chunks so the memory use stays bounded."""
+    resource_class = None
+    filename = None
+    chunk_size = 500
 
-class InstitutionExportView(View):
+    def rows(self):
+        resource = self.resource_class()
+        yield resource.get_export_headers()
+        tagged = issubclass(resource._meta.model, TagMixin)
+        for chunk in iterate_chunks(resource.get_queryset(), self.chunk_size):
+            if tagged:
+                resolve_tags(chunk)  # for TaggedResourceMixin
+            for obj in chunk:
+                yield resource.export_resource(obj)
 
-    def get(self, request, *args, **kwargs ):
-        dataset = InstitutionResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_institutions.csv'
-        return response
+    def get(self, request, *args, **kwargs):
+        return streaming_csv_response(self.rows(), self.filename)
 
 
-class InstitutionProfileExportView(View):
+class AnnualImpactReportExportView(CSVExportView):
+    resource_class = AnnualImpactReportResource
+    filename = 'connect_impactreports.csv'
 
-    def get(self, request, *args, **kwargs ):
-        dataset = InstitutionProfileResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_institutionprofiles.csv'
-        return response
 
+class AbstractExportView(CSVExportView):
+    resource_class = AbstractResource
+    filename = 'connect_abstracts.csv'
 
-class ProgramExportView(View):
 
-    def get(self, request, *args, **kwargs ):
-        dataset = ProgramResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_programs.csv'
-        return response
+class InstitutionExportView(CSVExportView):
+    resource_class = InstitutionResource
+    filename = 'connect_institutions.csv'
 
 
-class PolicyExportView(View):
+class InstitutionProfileExportView(CSVExportView):
+    resource_class = InstitutionProfileResource
+    filename = 'connect_institutionprofiles.csv'
 
-    def get(self, request, *args, **kwargs ):
-        dataset = PolicyResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_policies.csv'
-        return response
 
+class ProgramExportView(CSVExportView):
+    resource_class = ProgramResource
+    filename = 'connect_programs.csv'
 
-class EventExportView(View):
 
-    def get(self, request, *args, **kwargs ):
-        dataset = EventResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_events.csv'
-        return response
+class PolicyExportView(CSVExportView):
+    resource_class = PolicyResource
+    filename = 'connect_policies.csv'
 
 
-class ResourceExportView(View):
+class EventExportView(CSVExportView):
+    resource_class = EventResource
+    filename = 'connect_events.csv'
 
-    def get(self, request, *args, **kwargs ):
-        dataset = ResourceResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_resources.csv'
-        return response
 
+class ResourceExportView(CSVExportView):
+    resource_class = ResourceResource
+    filename = 'connect_resources.csv'
 
-class TagExportView(View):
 
-    def get(self, request, *args, **kwargs ):
-        dataset = TagResource().export()
-        response = HttpResponse(dataset.csv, content_type='csv')
-        response['Content-Disposition'] = 'attachment; filename=connect_tags.csv'
-        return response
+class TagExportView(CSVExportView):
+    resource_class = TagResource
+    filename = 'connect_tags.csv'
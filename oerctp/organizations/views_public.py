@@ -1,55 +1,156 @@
-from django.views.generic import DetailView, ListView
-from django.shortcuts import get_object_or_404, redirect, reverse
-from django.http import Http404
+from calendar import timegm
 
-from .models import Event, Institution, Policy, Program, Resource, Tag
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.views.generic import DetailView, ListView, TemplateView
+from django.shortcuts import redirect, reverse
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django_filters.views import FilterView
+
+from .models import Abstract, Institution, PublishedInstitution, SearchDocument, Tag
+from .pagination import KeysetPaginator
+from .publish import load_published, publish_institution
+from .resolvers import resolve_institution
+from .search import search_documents
+from .tagging import TAG_MEMBER_KINDS, tag_members
+from .versions import directory_version
 
 
 class GetInstitutionMixin:
+    """The object of the `uuid_or_slug` URL, loaded once per request (see resolvers.py)."""
+
+    def load_object(self, institution_id):
+        return self.model.objects.get(pk=institution_id)
+
+    def object_slug(self, obj):
+        return obj.slug
+
     def get_object(self):
-        try:
-            return self.model.objects.get(id=self.kwargs.get('uuid_or_slug'))
-        except (ValueError, self.model.DoesNotExist):
-            pass
+        if not hasattr(self, '_object'):
+            try:
+                self._object = resolve_institution(self.kwargs.get('uuid_or_slug'), self.load_object, self.object_slug)
+            except ObjectDoesNotExist:
+                raise Http404('No institution found matching the query')
+        return self._object
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET requests for a page the client (or a proxy) already has with 304 Not Modified, before rendering it.
+
+    `page_version()` returns the (version, last modified time) of the data on the page, or None if it is unknown.
+    Responses may be cached by the browser and by shared caches for DIRECTORY_CACHE_MAX_AGE seconds and revalidated
+    afterwards; they vary by cookie, as logged in users may see messages on the page.
+    """
+
+    def page_version(self):
+        return directory_version()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        version = self.page_version()
+        response = None
+        if version is not None:
+            response = get_conditional_response(
+                request, etag=version[0], last_modified=timegm(version[1].utctimetuple()),
+            )
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:  # e.g. a redirect to the slug URL
+                return response
+            version = version or self.page_version()  # e.g. known once the page has been rendered
+            if version is None:
+                return response
+            response['ETag'] = quote_etag(version[0])
+            response['Last-Modified'] = http_date(timegm(version[1].utctimetuple()))
+
+        patch_cache_control(response, public=True, max_age=settings.DIRECTORY_CACHE_MAX_AGE)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+
+class DirectoryFilterView(ConditionalGetMixin, FilterView):
+    """
+    Show one page of the filter results at a time, see pagination.py.
+
+    The filterset's qs() has to be ordered by a unique key (e.g. name, id). Pages are selected by the `after` and
+    `before` GET parameters, the other parameters (the filters) are kept in `page_query` for the page links.
+    """
+    page_size = 50
+
+    def get(self, request, *args, **kwargs):
+        self.filterset = self.get_filterset(self.get_filterset_class())
+        paginator = KeysetPaginator(self.filterset.qs(), self.page_size)
+        page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+        self.object_list = page.object_list
+
+        page_query = request.GET.copy()
+        page_query.pop('after', None)
+        page_query.pop('before', None)
 
-        return get_object_or_404(self.model, slug=self.kwargs.get('uuid_or_slug'))
+        context = self.get_context_data(
+            filter=self.filterset, object_list=self.object_list,
+            paginator=paginator, page=page, page_query=page_query.urlencode(),
+        )
+        return self.render_to_response(context)
 
 
 class DirectoryHomepageView(ListView):
-    # model = Institution  # same as `queryset = Institution.objects.all()`
-    queryset = Institution.objects.filter(profile__filled_in_by__isnull=False).exclude(profile__filled_in_by__exact='').exclude(profile__hidden=True).exclude(profile__reviewed=False).order_by('name' )
-    # # if more complex logic is required:
-    # from django.db.models import Q
-    # queryset = Institution.objects.exclude(Q(profile__reviewed=True) | Q(something__else=''))
+    # the institutions with a filled out profile, which has been reviewed and is not hidden (see publish.py)
+    queryset = PublishedInstitution.objects.filter(listed=True).only('pk', 'name').order_by('name')
     context_object_name = 'institutions_on_homepage'
     template_name = 'organizations/public/directory_homepage.html'
 
 
-class InstitutionView(GetInstitutionMixin, DetailView):
-    model = Institution
+class InstitutionView(ConditionalGetMixin, TemplateView):
+    """The public page of an institution, rendered from its published document (see publish.py), even a stale one."""
     template_name = 'organizations/public/institution.html'
+    published = None
 
-    def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
+    def page_version(self):
+        if self.published is None:
+            try:
+                self.published = resolve_institution(self.kwargs.get('uuid_or_slug'), load_published)
+            except Institution.DoesNotExist:
+                raise Http404('No institution found matching the query')
+        if self.published.updated_at is None:  # no document yet: it is built when the page is rendered
+            return None
+        return '{:f}'.format(self.published.updated_at.timestamp()), self.published.updated_at
+
+    def get(self, request, *args, **kwargs):
+        uuid_or_slug = kwargs.get('uuid_or_slug')
+        if self.published is None:
+            self.page_version()
+        if self.published.updated_at is None:
+            try:
+                self.published = publish_institution(self.published.pk)
+            except Institution.DoesNotExist:
+                raise Http404('No institution found matching the query')
 
-        if obj.slug and obj.slug != kwargs.get('uuid_or_slug'):
-            url = reverse('institution_public', kwargs={'uuid_or_slug': obj.slug})
+        # a stale document is shown until it is rebuilt (see publish.py), but its slug may be outdated
+        if self.published.slug and self.published.slug != uuid_or_slug and not self.published.stale:
+            url = reverse('institution_public', kwargs={'uuid_or_slug': self.published.slug})
             return redirect(url)
 
-        return super().dispatch(request, *args, **kwargs)
+        context = self.get_context_data(object=self.published.document)
+        return self.render_to_response(context)
 
 
-class InstitutionAbstractView(GetInstitutionMixin, DetailView):
-    model = Institution
+class InstitutionAbstractView(ConditionalGetMixin, GetInstitutionMixin, DetailView):
+    model = Abstract
     template_name = 'organizations/public/institution_abstract.html'
 
-    def get_object(self):
-        institution = super().get_object()
+    def load_object(self, institution_id):
+        return Abstract.objects.select_related('institution').get(
+            institution_id=institution_id, language_slug=self.kwargs.get('lang'),
+        )
 
-        for lang in institution.additional_languages.all():
-            if lang.slug == self.kwargs.get('lang'):
-                return lang
-        raise Http404
+    def object_slug(self, abstract):
+        return abstract.institution.slug
 
     def dispatch(self, request, *args, **kwargs):
         obj = self.get_object()
@@ -62,17 +163,95 @@ class InstitutionAbstractView(GetInstitutionMixin, DetailView):
         return super().dispatch(request, *args, **kwargs)
 
 
-class TagView(DetailView):
+class TagView(ConditionalGetMixin, DetailView):
+    """
+    The objects tagged with a tag, grouped by type, one page (`page`) at a time; see tagging.tag_members().
+
+    `type` (a model name) lists the objects of one type only.
+    """
     model = Tag
     template_name = 'organizations/public/tag.html'
+    page_size = 100
 
     def get_context_data(self, **kwargs):
-        slug = self.kwargs.get('slug')
         context = super().get_context_data(**kwargs)
+        if self.object.type == Tag.TYPE_HIDDEN:
+            return context
+
+        kind = self.request.GET.get('type')
+        if kind not in TAG_MEMBER_KINDS:
+            kind = None
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Invalid page')
+        if page < 1:
+            raise Http404('Invalid page')
 
-        context['institutions'] = Institution.objects.filter(_tags_raw__slug=slug)
-        context['programs'] = Program.objects.filter(_tags_raw__slug=slug)
-        context['policies'] = Policy.objects.filter(_tags_raw__slug=slug)
-        context['events'] = Event.objects.filter(_tags_raw__slug=slug)
-        context['resources'] = Resource.objects.filter(_tags_raw__slug=slug)
+        members = tag_members(self.object.slug, page, self.page_size, kind)
+        context.update({
+            'members': members,
+            'type': kind,
+            'facets': [(value, label, members.counts[value])
+                       for value, label in SearchDocument.KIND_CHOICES if value in members.counts],
+            'institutions': members.by_kind('institution'),
+            'programs': members.by_kind('program'),
+            'policies': members.by_kind('policy'),
+            'events': members.by_kind('event'),
+            'resources': members.by_kind('resource'),
+        })
         return context
+
+
+class SearchView(TemplateView):
+    """
+    Search the whole directory at once (see search.py), optionally only one `type` of objects.
+
+    The results are ranked by relevance and paginated like the filter pages. `?format=json` returns them as JSON.
+    """
+    template_name = 'organizations/public/search.html'
+    page_size = 20
+
+    def get(self, request, *args, **kwargs):
+        q = request.GET.get('q', '').strip()
+        kind = request.GET.get('type', '')
+        if kind not in dict(SearchDocument.KIND_CHOICES):
+            kind = ''
+
+        page = paginator = None
+        facets = {}
+        if q:
+            documents, facets = search_documents(q, kind)
+            count = facets.get(kind, 0) if kind else sum(facets.values())
+            paginator = KeysetPaginator(documents, self.page_size, count=count)
+            page = paginator.page(after=request.GET.get('after'), before=request.GET.get('before'))
+
+        if request.GET.get('format') == 'json':
+            return JsonResponse(self.json_data(q, kind, facets, page, paginator))
+
+        page_query = request.GET.copy()
+        page_query.pop('after', None)
+        page_query.pop('before', None)
+
+        context = self.get_context_data(
+            q=q, type=kind, page=page, paginator=paginator, page_query=page_query.urlencode(),
+            facets=[(value, label, facets[value]) for value, label in SearchDocument.KIND_CHOICES if value in facets],
+        )
+        return self.render_to_response(context)
+
+    def json_data(self, q, kind, facets, page, paginator):
+        return {
+            'q': q,
+            'type': kind,
+            'count': paginator.count if paginator else 0,
+            'facets': facets,
+            'results': [{
+                'type': document.kind,
+                'title': document.title,
+                'url': self.request.build_absolute_uri(document.url),
+                'institution': document.institution.name if document.institution else None,
+                'rank': document.search_rank,
+            } for document in (page or [])],
+            'next': page.next_cursor() if page and page.has_next else None,
+            'previous': page.previous_cursor() if page and page.has_previous else None,
+        }